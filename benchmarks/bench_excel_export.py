@@ -0,0 +1,107 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from openpyxl.styles import Font
+
+from naver_scraper.export import HEADERS, save_to_excel
+from naver_scraper.journal import ScrapeJournal
+from naver_scraper.tasks import ScrapingTask
+
+
+def make_records(count, seed=7):
+    rng = random.Random(seed)
+    syllables = "가나다라마바사아자차카타파하강남북서동명성원정"
+    for index in range(count):
+        name = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 12)))
+        yield {
+            "Restaurant Name": f"{name} {index}",
+            "Address": f"서울 중구 {rng.choice(syllables)}{rng.choice(syllables)}길 {rng.randint(1, 300)}",
+            "Phone Number": f"02-{rng.randint(100, 9999)}-{rng.randint(1000, 9999)}",
+        }
+
+
+def legacy_save_to_excel(file_path, task_results):
+    # The exporter as it was before the write-only rewrite: full in-memory workbook, one cell at a
+    # time, then a second walk over every column to size it
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for task, task_data in task_results:
+        sheet_title = f"{task.address} - {task.search_query}"
+        if len(sheet_title) > 31:
+            sheet_title = sheet_title[:28] + "..."
+        sheet = workbook.create_sheet(title=sheet_title)
+        for col, header in enumerate(HEADERS, start=1):
+            cell = sheet.cell(row=1, column=col, value=header)
+            cell.font = Font(bold=True)
+        for row, restaurant in enumerate(task_data, start=2):
+            for col, key in enumerate(HEADERS, start=1):
+                sheet.cell(row=row, column=col, value=restaurant.get(key, "N/A"))
+        for column in sheet.columns:
+            max_length = 0
+            column_letter = column[0].column_letter
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(cell.value)
+                except:
+                    pass
+            sheet.column_dimensions[column_letter].width = (max_length + 2) * 1.2
+    workbook.save(file_path)
+
+
+def measure(label, export, task_results_factory, file_path, track_memory):
+    task_results = task_results_factory()
+    start = time.perf_counter()
+    export(file_path, task_results)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if track_memory:
+        task_results = task_results_factory()
+        tracemalloc.start()
+        export(file_path, task_results)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    size = os.path.getsize(file_path)
+    peak_text = f"{peak / 2**20:8.1f} MiB" if peak is not None else "       -"
+    print(f"{label:<28} {elapsed:8.2f} s  peak {peak_text}  file {size / 2**20:6.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Excel exporters on synthetic records")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--tasks', type=int, default=1, help="Split the rows evenly over this many sheets")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    args = parser.parse_args()
+
+    tasks = [ScrapingTask(f"서울 중구 을지로 {i}", "근처 식당", args.rows // args.tasks, 50) for i in range(args.tasks)]
+    records = list(make_records(args.rows))
+    per_task = args.rows // args.tasks
+    in_memory = lambda: [(task, records[i * per_task:(i + 1) * per_task]) for i, task in enumerate(tasks)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = ScrapeJournal(os.path.join(tmp, 'bench.journal.sqlite'))
+        for task_index, task in enumerate(tasks):
+            key = journal.start_task(task_index, task)[0]
+            for entry_index, record in enumerate(records[task_index * per_task:(task_index + 1) * per_task], start=1):
+                journal.record(key, entry_index, record)
+        from_journal = lambda: journal.task_results(tasks)
+
+        print(f"{args.rows} rows over {args.tasks} sheet(s)")
+        track_memory = not args.no_memory
+        file_path = os.path.join(tmp, 'out.xlsx')
+        measure("legacy (in-memory)", legacy_save_to_excel, in_memory, file_path, track_memory)
+        measure("write-only from list", save_to_excel, in_memory, file_path, track_memory)
+        measure("write-only from journal", save_to_excel, from_journal, file_path, track_memory)
+        journal.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from naver_scraper import parsing
+from naver_scraper.parsing import DETAIL_FIELDS, EXTRACT_DETAIL_JS, extract_restaurant_detail, parse_restaurant_detail
+
+from benchmarks.fixture_server import GENERATED_ID_BASE, start_fixture_server
+
+
+def legacy_parse_restaurant_detail(page_source):
+    # The parser as it was before the field table: full BeautifulSoup tree with html.parser
+    soup = BeautifulSoup(page_source, 'html.parser')
+    restaurant_name = soup.select_one('span.GHAhO')
+    restaurant_name = restaurant_name.text.strip() if restaurant_name else "N/A"
+    address = soup.select_one('span.LDgIH')
+    address = address.text.strip() if address else "N/A"
+    phone_number = soup.select_one('span.xlx7Q')
+    phone_number = phone_number.text.strip() if phone_number else "N/A"
+    return {
+        "Restaurant Name": restaurant_name,
+        "Address": address,
+        "Phone Number": phone_number
+    }
+
+
+def time_calls(function, argument, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = function(argument)
+    return (time.perf_counter() - start) / iterations, result
+
+
+def report(label, seconds, payload_bytes=None):
+    payload = f"  payload {payload_bytes / 1024:8.1f} KiB" if payload_bytes is not None else ""
+    print(f"{label:<34} {seconds * 1000:9.2f} ms{payload}")
+
+
+def bench_parsers(page_source, iterations):
+    print(f"\nParsing a {len(page_source.encode('utf-8')) / 1024:.0f} KiB detail document ({iterations} iterations)")
+    seconds, expected = time_calls(legacy_parse_restaurant_detail, page_source, iterations)
+    report("BeautifulSoup html.parser (legacy)", seconds)
+    selectolax = parsing.SelectolaxParser
+    try:
+        parsing.SelectolaxParser = None
+        seconds, result = time_calls(parse_restaurant_detail, page_source, iterations)
+        report("lxml field table", seconds)
+        assert result == expected, result
+    finally:
+        parsing.SelectolaxParser = selectolax
+    if selectolax is not None:
+        seconds, result = time_calls(parse_restaurant_detail, page_source, iterations)
+        report("selectolax field table", seconds)
+        assert result == expected, result
+
+
+def bench_browser(base_url, iterations, show_browser):
+    from naver_scraper.scraping import setup_driver
+    driver = setup_driver(headless=not show_browser)
+    try:
+        driver.get(f"{base_url}/restaurant/{GENERATED_ID_BASE}/home")
+        print(f"\nReading the detail pane in Chrome ({iterations} iterations)")
+
+        def page_source_path(_):
+            return legacy_parse_restaurant_detail(driver.page_source)
+
+        def page_source_lxml(_):
+            return parse_restaurant_detail(driver.page_source)
+
+        seconds, expected = time_calls(page_source_path, None, iterations)
+        report("page_source + BeautifulSoup (legacy)", seconds, len(driver.page_source.encode('utf-8')))
+        seconds, result = time_calls(page_source_lxml, None, iterations)
+        report("page_source + field table parser", seconds, len(driver.page_source.encode('utf-8')))
+        assert result == expected, result
+        seconds, result = time_calls(extract_restaurant_detail, driver, iterations)
+        payload = json.dumps(driver.execute_script(EXTRACT_DETAIL_JS, DETAIL_FIELDS), ensure_ascii=False)
+        report("in-page extraction script", seconds, len(payload.encode('utf-8')))
+        assert result == expected, result
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ways of reading restaurant details from a place page")
+    parser.add_argument('--padding', type=int, default=800,
+                        help="Filler review blocks in the page; the default makes it about 300 KB")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--browser', action='store_true', help="Also compare the paths in Chrome (needs Chrome)")
+    parser.add_argument('--show-browser', action='store_true')
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(detail_padding=args.padding)
+    try:
+        page_source = server.place_page(str(GENERATED_ID_BASE))
+        bench_parsers(page_source, args.iterations)
+        if args.browser:
+            bench_browser(base_url, args.iterations, args.show_browser)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
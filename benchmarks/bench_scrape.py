@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from naver_scraper import engine, scraping, tabs
+from naver_scraper.cache import GeocodeCache
+from naver_scraper.engine import ScrapeEngine
+from naver_scraper.export import CsvExporter, save_to_excel
+from naver_scraper.http_detail import HttpDetailFetcher
+from naver_scraper.ratelimit import RateLimiter
+from naver_scraper.tasks import ScrapingTask
+from naver_scraper.waits import WaitPolicy
+
+from benchmarks.fixture_server import start_fixture_server
+
+# The fixture geocoder shows addresses at zoom 15; the benchmark task's zoom slider (50) is one level out
+TASK_MAP_ZOOM = 14
+
+
+class PhaseTimer:
+    # Times the pipeline's phases by temporarily wrapping the functions that implement them.
+    # Patching the module attribute is enough because callers look them up at call time.
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.patched = []
+
+    def wrap(self, module, name, phase):
+        original = getattr(module, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.durations[phase].append(time.perf_counter() - start)
+
+        setattr(module, name, timed)
+        self.patched.append((module, name, original))
+
+    def record(self, phase, seconds):
+        self.durations[phase].append(seconds)
+
+    def restore(self):
+        for module, name, original in reversed(self.patched):
+            setattr(module, name, original)
+        self.patched = []
+
+    def summary(self):
+        return {phase: {
+            'calls': len(values),
+            'total_s': sum(values),
+            'mean_ms': statistics.mean(values) * 1000,
+            'p95_ms': sorted(values)[max(0, int(len(values) * 0.95) - 1)] * 1000,
+            'max_ms': max(values) * 1000,
+        } for phase, values in self.durations.items()}
+
+
+# Phase name -> (module, function); engine-level names are the ones ScrapeEngine.run calls directly
+PHASES = [
+    ('driver startup', engine, 'setup_driver'),
+    ('search area', engine, 'search_area'),
+    ('list page', scraping, 'harvest_list_page'),
+    ('next page', scraping, 'go_to_next_page'),
+    ('entry detail', engine, 'scrape_entry_detail'),
+    ('tab click', engine, 'prepare_entry_detail'),
+    ('browser detail', scraping, 'scrape_single_restaurant'),
+    ('extract', scraping, 'extract_restaurant_detail'),
+    ('parse', scraping, 'parse_restaurant_detail'),
+    ('tab extract', tabs, 'extract_restaurant_detail'),
+]
+
+
+def run_once(base_url, count, args, output_dir, geocode_cache=None):
+    timer = PhaseTimer()
+    for phase, module, name in PHASES:
+        timer.wrap(module, name, phase)
+    rate_limiter = RateLimiter(args.rate, adaptive=not args.fixed_rate) if args.rate else None
+    wait_policy = WaitPolicy(rate_limiter=rate_limiter)
+    http_fetcher = None
+    if args.details == 'http':
+        http_fetcher = HttpDetailFetcher(url_template=base_url + "/restaurant/{place_id}/home",
+                                         rate_limiter=rate_limiter)
+        timer.wrap(http_fetcher, 'fetch', 'http detail')
+    records = []
+    messages = []
+    task = ScrapingTask("서울 중구 명동", "맛집", count, 50, tiles=args.tiles)
+    scrape_engine = ScrapeEngine(task, wait_policy=wait_policy, http_fetcher=http_fetcher,
+                                 headless=not args.show_browser,
+                                 on_data=records.append, on_complete=messages.append, map_url=base_url + "/",
+                                 lean=args.lean, geocode_cache=geocode_cache, tile_workers=args.workers,
+                                 detail_tabs=args.detail_tabs)
+    try:
+        start = time.perf_counter()
+        scrape_engine.run()
+        elapsed = time.perf_counter() - start
+        timer.record('engine run', elapsed)
+
+        start = time.perf_counter()
+        save_to_excel(os.path.join(output_dir, f"bench_{count}.xlsx"), [(task, records)])
+        timer.record('export xlsx', time.perf_counter() - start)
+        start = time.perf_counter()
+        CsvExporter(os.path.join(output_dir, f"bench_{count}_csv")).export([(task, records)])
+        timer.record('export csv', time.perf_counter() - start)
+    finally:
+        timer.restore()
+        if http_fetcher:
+            http_fetcher.close()
+    return {
+        'results': count,
+        'scraped': len(records),
+        'seconds': elapsed,
+        'restaurants_per_min': len(records) / elapsed * 60 if elapsed else 0,
+        'status': messages[-1] if messages else None,
+        'rate_limiter': rate_limiter.describe() if rate_limiter else None,
+        'phases': timer.summary(),
+    }
+
+
+def print_result(result):
+    print(f"\n{result['results']} results: scraped {result['scraped']} in {result['seconds']:.1f} s "
+          f"= {result['restaurants_per_min']:.1f} restaurants/min ({result['status']})")
+    throttled = f", {result['throttled']} answered with 429" if result['throttled'] else ""
+    print(f"  served {result['requests']} requests, {result['bytes_sent'] / 2**20:.1f} MiB{throttled}")
+    if result['rate_limiter']:
+        print(f"  rate limiter: {result['rate_limiter']}")
+    print(f"  {'phase':<16} {'calls':>6} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for phase, stats in result['phases'].items():
+        print(f"  {phase:<16} {stats['calls']:>6} {stats['total_s']:>9.2f} {stats['mean_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the local fixture site end to end and time each phase")
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 50, 120],
+                        help="Result counts to benchmark (each is one task scraping that many places)")
+    parser.add_argument('--latency-ms', type=float, default=50, help="Delay the fixture server adds to responses")
+    parser.add_argument('--jitter-ms', type=float, default=20, help="Random +/- variation of that delay")
+    parser.add_argument('--details', choices=['browser', 'http'], default='browser')
+    parser.add_argument('--expose-ids', action='store_true',
+                        help="List entries carry place ids (needed for the HTTP path to skip the browser)")
+    parser.add_argument('--detail-padding', type=int, default=800,
+                        help="Filler review blocks per place page; the default makes pages about 300 KB")
+    parser.add_argument('--show-browser', action='store_true')
+    parser.add_argument('--lean', action='store_true',
+                        help="Use the lean browser profile (no images, fonts or map tiles); compare the served "
+                             "requests and bytes with a run without it")
+    parser.add_argument('--geocode-cache', action='store_true',
+                        help="Open the area directly at its map position; the first run fills a temporary cache, "
+                             "later ones skip the address search")
+    parser.add_argument('--result-cap', type=int,
+                        help="Cap every result list like Naver does, with places spread over the task's map area")
+    parser.add_argument('--tiles', type=int, default=1,
+                        help="Search the area as a TILES x TILES grid (implies places spread over the map area)")
+    parser.add_argument('--workers', type=int, default=1, help="Browsers searching tiles at the same time")
+    parser.add_argument('--detail-tabs', type=int, default=0,
+                        help="Load detail pages in this many extra tabs while the list goes on being clicked")
+    parser.add_argument('--rate', type=float, default=0,
+                        help="Start the shared rate limiter at this many requests per second (0: unlimited)")
+    parser.add_argument('--fixed-rate', action='store_true', help="Don't adapt the rate to errors and latency")
+    parser.add_argument('--throttle-rps', type=float,
+                        help="Have the fixture site answer place pages beyond this rate with 429")
+    parser.add_argument('--json', help="Also write the results to this file, e.g. to compare two revisions")
+    args = parser.parse_args()
+
+    spread = args.tiles > 1 or args.result_cap
+    server, base_url = start_fixture_server(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                                            expose_ids=args.expose_ids, detail_padding=args.detail_padding,
+                                            area_zoom=TASK_MAP_ZOOM if spread else None,
+                                            result_cap=args.result_cap, place_rate_limit=args.throttle_rps)
+    print(f"Fixture site on {base_url} (latency {args.latency_ms:.0f} ± {args.jitter_ms:.0f} ms, "
+          f"details via {args.details}{', lean browser' if args.lean else ''})")
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            geocode_cache = GeocodeCache(os.path.join(output_dir, 'geocode.sqlite')) if args.geocode_cache else None
+            for count in args.counts:
+                server.total_results = count
+                requests_before, bytes_before, throttled_before = server.request_count, server.bytes_sent, \
+                    server.throttled
+                result = run_once(base_url, count, args, output_dir, geocode_cache)
+                result['requests'] = server.request_count - requests_before
+                result['bytes_sent'] = server.bytes_sent - bytes_before
+                result['throttled'] = server.throttled - throttled_before
+                results.append(result)
+                print_result(result)
+            if geocode_cache:
+                geocode_cache.close()
+    finally:
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'details': args.details,
+                       'expose_ids': args.expose_ids, 'lean': args.lean,
+                       'geocode_cache': args.geocode_cache, 'result_cap': args.result_cap, 'tiles': args.tiles,
+                       'workers': args.workers, 'detail_tabs': args.detail_tabs,
+                       'rate': args.rate, 'fixed_rate': args.fixed_rate, 'throttle_rps': args.throttle_rps,
+                       'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
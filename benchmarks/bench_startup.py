@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points and the heavy packages each of them must not load just by starting. The budget is the
+# median time to import them in a fresh interpreter, above that of a bare interpreter.
+ENTRY_POINTS = {
+    'cli': {
+        'code': "import naver_scraper.cli",
+        'forbidden': ['selenium', 'webdriver_manager', 'openpyxl', 'requests', 'PyQt5', 'lxml'],
+        'budget_ms': 150,
+    },
+    'worker': {
+        'code': "import naver_scraper.worker",
+        'forbidden': ['selenium', 'webdriver_manager', 'openpyxl', 'requests', 'PyQt5', 'lxml'],
+        'budget_ms': 150,
+    },
+    'export': {
+        'code': "import naver_scraper.export",
+        'forbidden': ['openpyxl', 'selenium'],
+        'budget_ms': 100,
+    },
+    'gui': {
+        # Loads the GUI module without opening a window; PyQt5 itself is expected here
+        'code': ("import importlib.util; "
+                 "spec = importlib.util.spec_from_file_location('gui', 'naver-scraper.py'); "
+                 "spec.loader.exec_module(importlib.util.module_from_spec(spec))"),
+        'forbidden': ['selenium', 'webdriver_manager', 'openpyxl', 'requests', 'lxml'],
+        'budget_ms': 600,
+    },
+}
+
+REPORT_LOADED = "import sys; print('LOADED ' + ' '.join(sorted({name.split('.')[0] for name in sys.modules})))"
+
+
+def time_import(code, python=sys.executable):
+    # Wall time of a fresh interpreter running code, the top-level packages it loaded, and the
+    # slowest imports according to -X importtime (cumulative microseconds)
+    start = time.perf_counter()
+    result = subprocess.run([python, '-X', 'importtime', '-c', f"{code}; {REPORT_LOADED}"], cwd=ROOT,
+                            capture_output=True, text=True, env=dict(os.environ, QT_QPA_PLATFORM='offscreen'))
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    loaded = set()
+    for line in result.stdout.splitlines():
+        if line.startswith('LOADED '):
+            loaded = set(line.split()[1:])
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative_us), name.rstrip()))
+    return elapsed, loaded, sorted(imports, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold start of each entry point and check that "
+                                                 "heavy dependencies are only loaded when they are used")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--entry', choices=sorted(ENTRY_POINTS), action='append',
+                        help="Entry point to measure (repeatable; default: all)")
+    parser.add_argument('--top', type=int, default=8, help="Slowest imports to list per entry point")
+    parser.add_argument('--no-budget', action='store_true', help="Report times without failing on the budgets")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    bare_runs = [time_import("pass") for _ in range(args.runs)]
+    baseline = statistics.median(elapsed for elapsed, _, _ in bare_runs)
+    # Modules every interpreter loads (site, encodings, ...) aren't the entry point's cost
+    bare_modules = {module.strip() for _, module in bare_runs[-1][2]}
+    print(f"Bare interpreter: {baseline * 1000:.0f} ms")
+    failures = []
+    results = {}
+    for name in args.entry or sorted(ENTRY_POINTS):
+        entry = ENTRY_POINTS[name]
+        try:
+            runs = [time_import(entry['code']) for _ in range(args.runs)]
+        except RuntimeError as e:
+            # e.g. PyQt5 missing for the GUI
+            print(f"\n{name}: skipped ({e})")
+            continue
+        median = statistics.median(elapsed for elapsed, _, _ in runs) - baseline
+        loaded = runs[-1][1]
+        slowest = [(us, module) for us, module in runs[-1][2] if module.strip() not in bare_modules][:args.top]
+        forbidden = [package for package in entry['forbidden'] if package in loaded]
+        results[name] = {'import_ms': median * 1000, 'budget_ms': entry['budget_ms'], 'forbidden_loaded': forbidden,
+                         'slowest': [[us / 1000, module.strip()] for us, module in slowest]}
+        print(f"\n{name}: {median * 1000:.0f} ms over the bare interpreter (budget {entry['budget_ms']} ms)")
+        for us, module in slowest:
+            print(f"  {us / 1000:8.1f} ms  {module}")
+        if forbidden:
+            failures.append(f"{name} loads {', '.join(forbidden)} at startup")
+        if not args.no_budget and median * 1000 > entry['budget_ms']:
+            failures.append(f"{name} takes {median * 1000:.0f} ms to import (budget {entry['budget_ms']} ms)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'baseline_ms': baseline * 1000, 'entry_points': results}, f, indent=2)
+    if failures:
+        print("\nStartup regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nNo startup regressions")
+
+
+if __name__ == '__main__':
+    main()
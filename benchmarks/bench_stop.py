@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from naver_scraper.dedup import DedupIndex
+from naver_scraper.engine import ScrapeEngine
+from naver_scraper.journal import ScrapeJournal
+from naver_scraper.tasks import ScrapingTask
+from naver_scraper.waits import WaitPolicy
+
+from benchmarks.fixture_server import start_fixture_server
+
+
+def make_engine(base_url, args, journal, **callbacks):
+    task = ScrapingTask("서울 중구 명동", "맛집", args.results, 50, tiles=args.tiles)
+    # Long timeouts and a retry delay like a slow or throttled site, so stopping can't simply wait them out
+    wait_policy = WaitPolicy(page_timeout=90, detail_timeout=30, retry_delay=5, restaurant_delay=args.delay)
+    # Resume checks run with dedup, whose claims must not outlive a stop
+    dedup = DedupIndex(journal) if args.resume else None
+    return ScrapeEngine(task, wait_policy=wait_policy, headless=not args.show_browser, journal=journal, dedup=dedup,
+                        map_url=base_url + "/", tile_workers=args.workers, detail_tabs=args.detail_tabs, **callbacks)
+
+
+def stop_once(base_url, args, journal_path, stop_after):
+    # Scrapes the fixture site and stops the engine after stop_after seconds. Returns how long the engine
+    # took to report the stop and to return (browser closed), and whether the journal holds exactly the
+    # records that were reported. With --resume the task is then run again to the end, and every place
+    # of the list has to end up in the journal.
+    records = []
+    stopped_at = {}
+    journal = ScrapeJournal(journal_path)
+
+    def on_complete(message):
+        stopped_at['reported'] = time.perf_counter()
+        stopped_at['message'] = message
+
+    engine = make_engine(base_url, args, journal, on_data=records.append, on_complete=on_complete)
+    runner = threading.Thread(target=engine.run)
+    runner.start()
+    time.sleep(stop_after)
+    start = time.perf_counter()
+    engine.stop()
+    runner.join()
+    returned = time.perf_counter() - start
+    journaled = journal.count_records(engine.journal_key) if engine.journal_key else 0
+    journal.close()
+    resumed = resume_once(base_url, args, journal_path) if args.resume else None
+    os.remove(journal_path)
+    return {
+        'stop_after_s': stop_after,
+        'reported_s': stopped_at['reported'] - start if 'reported' in stopped_at else None,
+        'returned_s': returned,
+        'scraped': len(records),
+        'journal_consistent': journaled == len(records),
+        'message': stopped_at.get('message'),
+        'resumed_records': resumed,
+    }
+
+
+def resume_once(base_url, args, journal_path):
+    # Runs the stopped task again to the end in a fresh engine, like START after a stop; returns the
+    # number of records journaled for it
+    journal = ScrapeJournal(journal_path)
+    engine = make_engine(base_url, args, journal)
+    engine.run()
+    records = journal.count_records(engine.journal_key)
+    journal.close()
+    return records
+
+
+def describe(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return "n/a"
+    return (f"mean {statistics.mean(values) * 1000:.0f} ms, max {max(values) * 1000:.0f} ms "
+            f"(min {min(values) * 1000:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how fast a running scrape stops against the fixture site")
+    parser.add_argument('--trials', type=int, default=10)
+    parser.add_argument('--min-stop', type=float, default=2, help="Earliest stop, in seconds after the start")
+    parser.add_argument('--max-stop', type=float, default=20, help="Latest stop, in seconds after the start")
+    parser.add_argument('--latency-ms', type=float, default=300,
+                        help="Delay the fixture server adds to responses, so stops land inside waits")
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--results', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0, help="Pause between restaurants (restaurant_delay)")
+    parser.add_argument('--tiles', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--detail-tabs', type=int, default=0)
+    parser.add_argument('--resume', action='store_true',
+                        help="Resume each stopped run (with dedup) and check that no place of the list is lost")
+    parser.add_argument('--show-browser', action='store_true')
+    parser.add_argument('--max-stop-ms', type=float, default=1000,
+                        help="Fail if a stop takes longer than this to be reported or for the engine to return")
+    parser.add_argument('--seed', type=int, help="Seed for the stop times, to repeat a run")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    server, base_url = start_fixture_server(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                                            total_results=args.results,
+                                            area_zoom=14 if args.tiles > 1 else None)
+    print(f"Fixture site on {base_url} (latency {args.latency_ms:.0f} ± {args.jitter_ms:.0f} ms)")
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for trial in range(args.trials):
+                stop_after = rng.uniform(args.min_stop, args.max_stop)
+                result = stop_once(base_url, args, os.path.join(work_dir, f"stop_{trial}.sqlite"), stop_after)
+                results.append(result)
+                reported = f"{result['reported_s'] * 1000:.0f} ms" if result['reported_s'] is not None else "n/a"
+                print(f"stop at {stop_after:5.1f} s: reported after {reported}, returned after "
+                      f"{result['returned_s'] * 1000:.0f} ms, {result['scraped']} scraped"
+                      f"{'' if result['journal_consistent'] else ', JOURNAL MISMATCH'} ({result['message']})")
+                if args.resume:
+                    missing = args.results - result['resumed_records']
+                    print(f"  resumed: {result['resumed_records']} of {args.results} places journaled"
+                          f"{f', {missing} MISSING' if missing else ''}")
+    finally:
+        server.shutdown()
+
+    print(f"\nStop reported: {describe([result['reported_s'] for result in results])}")
+    print(f"Engine returned (browser closed): {describe([result['returned_s'] for result in results])}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'tiles': args.tiles,
+                       'workers': args.workers, 'detail_tabs': args.detail_tabs, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+    failures = []
+    max_stop_s = args.max_stop_ms / 1000
+    slow = [result for result in results
+            if result['reported_s'] is None or result['reported_s'] > max_stop_s or result['returned_s'] > max_stop_s]
+    if slow:
+        failures.append(f"{len(slow)} of {len(results)} stops took longer than {args.max_stop_ms:.0f} ms")
+    mismatched = [result for result in results if not result['journal_consistent']]
+    if mismatched:
+        failures.append(f"{len(mismatched)} of {len(results)} journals didn't match the records reported")
+    if args.resume and any(result['resumed_records'] != args.results for result in results):
+        failures.append("Resumed runs lost places")
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
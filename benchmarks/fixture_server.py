@@ -0,0 +1,293 @@
+import argparse
+import html
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+PLACE_PATH = re.compile(r'^/(?:restaurant|place)/(\d+)/home$')
+STATIC_PATH = re.compile(r'^/(?:static/[\w/-]+|tile/\d+/\d+/\d+)\.(jpg|png|woff2)$')
+
+# Sizes of the synthetic photos, thumbnails/map tiles and web fonts the pages reference, so a browser
+# that loads them pays roughly what it pays on the real site
+STATIC_ASSETS = {
+    'jpg': ('image/jpeg', 40 * 1024),
+    'png': ('image/png', 12 * 1024),
+    'woff2': ('font/woff2', 30 * 1024),
+}
+
+# Generated places get ids from here on; recorded fixtures in fixtures/place/ keep their real ids
+GENERATED_ID_BASE = 1100000000
+
+# Like searchIframe: up to 50 places per result page, rendered 10 at a time while scrolling
+PAGE_SIZE = 50
+BATCH_SIZE = 10
+
+# Where the fixture map's geocoder puts every address (longitude, latitude)
+CITY_HALL = (126.9783882, 37.5666103)
+
+
+def review_padding(count):
+    # Stand-in for the reviews, photos and menus that make real detail pages several hundred KB
+    return ''.join(
+        f'<div class="pui__X35jYm"><div class="pui__NMi-Dp"><span class="pui__uslU0d">방문자{index}</span></div>'
+        f'<a class="pui__xtsQN-"><span>음식이 맛있어요</span><span>친절해요</span></a>'
+        f'<div class="pui__vn15t2"><a role="button">점심에 방문했는데 국물이 진하고 면이 쫄깃했어요. '
+        f'재방문 의사 있습니다. {index}</a></div><img src="data:," alt=""></div>'
+        for index in range(count))
+
+
+def place_photos(place_id, count=5):
+    return ''.join(f'<img class="K0PDV" src="/static/photo/{place_id}-{index}.jpg" alt="" width="120" height="120">'
+                   for index in range(count))
+
+
+def viewport_span(longitude, latitude, zoom, width=1920, height=1080):
+    # Degrees of longitude and latitude a viewport of width x height pixels covers at zoom
+    scale = 256 * 2 ** zoom
+    return width * 360 / scale, height * 360 * math.cos(math.radians(latitude)) / scale
+
+
+def generated_place(number):
+    return {
+        'name': f"픽스처 식당 {number + 1}",
+        'category': "한식",
+        'short_address': f"중구 명동{number % 9 + 1}가",
+        'address': f"서울 중구 명동길 {number + 1}",
+        'phone': f"02-0000-{number % 10000:04d}",
+    }
+
+
+class FixtureServer(ThreadingHTTPServer):
+    # A local stand-in for map.naver.com: the map page with its search box and zoom buttons, the
+    # searchIframe result list and the place pages shown in entryIframe; /p/search/<query>?c=x,y,zoom,...
+    # opens the map with a query's results listed, like Naver's own links. Every response is delayed
+    # by latency +/- jitter seconds to approximate network and rendering time.
+    daemon_threads = True
+
+    def __init__(self, address, fixture_dir=FIXTURE_DIR, latency=0.0, jitter=0.0, total_results=100,
+                 expose_ids=False, detail_padding=0, area_zoom=None, result_cap=None, place_rate_limit=None):
+        super().__init__(address, FixtureRequestHandler)
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+        # Number of places every search returns; benchmarks change it between runs
+        self.total_results = total_results
+        # Real lists rarely expose place ids; with this on, list entries carry data-id like some layouts do
+        self.expose_ids = expose_ids
+        # Filler review blocks per generated place page, to give it a realistic size
+        self.detail_padding = detail_padding
+        # With area_zoom, places are spread over the viewport at that zoom around CITY_HALL and a search
+        # only lists the ones inside its own viewport (for tiling); otherwise every search lists them all
+        self.area_zoom = area_zoom
+        # Most places one search lists, like Naver's cap on result lists
+        self.result_cap = result_cap
+        # Place pages served per second before the server answers 429 like a throttling site
+        self.place_rate_limit = place_rate_limit
+        self.place_requests = deque()
+        self.throttled = 0
+        self.positions = {}
+        self.request_count = 0
+        # Response bytes sent (headers excluded), to compare what different browser profiles download
+        self.bytes_sent = 0
+        self.count_lock = threading.Lock()
+
+    def delay(self):
+        with self.count_lock:
+            self.request_count += 1
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttle_place(self):
+        # True if this place page request is over place_rate_limit in the last second
+        if not self.place_rate_limit:
+            return False
+        now = time.monotonic()
+        with self.count_lock:
+            while self.place_requests and now - self.place_requests[0] > 1:
+                self.place_requests.popleft()
+            if len(self.place_requests) >= self.place_rate_limit:
+                self.throttled += 1
+                return True
+            self.place_requests.append(now)
+            return False
+
+    def template(self, name):
+        with open(os.path.join(self.fixture_dir, name), encoding='utf-8') as f:
+            return f.read()
+
+    def render(self, name, values):
+        page = self.template(name)
+        for key, value in values.items():
+            page = page.replace('{{' + key + '}}', str(value))
+        return page
+
+    def place_position(self, number):
+        if number not in self.positions:
+            width, height = viewport_span(*CITY_HALL, self.area_zoom)
+            generator = random.Random(number)
+            self.positions[number] = (CITY_HALL[0] + (generator.random() - 0.5) * width,
+                                      CITY_HALL[1] + (generator.random() - 0.5) * height)
+        return self.positions[number]
+
+    def result_numbers(self, viewport):
+        # Numbers of the places a search at viewport ("x,y,zoom,...") lists, in list order
+        numbers = range(self.total_results)
+        if self.area_zoom is not None and viewport:
+            x, y, zoom = (float(value) for value in viewport.split(',')[:3])
+            width, height = viewport_span(x, y, zoom)
+            numbers = [number for number in numbers
+                       if abs(self.place_position(number)[0] - x) <= width / 2
+                       and abs(self.place_position(number)[1] - y) <= height / 2]
+        return numbers[:self.result_cap] if self.result_cap else numbers
+
+    def page_count(self, numbers):
+        return max(1, math.ceil(len(numbers) / PAGE_SIZE))
+
+    def page_total(self, numbers, page):
+        return max(0, min(PAGE_SIZE, len(numbers) - (page - 1) * PAGE_SIZE))
+
+    def list_items(self, numbers, page, offset, limit):
+        items = []
+        first = (page - 1) * PAGE_SIZE
+        for number in numbers[first + offset:first + min(offset + limit, self.page_total(numbers, page))]:
+            place = generated_place(number)
+            place_id = GENERATED_ID_BASE + number
+            data_id = f' data-id="{place_id}"' if self.expose_ids else ''
+            items.append(
+                f'<li class="UEzoS" data-fixture-id="{place_id}"{data_id}>'
+                f'<img class="K0PDV" src="/static/thumb/{place_id}.png" alt="" width="80" height="80">'
+                f'<a class="place_bluelink" role="button"><span class="TYaxT">{html.escape(place["name"])}</span></a>'
+                f'<span class="KCMnt">{place["category"]}</span>'
+                f'<div><span class="Pb4bU">{html.escape(place["short_address"])}</span></div></li>')
+        return ''.join(items)
+
+    def place_page(self, place_id):
+        recorded = os.path.join(self.fixture_dir, 'place', f'{place_id}.html')
+        if os.path.exists(recorded):
+            with open(recorded, encoding='utf-8') as f:
+                return f.read()
+        number = int(place_id) - GENERATED_ID_BASE
+        if not 0 <= number < self.total_results:
+            return None
+        place = generated_place(number)
+        return self.render('place_template.html', {
+            'NAME': html.escape(place['name']), 'CATEGORY': place['category'],
+            'ADDRESS': html.escape(place['address']), 'PHONE': place['phone'],
+            'PHOTOS': place_photos(place_id),
+            'PADDING': review_padding(self.detail_padding),
+        })
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server.delay()
+        if url.path == '/' or url.path.startswith(('/search/', '/p/search/')):
+            # pushState URLs of the map page load the map again on refresh, as on the real site
+            self.send_fixture(200, server.render('map.html', {'UI_DELAY_MS': int(server.latency * 1000)}))
+            return
+        if url.path == '/search-list':
+            query = params.get('query', '')
+            viewport = params.get('c', '')
+            numbers = server.result_numbers(viewport)
+            self.send_fixture(200, server.render('search_list.html', {
+                'ITEMS': server.list_items(numbers, 1, 0, BATCH_SIZE),
+                'QUERY_JSON': json.dumps(query).replace('</', '<\\/'),
+                'VIEWPORT_JSON': json.dumps(viewport),
+                'PAGE_SIZE': PAGE_SIZE, 'BATCH_SIZE': BATCH_SIZE,
+                'PAGE_COUNT': server.page_count(numbers),
+                'LOADED': min(BATCH_SIZE, server.page_total(numbers, 1)),
+                'PAGE_TOTAL': server.page_total(numbers, 1),
+                'LAST_PAGE': 'true' if server.page_count(numbers) <= 1 else 'false',
+            }))
+            return
+        if url.path == '/list-items':
+            page = int(params.get('page', 1))
+            numbers = server.result_numbers(params.get('c', ''))
+            self.send_fixture(200, server.list_items(numbers, page, int(params.get('offset', 0)),
+                                                     int(params.get('limit', BATCH_SIZE))),
+                              extra_headers={'X-Page-Total': str(server.page_total(numbers, page))})
+            return
+        match = STATIC_PATH.match(url.path)
+        if match:
+            content_type, size = STATIC_ASSETS[match.group(1)]
+            self.send_fixture(200, bytes(size), content_type, {'Cache-Control': 'max-age=86400'})
+            return
+        match = PLACE_PATH.match(url.path)
+        if match:
+            if server.throttle_place():
+                self.send_fixture(429, 'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+                return
+            page = server.place_page(match.group(1))
+            if page is None:
+                self.send_fixture(404, 'Unknown place', 'text/plain')
+            else:
+                self.send_fixture(200, page)
+            return
+        self.send_fixture(404, 'Not Found', 'text/plain')
+
+    def send_fixture(self, status, body, content_type='text/html; charset=utf-8', extra_headers=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        with self.server.count_lock:
+            self.server.bytes_sent += len(body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(host='127.0.0.1', port=0, fixture_dir=FIXTURE_DIR, latency=0.0, jitter=0.0,
+                         total_results=100, expose_ids=False, detail_padding=0, area_zoom=None, result_cap=None,
+                         place_rate_limit=None):
+    # Serves the fixture site in a background thread; returns the server and its base URL
+    server = FixtureServer((host, port), fixture_dir, latency, jitter, total_results, expose_ids, detail_padding,
+                           area_zoom, result_cap, place_rate_limit)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a local Naver Maps-like fixture site")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--results', type=int, default=100, help="Places returned by every search")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Delay added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Random +/- variation of the delay")
+    parser.add_argument('--expose-ids', action='store_true', help="Put place ids on list entries")
+    parser.add_argument('--detail-padding', type=int, default=0,
+                        help="Filler review blocks per place page (about 400 bytes each)")
+    parser.add_argument('--area-zoom', type=float,
+                        help="Spread the places over the viewport at this zoom and list only those a search's "
+                             "viewport covers")
+    parser.add_argument('--result-cap', type=int, help="Most places a single search lists")
+    parser.add_argument('--place-rate-limit', type=float,
+                        help="Answer place page requests beyond this many per second with 429")
+    args = parser.parse_args()
+    server = FixtureServer((args.host, args.port), latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                           total_results=args.results, expose_ids=args.expose_ids,
+                           detail_padding=args.detail_padding, area_zoom=args.area_zoom,
+                           result_cap=args.result_cap, place_rate_limit=args.place_rate_limit)
+    print(f"Serving the map on http://{args.host}:{args.port}/ "
+          f"and place pages on http://{args.host}:{args.port}/restaurant/<place_id>/home")
+    server.serve_forever()
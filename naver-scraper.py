@@ -1,122 +1,53 @@
 import sys
-import time
 import logging
 import os
-import json
+import time
+from functools import partial
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
                              QProgressBar, QSpinBox, QMessageBox, QMainWindow, QAction, QFileDialog, QTextEdit,
-                             QGroupBox, QFormLayout, QStyleFactory, QListWidget, QDialog, QDialogButtonBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QFont, QIcon
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-import openpyxl
-from openpyxl.styles import Font
+                             QGroupBox, QFormLayout, QStyleFactory, QTableView, QDialog, QDialogButtonBox,
+                             QComboBox, QActionGroup, QAbstractItemView, QHeaderView)
+from PyQt5.QtCore import (Qt, QThread, QTimer, pyqtSignal, QAbstractTableModel, QModelIndex,
+                          QSortFilterProxyModel)
+from PyQt5.QtGui import QFont, QIcon, QTextCursor
+from naver_scraper.tasks import ScrapingTask, load_tasks, save_tasks
+from naver_scraper.export import EXPORTERS, create_exporter, missing_requirement
+from naver_scraper.cache import GeocodeCache, PlaceCache
+from naver_scraper.dedup import DedupIndex
+from naver_scraper.delta import DeltaStore
+from naver_scraper.journal import ScrapeJournal, remove_journal_files
+from naver_scraper.logbuffer import LOG_DATE_FORMAT, LOG_FORMAT, BufferHandler, LogBuffer, start_file_log
+from naver_scraper.metrics import RUN_LABEL, ScrapeMetrics, task_label
+from naver_scraper.ratelimit import RateLimiter
+from naver_scraper.waits import DEFAULT_WAIT_POLICY, WaitPolicy
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M')
 
-def setup_driver():
-    service = Service(ChromeDriverManager().install())
-    options = webdriver.ChromeOptions()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1920,1080")
-    return webdriver.Chrome(service=service, options=options)
-
-def scrape_restaurant_info(driver):
-    try:
-        driver.switch_to.default_content()
-        WebDriverWait(driver, 90).until(
-            EC.frame_to_be_available_and_switch_to_it((By.ID, 'entryIframe'))
-        )
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CLASS_NAME, 'place_section'))
-        )
-        time.sleep(5)
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        restaurant_name = soup.select_one('span.GHAhO')
-        restaurant_name = restaurant_name.text.strip() if restaurant_name else "N/A"
-        address = soup.select_one('span.LDgIH')
-        address = address.text.strip() if address else "N/A"
-        phone_number = soup.select_one('span.xlx7Q')
-        phone_number = phone_number.text.strip() if phone_number else "N/A"
-        return {
-            "Restaurant Name": restaurant_name,
-            "Address": address,
-            "Phone Number": phone_number
-        }
-    except Exception as e:
-        logging.error(f"An error occurred while scraping restaurant info: {e}")
-        return None
-
-def scrape_single_restaurant(driver, restaurant_index, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            driver.switch_to.default_content()
-            WebDriverWait(driver, 30).until(
-                EC.frame_to_be_available_and_switch_to_it((By.ID, 'searchIframe'))
-            )
-            scroll_container = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.ID, '_pcmap_list_scroll_container'))
-            )
-            scroll_amount = (restaurant_index - 1) * 100
-            driver.execute_script(f"arguments[0].scrollTop += {scroll_amount};", scroll_container)
-            time.sleep(2)
-            selectors = [
-                f'li.UEzoS.rTjJo:nth-child({restaurant_index}) .place_bluelink',
-                f'div.lazyload-wrapper:nth-child({restaurant_index}) .place_bluelink'
-            ]
-            restaurant_element = None
-            for selector in selectors:
-                try:
-                    restaurant_element = WebDriverWait(driver, 10).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                    break
-                except:
-                    continue
-            if not restaurant_element:
-                raise NoSuchElementException(f"Could not find restaurant element for index {restaurant_index}")
-            driver.execute_script("arguments[0].scrollIntoView();", restaurant_element)
-            time.sleep(2)
-            restaurant_element.click()
-            time.sleep(5)
-            return scrape_restaurant_info(driver)
-        except Exception as e:
-            logging.error(f"Attempt {attempt + 1} failed for restaurant {restaurant_index}: {e}")
-            if attempt == max_retries - 1:
-                logging.error(f"Failed to scrape restaurant {restaurant_index} after {max_retries} attempts")
-                return None
-        time.sleep(5)
-
-class ScrapingTask:
-    def __init__(self, address, search_query, num_restaurants, zoom_level):
-        self.address = address
-        self.search_query = search_query
-        self.num_restaurants = num_restaurants
-        self.zoom_level = zoom_level
-
-    def to_dict(self):
-        return {
-            'address': self.address,
-            'search_query': self.search_query,
-            'num_restaurants': self.num_restaurants,
-            'zoom_level': self.zoom_level
-        }
-
-    @classmethod
-    def from_dict(cls, data):
-        return cls(data['address'], data['search_query'], data['num_restaurants'], data['zoom_level'])
+# Offered in File > Detail Tabs per Browser; 0 loads details in the map's own pane
+DETAIL_TAB_CHOICES = [0, 2, 4, 8]
+# Starting requests per second offered in File > Request Rate; 0 is unlimited
+REQUEST_RATE_CHOICES = [0, 1, 2, 4]
+# How long closing the window waits for stopped tasks before killing their browsers
+STOP_TIMEOUT_MS = 5000
+# Log lines are shown in batches this often; the log window keeps at most LOG_MAX_LINES of them
+LOG_FLUSH_MS = 250
+LOG_MAX_LINES = 5000
+# Columns of the task table; Status and Scraped are filled in while a run goes on
+TASK_COLUMNS = ['ID', 'Address', 'Search Query', 'Restaurants', 'Zoom', 'Tiles', 'Status', 'Scraped']
+STATUS_COLUMN = 6
+# ScrapingTask attribute shown in each task column
+TASK_ATTRIBUTES = {1: 'address', 2: 'search_query', 3: 'num_restaurants', 4: 'zoom_level', 5: 'tiles'}
+TASK_COLUMN_WIDTHS = {0: 50, 2: 120, 3: 85, 4: 50, 5: 45, 6: 110, 7: 65}
+TASK_FILE_FILTER = "Task Files (*.json *.csv);;JSON Files (*.json);;CSV Files (*.csv)"
+
+def task_status(message):
+    # Status column text for an engine's completion message
+    if message.startswith("Scraping completed") or message.startswith("Already completed"):
+        return "Done"
+    if "stopped" in message:
+        return "Stopped"
+    return "Failed"
 
 class AddTaskDialog(QDialog):
     def __init__(self, parent=None):
@@ -128,6 +59,7 @@ class AddTaskDialog(QDialog):
         self.search_query_input = QLineEdit("근처 식당", self)
         self.num_restaurants_input = QSpinBox(self)
         self.zoom_level_input = QSpinBox(self)
+        self.tiles_input = QSpinBox(self)
 
         self.num_restaurants_input.setRange(1, 1000)
         self.num_restaurants_input.setValue(50)
@@ -135,11 +67,16 @@ class AddTaskDialog(QDialog):
         self.zoom_level_input.setRange(1, 100)
         self.zoom_level_input.setValue(50)
 
+        # Tiling: search the area as an N x N grid to get past the result list's cap (1 = one search)
+        self.tiles_input.setRange(1, 8)
+        self.tiles_input.setValue(1)
+
         form_layout = QFormLayout()
         form_layout.addRow("Address:", self.address_input)
         form_layout.addRow("Search Query:", self.search_query_input)
         form_layout.addRow("Number of Restaurants:", self.num_restaurants_input)
         form_layout.addRow("Zoom Level:", self.zoom_level_input)
+        form_layout.addRow("Tiles per Side:", self.tiles_input)
 
         self.layout.addLayout(form_layout)
 
@@ -154,150 +91,369 @@ class AddTaskDialog(QDialog):
             self.address_input.text(),
             self.search_query_input.text(),
             self.num_restaurants_input.value(),
-            self.zoom_level_input.value()
+            self.zoom_level_input.value(),
+            self.tiles_input.value()
         )
 
+class MetricsDialog(QDialog):
+    def __init__(self, metrics, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.setWindowTitle("Run Metrics")
+        self.resize(700, 450)
+        self.layout = QVBoxLayout(self)
+
+        self.summary = QTextEdit(self)
+        self.summary.setReadOnly(True)
+        self.summary.setFont(QFont("Monospace", 9))
+        self.summary.setLineWrapMode(QTextEdit.NoWrap)
+        self.layout.addWidget(self.summary)
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Close, self)
+        refresh_button = self.buttons.addButton("Refresh", QDialogButtonBox.ActionRole)
+        refresh_button.clicked.connect(self.refresh)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+        self.refresh()
+
+    def refresh(self):
+        self.summary.setPlainText("\n".join(self.metrics.summary_lines()))
+
+class TaskTableModel(QAbstractTableModel):
+    # Tasks under unique IDs, with their status in the current run. The view only asks for the cells on
+    # screen, so thousands of tasks load and scroll without a widget item per task.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Display order, which sorting changes
+        self.task_ids = []
+        # By ID in the order the tasks were added: the task list's order, which runs, saved files and the
+        # journal's task keys go by whatever the table is sorted by
+        self.tasks = {}
+        self.rows = {}
+        self.status = {}
+        self.scraped = {}
+        self.next_id = 1
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.task_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(TASK_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return TASK_COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        task_id = self.task_ids[index.row()]
+        task = self.tasks[task_id]
+        column = index.column()
+        if column == 0:
+            return task_id
+        if column == 1:
+            return task.address
+        if column == 2:
+            return task.search_query
+        if column == 3:
+            return task.num_restaurants
+        if column == 4:
+            return task.zoom_level
+        if column == 5:
+            return task.tiles
+        if column == 6:
+            return self.status.get(task_id)
+        return self.scraped.get(task_id)
+
+    def assign_ids(self, tasks):
+        task_ids = list(range(self.next_id, self.next_id + len(tasks)))
+        self.next_id += len(tasks)
+        self.tasks.update(zip(task_ids, tasks))
+        return task_ids
+
+    def set_tasks(self, tasks):
+        self.beginResetModel()
+        self.tasks = {}
+        self.status = {}
+        self.scraped = {}
+        self.task_ids = self.assign_ids(tasks)
+        self.rows = {task_id: row for row, task_id in enumerate(self.task_ids)}
+        self.endResetModel()
+
+    def add_tasks(self, tasks):
+        if not tasks:
+            return
+        first = len(self.task_ids)
+        self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+        task_ids = self.assign_ids(tasks)
+        self.task_ids.extend(task_ids)
+        self.rows.update((task_id, first + offset) for offset, task_id in enumerate(task_ids))
+        self.endInsertRows()
+
+    def remove_ids(self, task_ids):
+        task_ids = set(task_ids)
+        if len(task_ids) == 1:
+            row = self.rows[next(iter(task_ids))]
+            self.beginRemoveRows(QModelIndex(), row, row)
+        else:
+            self.beginResetModel()
+        self.task_ids = [task_id for task_id in self.task_ids if task_id not in task_ids]
+        for task_id in task_ids:
+            self.tasks.pop(task_id, None)
+            self.status.pop(task_id, None)
+            self.scraped.pop(task_id, None)
+        self.rows = {task_id: row for row, task_id in enumerate(self.task_ids)}
+        if len(task_ids) == 1:
+            self.endRemoveRows()
+        else:
+            self.endResetModel()
+
+    def task_id_at(self, row):
+        return self.task_ids[row]
+
+    def sort_key(self, column):
+        if column == 0:
+            return lambda task_id: task_id
+        if column == STATUS_COLUMN:
+            return lambda task_id: self.status.get(task_id) or ''
+        if column == STATUS_COLUMN + 1:
+            return lambda task_id: self.scraped.get(task_id, -1)
+        attribute = TASK_ATTRIBUTES[column]
+        return lambda task_id: getattr(self.tasks[task_id], attribute)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # One Python sort by key instead of a comparison call into the model per pair of rows
+        if column < 0:
+            return
+        self.layoutAboutToBeChanged.emit()
+        self.task_ids.sort(key=self.sort_key(column), reverse=order == Qt.DescendingOrder)
+        self.rows = {task_id: row for row, task_id in enumerate(self.task_ids)}
+        self.layoutChanged.emit()
+
+    def matches(self, row, text):
+        task_id = self.task_ids[row]
+        task = self.tasks[task_id]
+        return (text in task.address.lower() or text in task.search_query.lower()
+                or text in (self.status.get(task_id) or '').lower())
+
+    def all_tasks(self):
+        return list(self.tasks.values())
+
+    def all_task_ids(self):
+        return list(self.tasks)
+
+    def set_status(self, task_id, status=None, scraped=None):
+        # Tasks removed from the list while their run goes on are ignored
+        row = self.rows.get(task_id)
+        if row is None:
+            return
+        if status is not None:
+            self.status[task_id] = status
+        if scraped is not None:
+            self.scraped[task_id] = scraped
+        self.dataChanged.emit(self.index(row, STATUS_COLUMN), self.index(row, STATUS_COLUMN + 1))
+
+    def reset_status(self, status):
+        # Every task gets status and no scraped count, with one change notification for the whole table
+        self.status = dict.fromkeys(self.task_ids, status)
+        self.scraped = {}
+        if self.task_ids:
+            self.dataChanged.emit(self.index(0, STATUS_COLUMN), self.index(len(self.task_ids) - 1, STATUS_COLUMN + 1))
+
+class TaskFilterProxy(QSortFilterProxyModel):
+    # Filters on a substring of the address, query or status. Sorting is left to the model, which keeps
+    # the proxy in source order.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filter_text = ''
+
+    def set_filter_text(self, text):
+        # invalidate() rebuilds the mapping with one layout change; invalidateFilter() would signal every
+        # row that comes or goes
+        self.filter_text = text.strip().lower()
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self.filter_text or self.sourceModel().matches(source_row, self.filter_text)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
 class SchedulerWidget(QWidget):
     taskAdded = pyqtSignal(ScrapingTask)
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
-        self.task_list = QListWidget()
-        self.layout.addWidget(self.task_list)
-        self.tasks = []
+        self.filter_input = QLineEdit(self)
+        self.filter_input.setPlaceholderText("Filter by address, query or status")
+        self.filter_input.setClearButtonEnabled(True)
+        self.layout.addWidget(self.filter_input)
+
+        self.model = TaskTableModel(self)
+        self.proxy = TaskFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.filter_input.textChanged.connect(self.proxy.set_filter_text)
+
+        self.task_view = QTableView(self)
+        self.task_view.setModel(self.proxy)
+        self.task_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.task_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.task_view.setWordWrap(False)
+        # Fixed row heights let the view place rows without measuring them
+        self.task_view.verticalHeader().hide()
+        self.task_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.task_view.verticalHeader().setDefaultSectionSize(24)
+        self.task_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.task_view.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        for column, width in TASK_COLUMN_WIDTHS.items():
+            self.task_view.setColumnWidth(column, width)
+        # Sorted only once a header is clicked; until then the list is shown in task order
+        self.task_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.task_view.setSortingEnabled(True)
+        self.layout.addWidget(self.task_view)
+
+        self.count_label = QLabel(self)
+        self.layout.addWidget(self.count_label)
+        for signal in (self.proxy.rowsInserted, self.proxy.rowsRemoved, self.proxy.modelReset,
+                       self.proxy.layoutChanged):
+            signal.connect(self.update_count)
+        self.update_count()
+
+    def update_count(self, *args):
+        total = self.model.rowCount()
+        shown = self.proxy.rowCount()
+        self.count_label.setText(f"{total} tasks" if shown == total else f"{shown} of {total} tasks shown")
 
     def add_task(self):
         dialog = AddTaskDialog(self)
         if dialog.exec_():
             task = dialog.get_task()
-            self.tasks.append(task)
-            self.task_list.addItem(f"{task.address} - {task.search_query} - {task.num_restaurants} - {task.zoom_level}")
+            self.model.add_tasks([task])
             self.taskAdded.emit(task)
 
     def remove_task(self):
-        current_row = self.task_list.currentRow()
-        if current_row >= 0:
-            self.task_list.takeItem(current_row)
-            del self.tasks[current_row]
+        rows = self.task_view.selectionModel().selectedRows()
+        task_ids = [self.model.task_id_at(self.proxy.mapToSource(index).row()) for index in rows]
+        if task_ids:
+            self.model.remove_ids(task_ids)
+
+    def task_at(self, index):
+        # Task of a row of the (sorted, filtered) view
+        return self.model.tasks[self.model.task_id_at(self.proxy.mapToSource(index).row())]
 
     def get_tasks(self):
-        return self.tasks
+        return self.model.all_tasks()
+
+    def get_task_ids(self):
+        return self.model.all_task_ids()
 
     def save_tasks(self, filename):
-        with open(filename, 'w') as f:
-            json.dump([task.to_dict() for task in self.tasks], f)
+        save_tasks(filename, self.model.all_tasks())
 
     def load_tasks(self, filename):
-        with open(filename, 'r') as f:
-            task_data = json.load(f)
-            self.tasks = [ScrapingTask.from_dict(data) for data in task_data]
-            self.task_list.clear()
-            for task in self.tasks:
-                self.task_list.addItem(f"{task.address} - {task.search_query} - {task.num_restaurants} - {task.zoom_level}")
+        self.model.set_tasks(load_tasks(filename))
+
+    def import_tasks(self, filename):
+        # Appends the tasks of a JSON or CSV file; returns how many were added
+        tasks = load_tasks(filename)
+        self.model.add_tasks(tasks)
+        return len(tasks)
 
 class ScraperThread(QThread):
     progress_update = pyqtSignal(int)
     scraping_complete = pyqtSignal(str)
     data_scraped = pyqtSignal(dict)
 
-    def __init__(self, address, search_query, num_restaurants, zoom_slider_value):
+    def __init__(self, task, wait_policy=DEFAULT_WAIT_POLICY, http_fetcher=None, journal=None, task_index=0,
+                 place_cache=None, dedup=None, metrics=None, driver_pool=None, geocode_cache=None, tile_workers=1,
+                 detail_tabs=0, delta=None):
         QThread.__init__(self)
-        self.address = address
-        self.search_query = search_query
-        self.num_restaurants = num_restaurants
-        self.zoom_slider_value = zoom_slider_value
-        self.stop_flag = False
+        from naver_scraper.engine import ScrapeEngine
+
+        self.engine = ScrapeEngine(task, wait_policy=wait_policy, http_fetcher=http_fetcher,
+                                   on_progress=self.progress_update.emit,
+                                   on_data=self.data_scraped.emit,
+                                   on_complete=self.scraping_complete.emit,
+                                   journal=journal, task_index=task_index, place_cache=place_cache,
+                                   dedup=dedup, metrics=metrics, driver_pool=driver_pool,
+                                   geocode_cache=geocode_cache, tile_workers=tile_workers,
+                                   detail_tabs=detail_tabs, delta=delta)
 
     def run(self):
-        driver = setup_driver()
-        try:
-            driver.get("https://map.naver.com/")
-            search_input_box = WebDriverWait(driver, 90).until(
-                EC.element_to_be_clickable((By.CLASS_NAME, 'input_search'))
-            )
-            search_input_box.send_keys(self.address)
-            search_input_box.send_keys(Keys.RETURN)
-            time.sleep(5)
-            total_zoom_levels = 14
-            desired_zoom_level = int((self.zoom_slider_value / 100) * (total_zoom_levels - 1))
-            current_zoom_level = total_zoom_levels // 2
-            zoom_difference = desired_zoom_level - current_zoom_level
-            zoom_button_selector = 'button.zoom_in' if zoom_difference > 0 else 'button.zoom_out'
-            zoom_button = WebDriverWait(driver, 30).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, zoom_button_selector))
-            )
-            for _ in range(abs(zoom_difference)):
-                zoom_button.click()
-                time.sleep(1)
-            time.sleep(2)
-            search_input_box = WebDriverWait(driver, 60).until(
-                EC.element_to_be_clickable((By.CLASS_NAME, 'input_search'))
-            )
-            search_input_box.clear()
-            search_input_box.send_keys(Keys.CONTROL + "a")
-            search_input_box.send_keys(Keys.DELETE)
-            time.sleep(2)
-            if search_input_box.get_attribute('value'):
-                search_input_box.clear()
-                search_input_box.send_keys(Keys.CONTROL + "a")
-                search_input_box.send_keys(Keys.DELETE)
-                time.sleep(1)
-            search_input_box.send_keys(self.search_query)
-            search_input_box.send_keys(Keys.RETURN)
-            time.sleep(10)
-            for i in range(1, self.num_restaurants + 1):
-                if self.stop_flag:
-                    self.scraping_complete.emit("Scraping stopped by user")
-                    break
-                restaurant_info = scrape_single_restaurant(driver, i)
-                if restaurant_info:
-                    self.data_scraped.emit(restaurant_info)
-                time.sleep(5)
-                progress = int((i / self.num_restaurants) * 100)
-                self.progress_update.emit(progress)
-            if not self.stop_flag:
-                self.scraping_complete.emit("Scraping completed successfully!")
-        except Exception as e:
-            self.scraping_complete.emit(f"An error occurred: {str(e)}")
-        finally:
-            driver.quit()
+        self.engine.run()
 
     def stop(self):
-        self.stop_flag = True
-
-class LogHandler(logging.Handler):
-    def __init__(self, signal):
-        super().__init__()
-        self.signal = signal
-
-    def emit(self, record):
-        log_entry = self.format(record)
-        self.signal.emit(log_entry)
+        self.engine.stop()
 
 class ScraperGUI(QMainWindow):
-    log_signal = pyqtSignal(str)
-
     def __init__(self):
         super().__init__()
-        self.scraped_data = {}
+        # Records go straight to an on-disk journal; only per-task counts are kept in memory
+        self.journal = None
+        self.scraped_counts = {}
         self.save_location = os.getcwd()
         self.excel_filename = "naver_restaurants_data.xlsx"
-        self.current_task_index = 0
+        self.output_format = 'xlsx'
+        self.use_place_cache = True
+        self.place_cache = None
+        self.geocode_cache = None
+        self.deduplicate = True
+        self.lean_browser = False
+        self.delta_rescrape = False
+        self.delta = None
+        self.detail_tabs = 0
+        self.request_rate = 2
+        self.rate_limiter = None
+        self.wait_policy = DEFAULT_WAIT_POLICY
+        self.dedup = None
+        self.metrics = None
+        self.exporter = None
+        self.max_workers = 1
+        self.http_fetcher = None
+        self.driver_pool = None
+        self.run_tasks = []
+        self.run_task_ids = []
+        self.next_task_index = 0
+        self.scraper_threads = {}
+        self.task_progress = {}
+        self.stop_requested = False
         self.initUI()
         self.setup_logging()
-        self.scheduler_widget.task_list.itemDoubleClicked.connect(self.show_task_details)
+        self.scheduler_widget.task_view.doubleClicked.connect(self.show_task_details)
 
     def setup_logging(self):
-        self.log_handler = LogHandler(self.log_signal)
-        self.log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s',
-                                                        datefmt='%Y-%m-%d %H:%M'))
+        # Scraper threads only put formatted lines in a ring buffer; a timer moves them to the log window
+        # in batches, and the full log goes to a rotating file from a background thread
+        self.log_buffer = LogBuffer(capacity=LOG_MAX_LINES)
+        self.log_handler = BufferHandler(self.log_buffer)
+        self.log_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
         logging.getLogger().addHandler(self.log_handler)
         logging.getLogger().setLevel(logging.INFO)
-        self.log_signal.connect(self.update_log_window)
-
-    def update_log_window(self, log_entry):
-        self.log_window.append(log_entry)
+        self.file_log = start_file_log()
+        if self.file_log:
+            logging.info(f"Full log: {self.file_log.path}")
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.update_log_window)
+        self.log_timer.start(LOG_FLUSH_MS)
+
+    def update_log_window(self):
+        lines, dropped = self.log_buffer.drain()
+        if not lines:
+            return
+        if dropped:
+            lines.insert(0, f"... {dropped} earlier lines not shown (see the log file) ...")
+        scroll_bar = self.log_window.verticalScrollBar()
+        at_bottom = scroll_bar.value() == scroll_bar.maximum()
+        cursor = QTextCursor(self.log_window.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.log_window.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertText("\n".join(lines))
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
 
     def initUI(self):
         self.setWindowTitle('Naver Map Scraper')
@@ -322,6 +478,12 @@ class ScraperGUI(QMainWindow):
         self.remove_task_button.clicked.connect(self.scheduler_widget.remove_task)
         task_button_layout.addWidget(self.remove_task_button)
 
+        self.import_tasks_button = QPushButton('Import Tasks')
+        self.import_tasks_button.setToolTip("Add the tasks of a JSON task list or a CSV file with the columns "
+                                            "address, search_query, num_restaurants, zoom_level, tiles")
+        self.import_tasks_button.clicked.connect(self.import_tasks)
+        task_button_layout.addWidget(self.import_tasks_button)
+
         task_layout.addLayout(task_button_layout)
         task_layout.addWidget(self.scheduler_widget)
         main_layout.addWidget(task_group)
@@ -339,6 +501,20 @@ class ScraperGUI(QMainWindow):
         self.stop_button.setEnabled(False)
         control_layout.addWidget(self.stop_button)
 
+        control_layout.addWidget(QLabel('Workers:'))
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, 16)
+        self.workers_input.setValue(self.max_workers)
+        self.workers_input.setToolTip("Number of tasks scraped at the same time, each in its own browser")
+        control_layout.addWidget(self.workers_input)
+
+        control_layout.addWidget(QLabel('Details:'))
+        self.detail_backend_input = QComboBox()
+        self.detail_backend_input.addItem('Browser', 'browser')
+        self.detail_backend_input.addItem('HTTP', 'http')
+        self.detail_backend_input.setToolTip("HTTP fetches place pages directly once the list exposes their place id")
+        control_layout.addWidget(self.detail_backend_input)
+
         main_layout.addWidget(control_group)
 
         # Progress Bar
@@ -356,6 +532,8 @@ class ScraperGUI(QMainWindow):
 
         self.log_window = QTextEdit(self)
         self.log_window.setReadOnly(True)
+        # Older lines are removed as new ones arrive, so long runs don't slow the window down
+        self.log_window.document().setMaximumBlockCount(LOG_MAX_LINES)
         log_layout.addWidget(self.log_window)
         main_layout.addWidget(log_group)
 
@@ -398,7 +576,7 @@ class ScraperGUI(QMainWindow):
             QProgressBar::chunk {
                 background-color: #2db400;
             }
-            QListWidget {
+            QTableView {
                 background-color: #ffffff;
                 border: 1px solid #cccccc;
                 border-radius: 5px;
@@ -438,6 +616,58 @@ class ScraperGUI(QMainWindow):
         rename_file_action.triggered.connect(self.rename_file)
         file_menu.addAction(rename_file_action)
 
+        place_cache_action = QAction('Use Place Cache', self, checkable=True)
+        place_cache_action.setChecked(self.use_place_cache)
+        place_cache_action.toggled.connect(self.set_use_place_cache)
+        file_menu.addAction(place_cache_action)
+
+        dedup_action = QAction('Skip Places Found by Earlier Tasks', self, checkable=True)
+        dedup_action.setChecked(self.deduplicate)
+        dedup_action.toggled.connect(self.set_deduplicate)
+        file_menu.addAction(dedup_action)
+
+        lean_action = QAction('Lean Browser (Headless, No Images)', self, checkable=True)
+        lean_action.setChecked(self.lean_browser)
+        lean_action.toggled.connect(self.set_lean_browser)
+        file_menu.addAction(lean_action)
+
+        delta_action = QAction('Delta Re-scrape (Only New or Changed Places)', self, checkable=True)
+        delta_action.setChecked(self.delta_rescrape)
+        delta_action.toggled.connect(self.set_delta_rescrape)
+        file_menu.addAction(delta_action)
+
+        tabs_menu = file_menu.addMenu('Detail Tabs per Browser')
+        tabs_group = QActionGroup(self)
+        for detail_tabs in DETAIL_TAB_CHOICES:
+            tabs_action = QAction(str(detail_tabs) if detail_tabs else 'Off', self, checkable=True)
+            tabs_action.setChecked(detail_tabs == self.detail_tabs)
+            tabs_action.triggered.connect(partial(self.set_detail_tabs, detail_tabs))
+            tabs_group.addAction(tabs_action)
+            tabs_menu.addAction(tabs_action)
+
+        rate_menu = file_menu.addMenu('Request Rate')
+        rate_group = QActionGroup(self)
+        for request_rate in REQUEST_RATE_CHOICES:
+            rate_action = QAction(f"Adaptive, from {request_rate}/s" if request_rate else 'Unlimited', self,
+                                  checkable=True)
+            rate_action.setChecked(request_rate == self.request_rate)
+            rate_action.triggered.connect(partial(self.set_request_rate, request_rate))
+            rate_group.addAction(rate_action)
+            rate_menu.addAction(rate_action)
+
+        format_menu = file_menu.addMenu('Output Format')
+        format_group = QActionGroup(self)
+        for output_format in EXPORTERS:
+            # A format whose optional package isn't installed is shown but can't be picked
+            requires = missing_requirement(output_format)
+            label = f"{output_format.upper()} (requires {requires})" if requires else output_format.upper()
+            format_action = QAction(label, self, checkable=True)
+            format_action.setEnabled(requires is None)
+            format_action.setChecked(output_format == self.output_format)
+            format_action.triggered.connect(partial(self.set_output_format, output_format))
+            format_group.addAction(format_action)
+            format_menu.addAction(format_action)
+
         file_menu.addSeparator()
 
         exit_action = QAction('Exit', self)
@@ -453,6 +683,15 @@ class ScraperGUI(QMainWindow):
         load_tasks_action.triggered.connect(self.load_tasks)
         scheduler_menu.addAction(load_tasks_action)
 
+        import_tasks_action = QAction('Import Tasks (JSON/CSV)', self)
+        import_tasks_action.triggered.connect(self.import_tasks)
+        scheduler_menu.addAction(import_tasks_action)
+
+        scheduler_menu.addSeparator()
+        metrics_action = QAction('Show Run Metrics', self)
+        metrics_action.triggered.connect(self.show_metrics)
+        scheduler_menu.addAction(metrics_action)
+
         help_menu = menubar.addMenu('Help')
         about_action = QAction('About', self)
         about_action.triggered.connect(self.show_about)
@@ -478,18 +717,67 @@ class ScraperGUI(QMainWindow):
             self.excel_filename = os.path.basename(new_name)
             self.show_info_message("File Renamed", f"Excel file will be saved as: {self.excel_filename}")
 
+    def set_use_place_cache(self, checked):
+        self.use_place_cache = checked
+
+    def set_deduplicate(self, checked):
+        self.deduplicate = checked
+
+    def set_lean_browser(self, checked):
+        self.lean_browser = checked
+
+    def set_delta_rescrape(self, checked):
+        self.delta_rescrape = checked
+
+    def set_detail_tabs(self, detail_tabs):
+        self.detail_tabs = detail_tabs
+
+    def set_request_rate(self, request_rate):
+        self.request_rate = request_rate
+
+    def set_output_format(self, output_format):
+        self.output_format = output_format
+        if output_format != 'xlsx':
+            output_dir = os.path.splitext(self.excel_filename)[0] + f"_{output_format}"
+            self.show_info_message("Output Format", f"One {output_format.upper()} file per task will be written to: "
+                                                    f"{os.path.join(self.save_location, output_dir)}")
+
     def save_tasks(self):
-        filename, _ = QFileDialog.getSaveFileName(self, "Save Tasks", "", "JSON Files (*.json)")
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Tasks", "", "JSON Files (*.json);;CSV Files (*.csv)")
         if filename:
-            self.scheduler_widget.save_tasks(filename)
+            try:
+                self.scheduler_widget.save_tasks(filename)
+            except OSError as e:
+                self.show_error_message("Save Failed", f"Could not save tasks to {filename}: {e}")
+                return
             self.show_info_message("Tasks Saved", f"Tasks saved to: {filename}")
 
     def load_tasks(self):
-        filename, _ = QFileDialog.getOpenFileName(self, "Load Tasks", "", "JSON Files (*.json)")
+        filename, _ = QFileDialog.getOpenFileName(self, "Load Tasks", "", TASK_FILE_FILTER)
         if filename:
-            self.scheduler_widget.load_tasks(filename)
+            try:
+                self.scheduler_widget.load_tasks(filename)
+            except (OSError, ValueError, KeyError) as e:
+                self.show_error_message("Load Failed", f"Could not load tasks from {filename}: {e}")
+                return
             self.show_info_message("Tasks Loaded", f"Tasks loaded from: {filename}")
 
+    def import_tasks(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Import Tasks", "", TASK_FILE_FILTER)
+        if filename:
+            try:
+                added = self.scheduler_widget.import_tasks(filename)
+            except (OSError, ValueError, KeyError) as e:
+                self.show_error_message("Import Failed", f"Could not import tasks from {filename}: {e}")
+                return
+            self.show_info_message("Tasks Imported", f"{added} tasks added from: {filename}")
+
+    def show_metrics(self):
+        if self.metrics is None:
+            self.show_info_message("Run Metrics", "No run has been started yet.")
+            return
+        MetricsDialog(self.metrics, self).exec_()
+
     def show_about(self):
         about_text = """
         <h2>Naver Map Scraper</h2>
@@ -507,127 +795,268 @@ class ScraperGUI(QMainWindow):
         QMessageBox.critical(self, title, message)
 
     def start_scheduled_scraping(self):
+        # Selenium and requests load on the first START rather than before the window shows
+        from naver_scraper.drivers import DriverPool
+
         tasks = self.scheduler_widget.get_tasks()
         if not tasks:
             self.show_error_message("No Tasks", "Please add at least one scraping task.")
             return
+        # Checked before anything of the run is opened, so a missing package or unwritable output can't
+        # fail the run once it has started
+        exporter = create_exporter(self.output_format, os.path.join(self.save_location, self.excel_filename))
+        try:
+            exporter.prepare()
+        except (RuntimeError, OSError) as e:
+            self.show_error_message("Output Error", f"Can't write {self.output_format.upper()} output: {e}")
+            return
+
+        # Work on a snapshot so removing tasks mid-run doesn't shift indices
+        self.run_tasks = list(tasks)
+        self.run_task_ids = self.scheduler_widget.get_task_ids()
+        self.scheduler_widget.model.reset_status("Queued")
+        self.open_journal()
+        self.exporter = exporter
+        if self.use_place_cache:
+            self.place_cache = PlaceCache()
+        # Addresses searched in earlier runs open directly at their map position
+        self.geocode_cache = GeocodeCache()
+        # Built from the journal so a resumed run keeps skipping places it already has
+        self.dedup = DedupIndex(self.journal) if self.deduplicate else None
+        # Places listed as in the previous delta run keep their record; only new or changed ones are scraped
+        self.delta = DeltaStore() if self.delta_rescrape else None
+        # Kept after the run so its timings can still be inspected
+        self.metrics = ScrapeMetrics()
+        self.scraped_counts = {}
+        self.next_task_index = 0
+        self.task_progress = {}
+        self.stop_requested = False
+        self.max_workers = self.workers_input.value()
+        # Browsers start in the background now and are reused from task to task
+        # (a tiled task can keep several busy)
+        self.driver_pool = DriverPool(size=min(self.max_workers, sum(task.tiles ** 2 for task in self.run_tasks)),
+                                      spares=1 if len(self.run_tasks) > self.max_workers else 0,
+                                      lean=self.lean_browser)
+        # One limiter paces the requests of every worker, browser and HTTP alike
+        self.rate_limiter = RateLimiter(self.request_rate) if self.request_rate else None
+        self.wait_policy = WaitPolicy(rate_limiter=self.rate_limiter)
+        if self.detail_backend_input.currentData() == 'http':
+            # Shared by every worker so the connection pool and concurrency limit cover the whole run
+            from naver_scraper.http_detail import HttpDetailFetcher
+            self.http_fetcher = HttpDetailFetcher(max_connections=max(4, self.max_workers * 2),
+                                                  rate_limiter=self.rate_limiter)
+        self.progress_bar.setValue(0)
 
-        self.current_task_index = 0
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.workers_input.setEnabled(False)
+        self.detail_backend_input.setEnabled(False)
         self.start_next_task()
 
+    def journal_path(self):
+        return os.path.join(self.save_location, os.path.splitext(self.excel_filename)[0] + '.journal.sqlite')
+
+    def open_journal(self):
+        journal_path = self.journal_path()
+        if os.path.exists(journal_path):
+            journal = ScrapeJournal(journal_path)
+            resumable = journal.has_progress()
+            journal.close()
+            if resumable:
+                reply = QMessageBox.question(self, 'Resume',
+                                             "An unfinished run was found for this output file. "
+                                             "Resume it and skip the restaurants already scraped?",
+                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+                if reply == QMessageBox.No:
+                    remove_journal_files(journal_path)
+        self.run_journal_path = journal_path
+        self.journal = ScrapeJournal(journal_path)
+
     def start_next_task(self):
-        tasks = self.scheduler_widget.get_tasks()
-        if self.current_task_index < len(tasks):
-            task = tasks[self.current_task_index]
-            self.start_scraping(task)
-        else:
-            self.show_info_message("Scraping Complete", "All scheduled tasks have been completed.")
+        # Keep up to max_workers tasks running at once
+        while (not self.stop_requested and len(self.scraper_threads) < self.max_workers
+               and self.next_task_index < len(self.run_tasks)):
+            task_index = self.next_task_index
+            self.next_task_index += 1
+            self.start_scraping(task_index, self.run_tasks[task_index])
+
+        if not self.scraper_threads:
+            for task_index in range(self.next_task_index, len(self.run_tasks)):
+                self.scheduler_widget.model.set_status(self.run_task_ids[task_index], "Not run")
+            if self.stop_requested:
+                self.show_info_message("Scraping Stopped", "Scraping was stopped before all tasks finished.")
+            else:
+                self.show_info_message("Scraping Complete", "All scheduled tasks have been completed.")
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
+            self.workers_input.setEnabled(True)
+            self.detail_backend_input.setEnabled(True)
+            if self.http_fetcher:
+                self.http_fetcher.close()
+                self.http_fetcher = None
+            if self.driver_pool:
+                self.driver_pool.close()
+                self.driver_pool = None
+            if self.place_cache:
+                self.place_cache.close()
+                self.place_cache = None
+            if self.geocode_cache:
+                self.geocode_cache.close()
+                self.geocode_cache = None
+            if self.rate_limiter:
+                logging.info(f"Rate limiter: {self.rate_limiter.describe()}")
+                self.rate_limiter = None
             self.save_scraped_data()
 
-    def start_scraping(self, task):
-        self.current_task = task
-        self.scraped_data[task.address] = []
-        self.scraper_thread = ScraperThread(task.address, task.search_query, task.num_restaurants, task.zoom_level)
-        self.scraper_thread.progress_update.connect(self.update_progress)
-        self.scraper_thread.scraping_complete.connect(self.scraping_finished)
-        self.scraper_thread.data_scraped.connect(self.add_scraped_data)
-        self.scraper_thread.start()
-        
-        self.start_button.setEnabled(False)
-        self.stop_button.setEnabled(True)
+    def start_scraping(self, task_index, task):
+        self.scraped_counts[task_index] = 0
+        self.task_progress[task_index] = 0
+        if self.exporter.streaming:
+            try:
+                self.exporter.open_task(task_index, task, self.journal.task_records(task_index, task))
+            except (RuntimeError, OSError) as e:
+                # e.g. a file name the file system rejects; the other tasks go on
+                logging.error(f"Can't open the output file of {task.address} - {task.search_query}: {e}")
+                self.scheduler_widget.model.set_status(self.run_task_ids[task_index], "Failed")
+                self.update_progress(task_index, 100)
+                return
+        scraper_thread = ScraperThread(task, wait_policy=self.wait_policy, http_fetcher=self.http_fetcher,
+                                       journal=self.journal, task_index=task_index,
+                                       place_cache=self.place_cache, dedup=self.dedup, metrics=self.metrics,
+                                       driver_pool=self.driver_pool, geocode_cache=self.geocode_cache,
+                                       tile_workers=self.max_workers, detail_tabs=self.detail_tabs,
+                                       delta=self.delta)
+        scraper_thread.progress_update.connect(partial(self.update_progress, task_index))
+        scraper_thread.scraping_complete.connect(partial(self.scraping_finished, task_index))
+        scraper_thread.data_scraped.connect(partial(self.add_scraped_data, task_index))
+        # Only release the slot once run() has returned and the driver has quit
+        scraper_thread.finished.connect(partial(self.worker_finished, task_index))
+        self.scraper_threads[task_index] = scraper_thread
+        self.scheduler_widget.model.set_status(self.run_task_ids[task_index], "Running", 0)
+        logging.info(f"Starting task {task_index + 1}/{len(self.run_tasks)}: {task.address} - {task.search_query}")
+        scraper_thread.start()
 
     def stop_scraping(self):
-        if hasattr(self, 'scraper_thread'):
-            self.scraper_thread.stop()
+        self.stop_requested = True
+        for scraper_thread in self.scraper_threads.values():
+            scraper_thread.stop()
         self.stop_button.setEnabled(False)
 
-    def update_progress(self, value):
-        self.progress_bar.setValue(value)
-
-    def scraping_finished(self, message):
-        self.progress_bar.setValue(100)
-        logging.info(message)
-        self.current_task_index += 1
+    def update_progress(self, task_index, value):
+        self.task_progress[task_index] = value
+        total_progress = sum(self.task_progress.values()) / len(self.run_tasks)
+        self.progress_bar.setValue(int(total_progress))
+
+    def scraping_finished(self, task_index, message):
+        task = self.run_tasks[task_index]
+        self.scheduler_widget.model.set_status(self.run_task_ids[task_index], task_status(message))
+        logging.info(f"[{task.address} - {task.search_query}] {message}")
+
+    def worker_finished(self, task_index):
+        self.scraper_threads.pop(task_index, None)
+        if self.exporter.streaming:
+            self.exporter.close_task(task_index)
+        if not self.stop_requested:
+            self.update_progress(task_index, 100)
         self.start_next_task()
 
-    def add_scraped_data(self, data):
-        self.scraped_data[self.current_task.address].append(data)
-        logging.info(f"Scraped data for {data['Restaurant Name']}")
+    def add_scraped_data(self, task_index, data):
+        self.scraped_counts[task_index] += 1
+        self.scheduler_widget.model.set_status(self.run_task_ids[task_index], scraped=self.scraped_counts[task_index])
+        if self.exporter.streaming:
+            with self.metrics.task_view(task_label(task_index, self.run_tasks[task_index])).span('export'):
+                self.exporter.write(task_index, data)
+        logging.info(f"Scraped data for {data['Restaurant Name']} ({self.run_tasks[task_index].address})")
 
     def save_scraped_data(self):
-        if self.scraped_data:
-            file_path = os.path.join(self.save_location, self.excel_filename)
-            workbook = openpyxl.Workbook()
-            
-            # Remove the default sheet created by openpyxl
-            workbook.remove(workbook.active)
-            
-            for task_address, task_data in self.scraped_data.items():
-                # Get the search query corresponding to the address
-                task_query = next(task.search_query for task in self.scheduler_widget.get_tasks() if task.address == task_address)
-                # Create a sheet title using address and search query
-                sheet_title = f"{task_address} - {task_query}"
-
-                # Excel sheet names are limited to 31 characters
-                if len(sheet_title) > 31:
-                    sheet_title = sheet_title[:28] + "..."
-
-                # Create a new sheet with the generated title
-                sheet = workbook.create_sheet(title=sheet_title)
-                
-                # Write headers
-                headers = ["Restaurant Name", "Address", "Phone Number"]
-                for col, header in enumerate(headers, start=1):
-                    cell = sheet.cell(row=1, column=col, value=header)
-                    cell.font = Font(bold=True)
-                
-                # Write data
-                for row, restaurant in enumerate(task_data, start=2):
-                    for col, key in enumerate(headers, start=1):
-                        sheet.cell(row=row, column=col, value=restaurant.get(key, "N/A"))
-                
-                # Auto-adjust column widths
-                for column in sheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(cell.value)
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2) * 1.2
-                    sheet.column_dimensions[column_letter].width = adjusted_width
-
-            workbook.save(file_path)
-            self.show_info_message("Data Saved", f"All scraped data has been saved to {file_path}")
+        # Exports from the journal, which also holds records of earlier resumed runs
+        task_results = self.journal.task_results(self.run_tasks)
+        with self.metrics.task_view(RUN_LABEL).span('export'):
+            if self.exporter.streaming:
+                # Rows were appended while scraping; closing finalizes the files
+                self.exporter.close()
+            elif task_results:
+                self.exporter.export(task_results)
+            self.exporter.write_appearances(self.journal.iter_appearances())
+        self.save_metrics()
+        if self.delta:
+            self.save_changes_report()
+        if self.dedup:
+            if self.dedup.duplicates:
+                logging.info(f"Skipped {self.dedup.duplicates} places already scraped for another task")
+            self.dedup = None
+        if task_results:
+            self.show_info_message("Data Saved", f"All scraped data has been saved to {self.exporter.describe()}")
         else:
             self.show_error_message("No Data", "No data was scraped.")
-        self.scraped_data = {}  # Clear the data after saving
+        unfinished = self.stop_requested or self.journal.incomplete_tasks(self.run_tasks)
+        self.journal.close()
+        self.journal = None
+        # Keep the journal of an unfinished run so the next START can resume it
+        if not unfinished:
+            remove_journal_files(self.run_journal_path)
+
+    def save_changes_report(self):
+        report_path = os.path.join(self.save_location, os.path.splitext(self.excel_filename)[0] + '.changes.csv')
+        try:
+            changes = self.delta.write_report(report_path, self.run_tasks)
+            logging.info(f"{changes} added, changed or removed places listed in {report_path}")
+        except OSError as e:
+            logging.error(f"Could not save the changes report: {e}")
+        self.delta.close()
+        self.delta = None
+
+    def save_metrics(self):
+        # Timings of the run next to the output, plus a summary in the log window
+        metrics_path = os.path.join(self.save_location, os.path.splitext(self.excel_filename)[0] + '.metrics.json')
+        for line in self.metrics.summary_lines():
+            logging.info(line)
+        try:
+            self.metrics.write(metrics_path)
+            logging.info(f"Run metrics saved to {metrics_path} (Scheduler > Show Run Metrics)")
+        except OSError as e:
+            logging.error(f"Could not save run metrics: {e}")
 
     def closeEvent(self, event):
-        if hasattr(self, 'scraper_thread') and self.scraper_thread.isRunning():
+        if any(scraper_thread.isRunning() for scraper_thread in self.scraper_threads.values()):
             reply = QMessageBox.question(self, 'Exit',
                                          "A scraping task is still running. Are you sure you want to quit?",
                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes:
-                self.scraper_thread.stop()
-                self.scraper_thread.wait()
+                self.stop_requested = True
+                for scraper_thread in list(self.scraper_threads.values()):
+                    scraper_thread.stop()
+                # Stopped engines leave their waits within about a second; only a browser command that
+                # hangs can hold a task longer, and killing the browsers makes it fail. All tasks share one
+                # deadline, and each is waited for so all of them get the chance to stop.
+                deadline = time.monotonic() + STOP_TIMEOUT_MS / 1000
+                stopped = [scraper_thread.wait(max(0, int((deadline - time.monotonic()) * 1000)))
+                           for scraper_thread in list(self.scraper_threads.values())]
+                if not all(stopped):
+                    logging.warning("Tasks did not stop in time; closing their browsers")
+                    if self.driver_pool:
+                        self.driver_pool.close(kill_in_use=True)
+                    for scraper_thread in list(self.scraper_threads.values()):
+                        scraper_thread.wait()
+                # Deliver the records and finished signals still queued, which saves the partial data
+                QApplication.processEvents()
+                if self.driver_pool:
+                    self.driver_pool.close()
                 event.accept()
             else:
                 event.ignore()
         else:
             event.accept()
 
-    def show_task_details(self, item):
-        task = self.scheduler_widget.tasks[self.scheduler_widget.task_list.row(item)]
+    def show_task_details(self, index):
+        task = self.scheduler_widget.task_at(index)
+        tiles = f"{task.tiles} x {task.tiles}" if task.tiles > 1 else "Off"
         details = f"""
         <b>Address:</b> {task.address}
         <b>Search Query:</b> {task.search_query}
         <b>Number of Restaurants:</b> {task.num_restaurants}
         <b>Zoom Level:</b> {task.zoom_level}
+        <b>Tiles:</b> {tiles}
         """
         QMessageBox.information(self, "Task Details", details)
 
@@ -636,5 +1065,9 @@ if __name__ == '__main__':
     app.setStyle(QStyleFactory.create('Fusion'))  # Use Fusion style for a modern look
     ex = ScraperGUI()
     ex.show()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    # Write out the log records still queued for the log file
+    if ex.file_log:
+        ex.file_log.close()
+    sys.exit(exit_code)
 
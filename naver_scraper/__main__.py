@@ -0,0 +1,5 @@
+import sys
+
+from naver_scraper.cli import main
+
+sys.exit(main())
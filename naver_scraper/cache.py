@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'naver_scraper')
+
+
+class PlaceCache:
+    # Persistent place-detail cache keyed by Naver place id. Entries older than ttl seconds are treated
+    # as missing; past max_entries the least recently used ones are evicted. Shared by all workers.
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=100000):
+        if path is None:
+            os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_CACHE_DIR, 'places.sqlite')
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.puts_since_eviction = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS places (
+                place_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS places_accessed_at ON places (accessed_at);
+        """)
+
+    def get(self, place_id):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT data, fetched_at FROM places WHERE place_id = ?", (place_id,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM places WHERE place_id = ?", (place_id,))
+                return None
+            self.conn.execute("UPDATE places SET accessed_at = ? WHERE place_id = ?", (now, place_id))
+        return json.loads(row[0])
+
+    def put(self, place_id, restaurant_info):
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO places (place_id, data, fetched_at, accessed_at) "
+                              "VALUES (?, ?, ?, ?)",
+                              (place_id, json.dumps(restaurant_info, ensure_ascii=False), now, now))
+            # Counting rows on every put would dominate; check the bound every 100 writes instead
+            self.puts_since_eviction += 1
+            if self.puts_since_eviction >= 100:
+                self.puts_since_eviction = 0
+                self.evict()
+
+    def evict(self):
+        self.conn.execute("DELETE FROM places WHERE fetched_at < ?", (time.time() - self.ttl,))
+        excess = self.conn.execute("SELECT COUNT(*) FROM places").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.conn.execute("DELETE FROM places WHERE place_id IN "
+                              "(SELECT place_id FROM places ORDER BY accessed_at LIMIT ?)", (excess,))
+
+    def task_view(self):
+        return TaskCacheView(self)
+
+    def close(self):
+        with self.lock:
+            self.evict()
+            self.conn.close()
+
+
+class TaskCacheView:
+    # Per-task handle on a shared PlaceCache that counts hits and misses for the task's report. The tile
+    # workers of a task share it, so the counts are kept under a lock.
+    def __init__(self, cache):
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, place_id):
+        restaurant_info = self.cache.get(place_id)
+        with self.lock:
+            if restaurant_info is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return restaurant_info
+
+    def put(self, place_id, restaurant_info):
+        self.cache.put(place_id, restaurant_info)
+
+
+class GeocodeCache:
+    # Persistent address -> map position cache (the coordinates and zoom Naver shows an address at), so a
+    # repeated address doesn't need the address search. Positions don't go stale, so there is no ttl.
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_CACHE_DIR, 'geocode.sqlite')
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS positions (
+                address TEXT PRIMARY KEY,
+                x TEXT NOT NULL,
+                y TEXT NOT NULL,
+                zoom REAL NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+
+    @staticmethod
+    def normalize(address):
+        return " ".join(address.split())
+
+    def get(self, address):
+        # Returns (x, y, zoom) or None; x and y are kept as the strings Naver put in the URL
+        with self.lock:
+            row = self.conn.execute("SELECT x, y, zoom FROM positions WHERE address = ?",
+                                    (self.normalize(address),)).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, address, position):
+        x, y, zoom = position
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO positions (address, x, y, zoom, fetched_at) "
+                              "VALUES (?, ?, ?, ?, ?)", (self.normalize(address), x, y, zoom, time.time()))
+
+    def forget(self, address):
+        with self.lock:
+            self.conn.execute("DELETE FROM positions WHERE address = ?", (self.normalize(address),))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,229 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+
+from naver_scraper.cache import GeocodeCache, PlaceCache
+from naver_scraper.dedup import DedupIndex
+from naver_scraper.delta import DeltaStore
+from naver_scraper.export import EXPORTERS, create_exporter
+from naver_scraper.journal import ScrapeJournal, remove_journal_files
+from naver_scraper.logbuffer import start_file_log
+from naver_scraper.metrics import RUN_LABEL, ScrapeMetrics
+from naver_scraper.ratelimit import RateLimiter
+from naver_scraper.tasks import load_tasks
+from naver_scraper.waits import WaitPolicy
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m naver_scraper',
+                                     description="Scrape Naver Maps restaurants from a saved task list without the GUI")
+    parser.add_argument('tasks_file', help="Task list saved from the GUI (Scheduler > Save Tasks), or a CSV of tasks")
+    parser.add_argument('-o', '--output', default="naver_restaurants_data.xlsx",
+                        help="Excel file to write; other formats write one file per task into a directory "
+                             "named after it (e.g. naver_restaurants_data_csv/)")
+    parser.add_argument('-f', '--format', choices=sorted(EXPORTERS), default='xlsx', help="Output format")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Number of tasks scraped at the same time")
+    parser.add_argument('--details', choices=['browser', 'http'], default='browser',
+                        help="How restaurant details are fetched once a result is listed")
+    parser.add_argument('--detail-tabs', type=int, default=0,
+                        help="Load up to this many detail pages at once in extra tabs of each browser "
+                             "(0 loads them one by one in the map's pane; tiled tasks ignore it)")
+    parser.add_argument('--show-browser', action='store_true', help="Run Chrome with a visible window")
+    parser.add_argument('--lean', action='store_true',
+                        help="Run Chrome headless without images, fonts, map tiles or trackers and log each "
+                             "task's traffic (overrides --show-browser)")
+    parser.add_argument('--rate', type=float, default=2,
+                        help="Requests per second sent to Naver at the start, shared by all workers "
+                             "(0 disables rate limiting)")
+    parser.add_argument('--min-rate', type=float, default=0.2,
+                        help="Slowest rate the limiter backs off to when Naver fails or slows down")
+    parser.add_argument('--max-rate', type=float,
+                        help="Fastest rate the limiter speeds up to while Naver responds well (default: 4x --rate)")
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help="Keep the rate at --rate instead of adapting it to errors and latency")
+    parser.add_argument('--retries', type=int, default=3, help="Attempts per restaurant before it counts as failed")
+    parser.add_argument('--recycle-pages', type=int, default=300,
+                        help="Restart a browser after it has handled this many restaurants (0 disables)")
+    parser.add_argument('--browser-memory-mb', type=int, default=1500,
+                        help="Restart a browser whose processes use more memory than this (0 disables)")
+    parser.add_argument('--cache-days', type=float, default=7,
+                        help="Reuse place details cached within this many days (0 disables the cache)")
+    parser.add_argument('--cache-path', help="Place cache database (default: ~/.cache/naver_scraper/places.sqlite)")
+    parser.add_argument('--cache-size', type=int, default=100000, help="Maximum number of cached places")
+    parser.add_argument('--geocode-path',
+                        help="Cache of map positions per address (default: ~/.cache/naver_scraper/geocode.sqlite)")
+    parser.add_argument('--no-geocode-cache', action='store_true',
+                        help="Search every address in the map instead of opening known positions directly")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Scrape places again when they show up in more than one task")
+    parser.add_argument('--delta', action='store_true',
+                        help="Only scrape places that are new or whose name or category changed since the task's "
+                             "previous delta run; the others keep their previous record. Writes a report of "
+                             "added, changed and removed places")
+    parser.add_argument('--delta-path',
+                        help="Result lists kept for --delta runs (default: ~/.cache/naver_scraper/listings.sqlite)")
+    parser.add_argument('--changes-report',
+                        help="Where --delta writes its report (default: next to the output, .changes.csv)")
+    parser.add_argument('--metrics-file',
+                        help="Write per-phase timings and counters here when the run ends "
+                             "(JSON, or Prometheus text format if the name ends in .prom)")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve live metrics in the Prometheus text format on http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--log-file',
+                        help="Also write the log to this file, rotated every 10 MB with 5 old files kept; "
+                             "written from a background thread")
+    parser.add_argument('--journal', help="Where records are journaled while scraping (default: next to the output)")
+    parser.add_argument('--fresh', action='store_true', help="Discard an existing journal instead of resuming it")
+    parser.add_argument('--keep-journal', action='store_true', help="Keep the journal after a successful export")
+    return parser.parse_args(argv)
+
+
+def report_metrics(metrics, metrics_file, metrics_server):
+    for line in metrics.summary_lines():
+        logging.info(line)
+    if metrics_file:
+        metrics.write(metrics_file)
+        logging.info(f"Metrics written to {metrics_file}")
+    if metrics_server:
+        metrics_server.shutdown()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M')
+    file_log = start_file_log(args.log_file) if args.log_file else None
+    try:
+        return run(args)
+    finally:
+        if file_log:
+            file_log.close()
+
+
+def run(args):
+    # Selenium is only loaded once the arguments are valid and there is something to scrape
+    from naver_scraper.drivers import DriverPool
+    from naver_scraper.engine import TaskRunner
+
+    tasks = load_tasks(args.tasks_file)
+    if not tasks:
+        logging.error(f"No tasks found in {args.tasks_file}")
+        return 1
+
+    file_path = os.path.abspath(args.output)
+    exporter = create_exporter(args.format, file_path)
+    try:
+        exporter.prepare()
+    except (RuntimeError, OSError) as e:
+        logging.error(f"Can't write {args.format} output: {e}")
+        return 1
+
+    journal_path = args.journal or os.path.splitext(file_path)[0] + '.journal.sqlite'
+    if args.fresh:
+        remove_journal_files(journal_path)
+    journal = ScrapeJournal(journal_path)
+    if journal.has_progress():
+        logging.info(f"Resuming from journal {journal_path}")
+
+    rate_limiter = None
+    if args.rate > 0:
+        rate_limiter = RateLimiter(args.rate, min_rate=args.min_rate, max_rate=args.max_rate,
+                                   adaptive=not args.fixed_rate)
+    wait_policy = WaitPolicy(max_retries=args.retries, rate_limiter=rate_limiter)
+
+    http_fetcher = None
+    if args.details == 'http':
+        from naver_scraper.http_detail import HttpDetailFetcher
+        http_fetcher = HttpDetailFetcher(max_connections=max(4, args.workers * 2), rate_limiter=rate_limiter)
+
+    place_cache = None
+    if args.cache_days > 0:
+        place_cache = PlaceCache(args.cache_path, ttl=args.cache_days * 24 * 3600, max_entries=args.cache_size)
+    geocode_cache = None if args.no_geocode_cache else GeocodeCache(args.geocode_path)
+
+    def log_data(task_index, restaurant_info):
+        logging.info(f"Scraped data for {restaurant_info['Restaurant Name']} ({tasks[task_index].address})")
+
+    def log_complete(task_index, message):
+        task = tasks[task_index]
+        logging.info(f"[{task.address} - {task.search_query}] {message}")
+
+    dedup = None if args.no_dedup else DedupIndex(journal)
+    delta = DeltaStore(args.delta_path) if args.delta else None
+
+    metrics = ScrapeMetrics()
+    run_metrics = metrics.task_view(RUN_LABEL)
+    metrics_server = metrics.serve(args.metrics_port) if args.metrics_port else None
+
+    # Browsers are launched while the first tasks are set up and reused from task to task
+    # (a tiled task can keep several busy)
+    driver_pool = DriverPool(size=min(args.workers, sum(task.tiles ** 2 for task in tasks)),
+                             headless=not args.show_browser,
+                             spares=1 if len(tasks) > args.workers else 0, max_pages=args.recycle_pages,
+                             max_rss_mb=args.browser_memory_mb, lean=args.lean)
+
+    runner = TaskRunner(tasks, max_workers=args.workers, wait_policy=wait_policy, http_fetcher=http_fetcher,
+                        headless=not args.show_browser, on_data=log_data, on_complete=log_complete,
+                        journal=journal, exporter=exporter, place_cache=place_cache, dedup=dedup, metrics=metrics,
+                        driver_pool=driver_pool, lean=args.lean, geocode_cache=geocode_cache,
+                        detail_tabs=args.detail_tabs, delta=delta)
+    # Run the pool off the main thread so Ctrl+C can stop it and still save partial data
+    runner_thread = threading.Thread(target=runner.run)
+    runner_thread.start()
+    try:
+        while runner_thread.is_alive():
+            runner_thread.join(0.5)
+    except KeyboardInterrupt:
+        logging.info("Stopping, partial data will be saved...")
+        runner.stop()
+        runner_thread.join()
+    finally:
+        driver_pool.close()
+        if http_fetcher:
+            http_fetcher.close()
+        if exporter.streaming:
+            with run_metrics.span('export'):
+                exporter.close()
+        if place_cache:
+            place_cache.close()
+        if geocode_cache:
+            geocode_cache.close()
+    if rate_limiter:
+        logging.info(f"Rate limiter: {rate_limiter.describe()}")
+    if delta:
+        report_path = args.changes_report or os.path.splitext(file_path)[0] + '.changes.csv'
+        try:
+            changes = delta.write_report(report_path, tasks)
+            logging.info(f"{changes} added, changed or removed places listed in {report_path}")
+        except OSError as e:
+            logging.error(f"Could not write the changes report: {e}")
+        delta.close()
+
+    task_results = journal.task_results(tasks)
+    if not task_results:
+        journal.close()
+        report_metrics(metrics, args.metrics_file, metrics_server)
+        logging.error("No data was scraped.")
+        return 1
+
+    with run_metrics.span('export'):
+        if not exporter.streaming:
+            exporter.export(task_results)
+        exporter.write_appearances(journal.iter_appearances())
+    report_metrics(metrics, args.metrics_file, metrics_server)
+    if dedup and dedup.duplicates:
+        logging.info(f"Skipped {dedup.duplicates} places already scraped for another task")
+    logging.info(f"All scraped data has been saved to {exporter.describe()}")
+    unfinished = runner.stop_flag or journal.incomplete_tasks(tasks)
+    journal.close()
+    if unfinished:
+        logging.info(f"Some tasks did not finish; run again with the same arguments to resume from {journal_path}")
+    elif not args.keep_journal:
+        remove_journal_files(journal_path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
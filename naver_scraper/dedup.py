@@ -0,0 +1,132 @@
+import re
+import threading
+import unicodedata
+
+
+def normalize_text(text):
+    # Case, width and punctuation differences between list and detail pane shouldn't split a place
+    return re.sub(r'[\W_]+', '', unicodedata.normalize('NFKC', text or '')).lower()
+
+
+def lookup_keys(place_id=None, name=None, address=None):
+    # The place id is authoritative; name + address is the fallback for entries that don't expose one.
+    # A bare name is never used - chains share names across branches.
+    keys = []
+    if place_id:
+        keys.append(f"id:{place_id}")
+    name, address = normalize_text(name), normalize_text(address)
+    if name and address:
+        keys.append(f"name:{name}|{address}")
+    return keys
+
+
+class DedupIndex:
+    # Run-wide index of the places already claimed by a task, shared by all workers. Every lookup key
+    # seen for a place maps to its canonical place key (the first key it was claimed under). A claim is
+    # held in memory while its place is being scraped; only once the record is journaled are its keys
+    # written with it (see ScrapeJournal.record), so a resumed run keeps skipping the places scraped
+    # before the restart but scrapes those that were only claimed when it stopped.
+    def __init__(self, journal=None):
+        self.lock = threading.Lock()
+        self.place_keys = journal.load_place_keys() if journal else {}
+        # Lookup keys not journaled yet, per place key
+        self.unsaved = {}
+        # Claimed places without a journaled record, and the task index that claimed each
+        self.in_flight = {}
+        self.appearances = {}
+        self.duplicates = 0
+
+    def claim(self, task_index, entry):
+        # Called for each list entry before it is clicked. Returns (place_key, duplicate); place_key is
+        # None when the list gave nothing to identify the place by.
+        return self.match(task_index, lookup_keys(entry.place_id, entry.name, entry.address))
+
+    def confirm(self, task_index, place_key, entry, restaurant_info):
+        # Adds the keys learned while scraping (the place id from the detail pane, the full address).
+        # These can reveal that the place was already scraped under another key, in which case the
+        # record is dropped in favour of the earlier one.
+        keys = lookup_keys(entry.place_id, restaurant_info.get("Restaurant Name"), restaurant_info.get("Address"))
+        if place_key is None:
+            return self.match(task_index, keys)
+        with self.lock:
+            for key in keys:
+                other = self.place_keys.get(key)
+                if other and other != place_key:
+                    self.forget(place_key)
+                    self.add_appearance(other, task_index)
+                    self.duplicates += 1
+                    return other, True
+            self.add_keys(place_key, keys)
+        return place_key, False
+
+    def commit(self, place_key):
+        # The place's record is being journaled; returns the lookup keys to journal with it
+        if place_key is None:
+            return []
+        with self.lock:
+            self.in_flight.pop(place_key, None)
+            return self.unsaved.pop(place_key, [])
+
+    def learned_keys(self, place_key):
+        # Lookup keys to journal with a duplicate's appearance. Those of a place still in flight wait for
+        # its record, or a stop before the record would leave the place claimed for good.
+        with self.lock:
+            if place_key is None or place_key in self.in_flight:
+                return []
+            return self.unsaved.pop(place_key, [])
+
+    def release(self, place_key):
+        # The claiming task failed to scrape the place; let later tasks try it
+        if place_key is None:
+            return
+        with self.lock:
+            self.forget(place_key)
+
+    def release_task(self, task_index):
+        # Releases the places a task claimed but didn't record (it stopped, failed or abandoned a tile)
+        with self.lock:
+            claimed = [place_key for place_key, owner in self.in_flight.items() if owner == task_index]
+            for place_key in claimed:
+                self.forget(place_key)
+        return len(claimed)
+
+    def tasks_for(self, place_key):
+        with self.lock:
+            return list(self.appearances.get(place_key, ()))
+
+    def match(self, task_index, keys):
+        if not keys:
+            return None, False
+        with self.lock:
+            for key in keys:
+                place_key = self.place_keys.get(key)
+                if place_key:
+                    self.add_keys(place_key, keys)
+                    self.add_appearance(place_key, task_index)
+                    self.duplicates += 1
+                    return place_key, True
+            place_key = keys[0]
+            self.in_flight[place_key] = task_index
+            self.add_keys(place_key, keys)
+            self.add_appearance(place_key, task_index)
+            return place_key, False
+
+    def add_keys(self, place_key, keys):
+        for key in keys:
+            if key not in self.place_keys:
+                self.place_keys[key] = place_key
+                self.unsaved.setdefault(place_key, []).append(key)
+
+    def add_appearance(self, place_key, task_index):
+        task_indices = self.appearances.setdefault(place_key, [])
+        if task_index not in task_indices:
+            task_indices.append(task_index)
+
+    def forget(self, place_key):
+        # Only a place that was never journaled is forgotten, so nothing on disk refers to it yet; the
+        # appearances other tasks journaled for it stay for whichever task scrapes it next
+        for key in [key for key, value in self.place_keys.items() if value == place_key]:
+            del self.place_keys[key]
+        self.unsaved.pop(place_key, None)
+        self.in_flight.pop(place_key, None)
+        self.appearances.pop(place_key, None)
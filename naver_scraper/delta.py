@@ -0,0 +1,242 @@
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from naver_scraper.cache import DEFAULT_CACHE_DIR
+from naver_scraper.dedup import lookup_keys, normalize_text
+
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+CHANGE_HEADERS = ["Task Address", "Search Query", "Change", "Restaurant Name", "Category", "Rank",
+                  "Previous Name", "Previous Category", "Previous Rank", "Place ID"]
+
+
+def task_identity(task):
+    # The same search of the same area, whatever its position in the task file or its restaurant count
+    payload = json.dumps([task.address, task.search_query, task.zoom_level, task.tiles], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def listing_key(entry):
+    # Identity of a list entry from what the list shows: the place id, else name + short address, else the
+    # name alone (within one task's list a name rarely repeats without an address to tell them apart)
+    keys = lookup_keys(entry.place_id, entry.name, entry.address)
+    return keys[0] if keys else f"name:{normalize_text(entry.name)}"
+
+
+class Listing:
+    def __init__(self, rank, name, category, place_id, record, seen_run):
+        self.rank = rank
+        self.name = name
+        self.category = category
+        self.place_id = place_id
+        self.record = record
+        self.seen_run = seen_run
+
+    def matches(self, entry):
+        # The list fingerprint: a place whose name and category are unchanged is assumed unchanged.
+        # Its rank is reported but not compared, or one new place would shift every place below it.
+        return (normalize_text(self.name) == normalize_text(entry.name)
+                and normalize_text(self.category) == normalize_text(entry.category))
+
+
+class DeltaStore:
+    # Result lists of earlier runs, per task: for every place its list fingerprint (name, category, rank)
+    # and the record scraped for it. A delta run reuses the record of every place whose fingerprint is
+    # unchanged and only scrapes new or changed places; additions, changes and removals are logged as
+    # changes of the run. A run stays open until its task completes, so a stopped and resumed run is
+    # compared as one.
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_CACHE_DIR, 'listings.sqlite')
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                task_id TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                run INTEGER NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS listings (
+                task_id TEXT NOT NULL,
+                listing_key TEXT NOT NULL,
+                rank INTEGER,
+                name TEXT,
+                category TEXT,
+                place_id TEXT,
+                record TEXT,
+                seen_run INTEGER NOT NULL,
+                PRIMARY KEY (task_id, listing_key)
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                task_id TEXT NOT NULL,
+                run INTEGER NOT NULL,
+                listing_key TEXT NOT NULL,
+                change TEXT NOT NULL,
+                name TEXT,
+                category TEXT,
+                rank INTEGER,
+                previous_name TEXT,
+                previous_category TEXT,
+                previous_rank INTEGER,
+                place_id TEXT,
+                PRIMARY KEY (task_id, run, listing_key)
+            );
+        """)
+
+    def task_view(self, task):
+        return TaskDelta(self, task)
+
+    def begin(self, task_id, task):
+        # Opens a run of the task, or continues the one a stopped run left open. Returns (run, has_baseline):
+        # has_baseline is False until the task has completed once, so its first run reports no additions.
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                row = self.conn.execute("SELECT run, completed FROM runs WHERE task_id = ?", (task_id,)).fetchone()
+                if row is None:
+                    run = 1
+                    self.conn.execute("INSERT INTO runs (task_id, task, run, updated_at) VALUES (?, ?, ?, ?)",
+                                      (task_id, json.dumps(task.to_dict(), ensure_ascii=False), run, now))
+                elif row[1]:
+                    run = row[0] + 1
+                    self.conn.execute("UPDATE runs SET run = ?, completed = 0, updated_at = ? WHERE task_id = ?",
+                                      (run, now, task_id))
+                    self.conn.execute("DELETE FROM changes WHERE task_id = ? AND run < ?", (task_id, run - 1))
+                else:
+                    run = row[0]
+        return run, run > 1
+
+    def load(self, task_id):
+        with self.lock:
+            rows = self.conn.execute("SELECT listing_key, rank, name, category, place_id, record, seen_run "
+                                     "FROM listings WHERE task_id = ?", (task_id,)).fetchall()
+        return {row[0]: Listing(*row[1:]) for row in rows}
+
+    def save(self, task_id, run, key, entry, record, change=None, previous=None):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.execute("INSERT OR REPLACE INTO listings (task_id, listing_key, rank, name, category, "
+                                  "place_id, record, seen_run) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (task_id, key, entry.index, entry.name, entry.category, entry.place_id, record,
+                                   run))
+                if change:
+                    self.conn.execute("INSERT OR REPLACE INTO changes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                      (task_id, run, key, change, entry.name, entry.category, entry.index,
+                                       previous.name if previous else None, previous.category if previous else None,
+                                       previous.rank if previous else None, entry.place_id))
+
+    def complete(self, task_id, run):
+        # Places of earlier runs that this run's list no longer showed are removed. Returns the number of
+        # changes of the run by kind, including those recorded before a stop and resume.
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                gone = self.conn.execute("SELECT listing_key, rank, name, category, place_id FROM listings "
+                                         "WHERE task_id = ? AND seen_run < ?", (task_id, run)).fetchall()
+                self.conn.executemany("INSERT OR REPLACE INTO changes (task_id, run, listing_key, change, "
+                                      "previous_name, previous_category, previous_rank, place_id) "
+                                      "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                      [(task_id, run, key, REMOVED, name, category, rank, place_id)
+                                       for key, rank, name, category, place_id in gone])
+                self.conn.execute("DELETE FROM listings WHERE task_id = ? AND seen_run < ?", (task_id, run))
+                self.conn.execute("UPDATE runs SET completed = 1, updated_at = ? WHERE task_id = ?",
+                                  (time.time(), task_id))
+                counts = dict(self.conn.execute("SELECT change, COUNT(*) FROM changes WHERE task_id = ? AND run = ? "
+                                                "GROUP BY change", (task_id, run)))
+        return counts
+
+    def changes(self, task):
+        # Changes of the task's latest run, in list order with removals last
+        with self.lock:
+            return self.conn.execute(
+                "SELECT c.change, c.name, c.category, c.rank, c.previous_name, c.previous_category, "
+                "c.previous_rank, c.place_id FROM changes c JOIN runs r ON r.task_id = c.task_id AND r.run = c.run "
+                "WHERE c.task_id = ? ORDER BY c.change = 'removed', COALESCE(c.rank, c.previous_rank)",
+                (task_identity(task),)).fetchall()
+
+    def write_report(self, path, tasks):
+        # CSV of the additions, changes and removals of each task's latest run; returns the number of rows
+        rows = 0
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(CHANGE_HEADERS)
+            for task in tasks:
+                for change in self.changes(task):
+                    writer.writerow([task.address, task.search_query] + ["" if value is None else value
+                                                                         for value in change])
+                    rows += 1
+        return rows
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class TaskDelta:
+    # One task's side of a delta run, used by its engine (and its tile workers) while scraping
+    def __init__(self, store, task):
+        self.store = store
+        self.task_id = task_identity(task)
+        self.run, self.has_baseline = store.begin(self.task_id, task)
+        self.previous = store.load(self.task_id)
+        self.lock = threading.Lock()
+        self.counts = {'reused': 0, ADDED: 0, CHANGED: 0, REMOVED: 0}
+
+    def unchanged_record(self, entry):
+        # The record of the previous run for an entry whose fingerprint is unchanged, or None to scrape it
+        entry.listing_key = listing_key(entry)
+        listing = self.previous.get(entry.listing_key)
+        if listing is None or listing.record is None or not listing.matches(entry):
+            return None
+        with self.lock:
+            self.counts['reused'] += 1
+        return json.loads(listing.record)
+
+    def seen(self, entry, restaurant_info=None):
+        # Called for every entry the list showed; restaurant_info is None if there is no record of this
+        # task for it (a duplicate of another task's place, or a failed scrape)
+        key = entry.listing_key or listing_key(entry)
+        listing = self.previous.get(key)
+        change = None
+        if listing is None:
+            change = ADDED if self.has_baseline else None
+        elif not listing.matches(entry):
+            change = CHANGED
+        if restaurant_info:
+            record = json.dumps(restaurant_info, ensure_ascii=False)
+        else:
+            record = listing.record if listing and listing.matches(entry) else None
+        self.store.save(self.task_id, self.run, key, entry, record, change, listing)
+        if change:
+            with self.lock:
+                self.counts[change] += 1
+
+    def complete(self):
+        counts = self.store.complete(self.task_id, self.run)
+        with self.lock:
+            for change in (ADDED, CHANGED, REMOVED):
+                self.counts[change] = counts.get(change, 0)
+        return self.describe()
+
+    def describe(self):
+        with self.lock:
+            counts = dict(self.counts)
+        if not self.has_baseline:
+            return "first run, its list is the baseline for the next one"
+        return (f"{counts[ADDED]} new, {counts[CHANGED]} changed, {counts[REMOVED]} removed; "
+                f"{counts['reused']} unchanged places not scraped again")
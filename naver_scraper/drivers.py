@@ -0,0 +1,218 @@
+import logging
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+from naver_scraper.scraping import setup_driver
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def browser_rss(driver):
+    # Resident memory of chromedriver and every Chrome process under it, in bytes (None if unknown)
+    if psutil is None:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+    except (psutil.Error, AttributeError):
+        return None
+
+
+def run_with_timeout(function, timeout):
+    # Runs function in a daemon thread; returns (finished, result). A hung WebDriver call can't be
+    # interrupted, so the thread is simply abandoned.
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = function()
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return False, None
+    return 'error' not in outcome, outcome.get('result')
+
+
+def kill_driver(driver, timeout=10):
+    # quit() politely, and kill the process tree if the browser doesn't answer
+    finished, _ = run_with_timeout(driver.quit, timeout)
+    if finished:
+        return
+    logging.warning("Browser did not quit in time; killing it")
+    try:
+        process = driver.service.process
+        if psutil is not None:
+            for child in psutil.Process(process.pid).children(recursive=True):
+                child.kill()
+        process.kill()
+    except Exception as e:
+        logging.error(f"Could not kill the browser: {e}")
+
+
+class DriverStats:
+    def __init__(self):
+        self.pages = 0
+
+
+class DriverPool:
+    # Hands out warm Chrome instances to tasks instead of starting one per task. Up to size drivers
+    # serve tasks, plus spares launched in the background so a task or a recycled browser can be
+    # replaced without waiting for Chrome to start. A driver is recycled once it has served
+    # max_pages pages or its process tree exceeds max_rss_mb, and is health-checked before each
+    # hand-out; unresponsive ones are killed and replaced.
+    def __init__(self, size=1, headless=False, spares=1, max_pages=300, max_rss_mb=1500, rss_check_interval=20,
+                 health_timeout=10, prewarm=True, lean=False):
+        self.size = size + spares
+        self.headless = headless
+        self.lean = lean
+        self.max_pages = max_pages
+        self.max_rss = max_rss_mb * 2**20 if max_rss_mb else None
+        self.rss_check_interval = rss_check_interval
+        self.health_timeout = health_timeout
+        self.condition = threading.Condition()
+        self.idle = []
+        self.in_use = set()
+        self.stats = {}
+        self.pending = 0
+        self.closed = False
+        if self.max_rss and psutil is None:
+            logging.info("psutil is not installed; browsers are only recycled by page count")
+        if prewarm:
+            self.prewarm(self.size)
+
+    def total(self):
+        return len(self.idle) + len(self.in_use) + self.pending
+
+    def prewarm(self, count):
+        # Launch up to count drivers in the background, within the pool's capacity
+        for _ in range(count):
+            with self.condition:
+                if self.closed or self.total() >= self.size:
+                    return
+                self.pending += 1
+            threading.Thread(target=self.launch, kwargs={'idle': True}, daemon=True).start()
+
+    def launch(self, idle=False):
+        try:
+            driver = setup_driver(headless=self.headless, lean=self.lean)
+        except Exception as e:
+            with self.condition:
+                self.pending -= 1
+                self.condition.notify_all()
+            if idle:
+                logging.error(f"Could not start a browser for the pool: {e}")
+                return None
+            raise
+        with self.condition:
+            self.pending -= 1
+            self.stats[driver] = DriverStats()
+            if self.closed:
+                closed = True
+            else:
+                closed = False
+                (self.idle.append if idle else self.in_use.add)(driver)
+            self.condition.notify_all()
+        if closed:
+            kill_driver(driver)
+            if not idle:
+                raise RuntimeError("Driver pool is closed")
+            return None
+        return driver
+
+    def acquire(self):
+        while True:
+            with self.condition:
+                while not self.idle and self.total() >= self.size and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self.idle:
+                    driver = self.idle.pop()
+                    self.in_use.add(driver)
+                else:
+                    driver = None
+                    self.pending += 1
+            if driver is None:
+                driver = self.launch()
+                self.prewarm(self.size)
+                return driver
+            if self.is_healthy(driver):
+                self.prewarm(self.size)
+                return driver
+            logging.warning("Replacing an unresponsive browser")
+            self.discard(driver)
+
+    def is_healthy(self, driver):
+        finished, result = run_with_timeout(lambda: driver.execute_script("return 1;"), self.health_timeout)
+        return finished and result == 1
+
+    def page_done(self, driver):
+        # Called after each page a task handled in this driver; True once the driver should be recycled
+        stats = self.stats.get(driver)
+        if stats is None:
+            return False
+        stats.pages += 1
+        if self.max_pages and stats.pages >= self.max_pages:
+            logging.info(f"Browser served {stats.pages} pages; recycling it")
+            return True
+        if self.max_rss and stats.pages % self.rss_check_interval == 0:
+            rss = browser_rss(driver)
+            if rss and rss > self.max_rss:
+                logging.info(f"Browser uses {rss / 2**20:.0f} MiB after {stats.pages} pages; recycling it")
+                return True
+        return False
+
+    def recycle(self, driver):
+        # Swap a driver for a fresh one in the middle of a task
+        self.discard(driver)
+        return self.acquire()
+
+    def release(self, driver, broken=False):
+        if driver is None:
+            return
+        if not broken and not self.closed:
+            try:
+                # Drop the map and its listeners so an idle browser doesn't keep using CPU and memory
+                driver.switch_to.default_content()
+                driver.get("about:blank")
+            except WebDriverException:
+                broken = True
+        stats = self.stats.get(driver)
+        worn_out = stats is not None and self.max_pages and stats.pages >= self.max_pages
+        if broken or worn_out or self.closed:
+            self.discard(driver)
+            self.prewarm(1)
+            return
+        with self.condition:
+            self.in_use.discard(driver)
+            self.idle.append(driver)
+            self.condition.notify_all()
+
+    def discard(self, driver):
+        with self.condition:
+            self.in_use.discard(driver)
+            self.stats.pop(driver, None)
+            self.condition.notify_all()
+        kill_driver(driver)
+
+    def close(self, kill_in_use=False):
+        # Quits idle drivers now; drivers still in use are quit when they are released, or killed right
+        # away with kill_in_use (whatever command their task is blocked in then fails)
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            in_use = list(self.in_use) if kill_in_use else []
+            self.condition.notify_all()
+        for driver in idle:
+            self.stats.pop(driver, None)
+            kill_driver(driver)
+        for driver in in_use:
+            kill_driver(driver, timeout=2)
@@ -0,0 +1,502 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from naver_scraper.dedup import DedupIndex
+from naver_scraper.lean import TrafficStats
+from naver_scraper.metrics import NO_METRICS, task_label
+from naver_scraper.scraping import (NAVER_MAP_URL, setup_driver, search_area, iter_list_entries, scrape_entry_detail,
+                                    locate_address, open_search_at, pace, prepare_entry_detail, zoom_offset)
+from naver_scraper.tabs import DetailTabs
+from naver_scraper.tiling import LIST_RESULT_CAP, TileQueue, tile_grid
+from naver_scraper.waits import DEFAULT_WAIT_POLICY, ScrapeCancelled
+
+# The performance log grows until it is read, so a lean task reads it every this many entries
+TRAFFIC_COLLECT_INTERVAL = 20
+
+# Stands in for the restaurant_info of an entry skipped as already scraped
+DUPLICATE = object()
+
+
+class ScrapeEngine:
+    # Scrapes one ScrapingTask in its own browser. Progress, records and the final status are reported
+    # through plain callbacks so the same pipeline backs the GUI threads, the CLI and library callers.
+    # With a journal, every record is persisted before it is reported and already finished list
+    # indices of the task are skipped. With a dedup index shared between engines, places another task
+    # already claimed are skipped before they are clicked. With a geocode cache, an address searched
+    # before is opened directly at its map position. With a driver pool the browser is borrowed
+    # from it, and swapped for a fresh one mid-task when the pool says it is worn out. A lean browser
+    # (lean=True, or a lean pool) doesn't load images, fonts, map tiles or trackers; its traffic is
+    # logged and counted per task. Tasks with tiles > 1 are searched tile by tile (see scrape_tiles).
+    # With detail_tabs > 0 an untiled task loads detail pages in that many extra tabs (see DetailTabs).
+    # With a delta store, places whose list entry looks as in the task's previous run keep their
+    # previous record instead of being scraped again, and the run's changes are recorded (see DeltaStore).
+    def __init__(self, task, wait_policy=DEFAULT_WAIT_POLICY, http_fetcher=None, headless=False,
+                 on_progress=None, on_data=None, on_complete=None, journal=None, task_index=0, place_cache=None,
+                 dedup=None, map_url=NAVER_MAP_URL, metrics=None, driver_pool=None, lean=False, geocode_cache=None,
+                 tile_workers=1, detail_tabs=0, delta=None):
+        self.task = task
+        self.delta = delta
+        self.delta_view = None
+        self.detail_tabs = detail_tabs
+        self.tile_workers = max(1, tile_workers)
+        self.tiles = None
+        self.tile_lock = threading.Lock()
+        self.next_index = 0
+        self.tile_records = 0
+        self.geocode_cache = geocode_cache
+        self.lean = lean or bool(driver_pool and driver_pool.lean)
+        self.driver_pool = driver_pool
+        self.metrics = metrics.task_view(task_label(task_index, task)) if metrics else NO_METRICS
+        self.dedup = dedup
+        # Overridden by the benchmarks to point at the local fixture site
+        self.map_url = map_url
+        self.place_cache = place_cache
+        self.task_index = task_index
+        self.journal = journal
+        self.journal_key = None
+        # stop() sets the event, which ends any wait or sleep the engine is in (see WaitPolicy.bound_to)
+        self.stop_event = threading.Event()
+        self.wait_policy = wait_policy.bound_to(self.stop_event)
+        self.http_fetcher = http_fetcher
+        self.headless = headless
+        self.on_progress = on_progress or (lambda progress: None)
+        self.on_data = on_data or (lambda restaurant_info: None)
+        self.on_complete = on_complete or (lambda message: None)
+        self.stop_flag = False
+
+    def run(self):
+        task = self.task
+        resume_from = 0
+        if self.journal:
+            self.journal_key, resume_from, completed = self.journal.start_task(self.task_index, task)
+            if completed:
+                self.on_progress(100)
+                self.on_complete("Already completed in a previous run")
+                return
+            if resume_from:
+                logging.info(f"Resuming {task.address} after restaurant {resume_from}")
+                self.on_progress(int((resume_from / task.num_restaurants) * 100))
+        cache_view = self.place_cache.task_view() if self.place_cache else None
+        if self.delta:
+            self.delta_view = self.delta.task_view(task)
+        try:
+            if task.tiles > 1:
+                self.scrape_tiles(resume_from, cache_view)
+            else:
+                self.scrape_list(resume_from, cache_view)
+            if self.stop_flag:
+                self.on_complete("Scraping stopped by user")
+            else:
+                if self.journal:
+                    self.journal.complete_task(self.journal_key)
+                if self.delta_view:
+                    logging.info(f"Changes in {task.address} - {task.search_query}: {self.delta_view.complete()}")
+                self.on_complete("Scraping completed successfully!")
+        except ScrapeCancelled:
+            self.on_complete("Scraping stopped by user")
+        except Exception as e:
+            self.on_complete(f"An error occurred: {str(e)}")
+        finally:
+            if self.dedup:
+                # Places claimed by entries that never got a record (stopped mid-entry, pending detail tabs,
+                # an abandoned tile) are left for a resumed run or another task to scrape
+                released = self.dedup.release_task(self.task_index)
+                if released:
+                    logging.info(f"Released {released} unfinished places of {task.address}")
+            if cache_view:
+                logging.info(f"Place cache for {task.address} - {task.search_query}: "
+                             f"{cache_view.hits} hits, {cache_view.misses} misses")
+
+    def scrape_list(self, resume_from, cache_view):
+        # The task's area as one search: the first num_restaurants entries of its result list
+        task = self.task
+        wait = self.wait_policy
+        driver = None
+        broken = False
+        traffic = TrafficStats() if self.lean else None
+        tabs = None
+        try:
+            driver = self.acquire_driver(traffic)
+            tabs = self.open_detail_tabs(driver, cache_view)
+            scraped_count = resume_from
+            while True:
+                search_area(driver, task.address, task.search_query, task.zoom_level, wait, self.map_url,
+                            self.metrics, self.geocode_cache)
+                recycle = False
+                for entry in iter_list_entries(driver, task.num_restaurants, wait, self.metrics):
+                    if self.stop_flag:
+                        break
+                    if entry.index <= scraped_count:
+                        continue
+                    self.process_entry(driver, entry, cache_view, tabs)
+                    if wait.restaurant_delay:
+                        wait.sleep(wait.restaurant_delay)
+                    scraped_count = entry.index
+                    progress = int((entry.index / task.num_restaurants) * 100)
+                    self.on_progress(progress)
+                    if traffic and entry.index % TRAFFIC_COLLECT_INTERVAL == 0:
+                        traffic.collect(driver)
+                    if self.driver_pool and self.driver_pool.page_done(driver) \
+                            and scraped_count < task.num_restaurants:
+                        recycle = True
+                        break
+                if tabs:
+                    self.finish_entries(tabs.drain())
+                if not recycle:
+                    break
+                # A fresh browser has to search again; the entries done so far are skipped like on resume
+                logging.info(f"Switching to a fresh browser for {task.address} after restaurant {scraped_count}")
+                if tabs:
+                    tabs.close()
+                    tabs = None
+                old_driver, driver = driver, None
+                driver = self.recycle_driver(old_driver, traffic)
+                tabs = self.open_detail_tabs(driver, cache_view)
+            if scraped_count < task.num_restaurants and not self.stop_flag:
+                logging.info(f"Result list for {task.address} ended after {scraped_count} restaurants")
+        except ScrapeCancelled:
+            # Stopped inside a wait; the browser is fine. Entries whose tabs already loaded are kept, the
+            # rest is scraped again on resume.
+            if tabs:
+                self.finish_entries(tabs.poll())
+            raise
+        except Exception:
+            broken = True
+            raise
+        finally:
+            if tabs:
+                tabs.close()
+            self.release_driver(driver, broken, traffic)
+
+    def open_detail_tabs(self, driver, cache_view):
+        if not self.detail_tabs:
+            return None
+        return DetailTabs(driver, self.detail_tabs, self.wait_policy, self.metrics, self.lean, cache_view)
+
+    def scrape_tiles(self, resume_from, cache_view):
+        # Tiling mode: the task's viewport is split into a tiles x tiles grid searched one tile at a time,
+        # so an area can yield more places than one result list holds. A tile whose list hits the result
+        # cap is split into quarters. Up to tile_workers browsers search tiles at once (the task's own
+        # plus helper threads), and places listed by several tiles are scraped once through the dedup
+        # index. Records are numbered in the order they are scraped, continuing after a resumed run's.
+        # Tiles already keep several browsers busy, so they don't use detail tabs.
+        task = self.task
+        if self.dedup is None:
+            self.dedup = DedupIndex(self.journal)
+        driver = None
+        broken = False
+        traffic = TrafficStats() if self.lean else None
+        helpers = []
+        try:
+            driver = self.acquire_driver(traffic)
+            position = locate_address(driver, task.address, self.wait_policy, self.map_url, self.metrics,
+                                      self.geocode_cache)
+            if position is None:
+                logging.warning(f"No map position for {task.address}, so it can't be tiled; "
+                                f"scraping it as a single search")
+                self.release_driver(driver, False, traffic)
+                driver = None
+                self.scrape_list(resume_from, cache_view)
+                return
+            x, y, zoom = position
+            tiles = tile_grid((x, y, zoom + zoom_offset(task.zoom_level)), task.tiles)
+            self.tiles = TileQueue(tiles)
+            self.next_index = resume_from
+            self.tile_records = self.journal.count_records(self.journal_key) if self.journal else 0
+            for _ in range(min(self.tile_workers, len(tiles)) - 1):
+                helper = threading.Thread(target=self.tile_worker, args=(cache_view,), daemon=True)
+                helper.start()
+                helpers.append(helper)
+            driver = self.tile_worker(cache_view, driver, traffic)
+        except ScrapeCancelled:
+            raise
+        except Exception:
+            broken = True
+            raise
+        finally:
+            # Helpers may be waiting for a browser from the pool; hand this one back before waiting for them
+            self.release_driver(driver, broken, traffic)
+            if self.tiles:
+                self.tiles.close()
+            for helper in helpers:
+                helper.join()
+        logging.info(f"Tiles for {task.address} - {task.search_query}: {self.tiles.searched} searched, "
+                     f"{self.tiles.splits} split, {self.tile_records} restaurants")
+
+    def tile_worker(self, cache_view, driver=None, traffic=None):
+        # Searches tiles off the task's queue until none are left. Helper threads start without a browser
+        # and borrow one before taking a tile, so no tile waits on a browser while others wait on the tile.
+        # Returns the driver held at the end (the caller's, or a replacement of it).
+        helper = driver is None
+        if helper:
+            traffic = TrafficStats() if self.lean else None
+        try:
+            while not self.tiles.finished():
+                if driver is None:
+                    driver = self.acquire_driver(traffic)
+                tile = self.tiles.take()
+                if tile is None:
+                    break
+                try:
+                    worn_out = self.scrape_tile(driver, tile, cache_view, traffic)
+                except ScrapeCancelled:
+                    break
+                except Exception as e:
+                    logging.error(f"Tile {tile.label} of {self.task.address} failed: {e}")
+                    self.metrics.count('failed tiles')
+                    old_driver, driver = driver, None
+                    self.release_driver(old_driver, True)
+                    worn_out = False
+                finally:
+                    self.tiles.done()
+                if worn_out:
+                    old_driver, driver = driver, None
+                    driver = self.recycle_driver(old_driver, traffic)
+        except Exception as e:
+            if not helper:
+                raise
+            logging.error(f"Tile worker for {self.task.address} stopped: {e}")
+        if helper:
+            self.release_driver(driver, False, traffic)
+            return None
+        return driver
+
+    def scrape_tile(self, driver, tile, cache_view, traffic):
+        # Lists one tile and scrapes the places no other tile has claimed; returns True if the pool wants
+        # the driver recycled
+        task = self.task
+        wait = self.wait_policy
+        pace(wait, self.metrics)
+        with self.metrics.span('query'):
+            listed_any = open_search_at(driver, task.search_query, tile.position, wait, self.map_url,
+                                        timeout=wait.element_timeout)
+        if not listed_any:
+            logging.info(f"No results in tile {tile.label} of {task.address}")
+            return False
+        listed = 0
+        worn_out = False
+        for entry in iter_list_entries(driver, LIST_RESULT_CAP, wait, self.metrics):
+            if self.stop_flag or self.tiles.closed:
+                return worn_out
+            listed += 1
+            entry.index = self.take_entry_index()
+            self.process_entry(driver, entry, cache_view)
+            if wait.restaurant_delay:
+                wait.sleep(wait.restaurant_delay)
+            if traffic and listed % TRAFFIC_COLLECT_INTERVAL == 0:
+                traffic.collect(driver)
+            if self.driver_pool and self.driver_pool.page_done(driver):
+                worn_out = True
+        if listed >= LIST_RESULT_CAP:
+            if tile.can_split():
+                logging.info(f"Tile {tile.label} of {task.address} hit the {LIST_RESULT_CAP} result cap; "
+                             f"splitting it")
+                self.tiles.split(tile)
+            else:
+                logging.warning(f"Tile {tile.label} of {task.address} still hits the result cap at the "
+                                f"smallest tile size; some places may be missing")
+        return worn_out
+
+    def take_entry_index(self):
+        with self.tile_lock:
+            self.next_index += 1
+            return self.next_index
+
+    def add_tile_record(self):
+        task = self.task
+        with self.tile_lock:
+            self.tile_records += 1
+            records = self.tile_records
+        self.on_progress(min(100, int((records / task.num_restaurants) * 100)))
+        if records >= task.num_restaurants:
+            self.tiles.close()
+
+    def acquire_driver(self, traffic=None):
+        with self.metrics.span('driver startup'):
+            if self.driver_pool:
+                driver = self.driver_pool.acquire()
+            else:
+                driver = setup_driver(headless=self.headless, lean=self.lean)
+        if traffic:
+            traffic.drain(driver)
+        return driver
+
+    def recycle_driver(self, driver, traffic=None):
+        if traffic:
+            traffic.collect(driver)
+        with self.metrics.span('driver startup'):
+            driver = self.driver_pool.recycle(driver)
+        if traffic:
+            traffic.drain(driver)
+        return driver
+
+    def release_driver(self, driver, broken, traffic=None):
+        task = self.task
+        if traffic and driver and not broken:
+            traffic.collect(driver)
+            logging.info(f"Traffic for {task.address} - {task.search_query}: {traffic.describe()}")
+            traffic.record(self.metrics)
+        if self.driver_pool:
+            self.driver_pool.release(driver, broken)
+        elif driver:
+            driver.quit()
+
+    def process_entry(self, driver, entry, cache_view, tabs=None):
+        # With detail tabs the entry is only clicked here; it is finished once its tab has loaded and every
+        # earlier entry is finished, so records still reach the journal in list order
+        if self.dedup:
+            entry.place_key, duplicate = self.dedup.claim(self.task_index, entry)
+            if duplicate:
+                logging.info(f"Skipping {entry.name}: already scraped")
+                self.finish_entries(tabs.complete(entry, DUPLICATE) if tabs else [(entry, DUPLICATE)])
+                return
+        if self.delta_view:
+            restaurant_info = self.delta_view.unchanged_record(entry)
+            if restaurant_info:
+                self.metrics.count('delta unchanged')
+                self.finish_entries(tabs.complete(entry, restaurant_info) if tabs else [(entry, restaurant_info)])
+                return
+        if tabs:
+            restaurant_info, url = prepare_entry_detail(driver, entry, self.http_fetcher, self.wait_policy,
+                                                        cache_view, self.metrics)
+            self.finish_entries(tabs.submit(entry, url) if url else tabs.complete(entry, restaurant_info))
+            return
+        restaurant_info = scrape_entry_detail(driver, entry, self.http_fetcher, self.wait_policy, cache_view,
+                                              self.metrics)
+        self.finish_entries([(entry, restaurant_info)])
+
+    def finish_entries(self, finished):
+        for entry, restaurant_info in finished:
+            self.finish_entry(entry, restaurant_info)
+
+    def finish_entry(self, entry, restaurant_info):
+        place_key = entry.place_key
+        if restaurant_info is DUPLICATE:
+            self.metrics.count('duplicates')
+            self.record_appearance(place_key, entry)
+            self.list_seen(entry)
+            return
+        if not restaurant_info:
+            self.list_seen(entry)
+            self.metrics.count('failed')
+            if self.dedup:
+                self.dedup.release(place_key)
+            if self.journal:
+                self.journal.mark_progress(self.journal_key, entry.index)
+            return
+        if self.dedup:
+            # The click may have revealed a place id the list entry didn't show
+            place_key, duplicate = self.dedup.confirm(self.task_index, place_key, entry, restaurant_info)
+            if duplicate:
+                logging.info(f"{entry.name} turned out to be already scraped")
+                self.metrics.count('duplicates')
+                self.record_appearance(place_key, entry)
+                self.list_seen(entry)
+                return
+        lookup_keys = self.dedup.commit(place_key) if self.dedup else []
+        if self.journal:
+            self.journal.record(self.journal_key, entry.index, restaurant_info, place_key, lookup_keys)
+        self.list_seen(entry, restaurant_info)
+        self.metrics.count('scraped')
+        self.on_data(restaurant_info)
+        if self.tiles:
+            self.add_tile_record()
+
+    def list_seen(self, entry, restaurant_info=None):
+        if self.delta_view:
+            self.delta_view.seen(entry, restaurant_info)
+
+    def record_appearance(self, place_key, entry):
+        if self.journal:
+            lookup_keys = self.dedup.learned_keys(place_key) if self.dedup else []
+            self.journal.add_appearance(place_key, self.journal_key, entry.index, lookup_keys)
+
+    def stop(self):
+        self.stop_flag = True
+        self.stop_event.set()
+        if self.tiles:
+            self.tiles.close()
+
+
+class TaskRunner:
+    # Runs a list of ScrapingTasks on a pool of worker threads, one ScrapeEngine (and browser) per task;
+    # a tiled task searches its tiles with up to max_workers browsers. Callbacks receive the task index
+    # first; they are called from the worker threads. Records are collected in scraped_data only when
+    # no journal is given; otherwise they live in the journal.
+    def __init__(self, tasks, max_workers=1, wait_policy=DEFAULT_WAIT_POLICY, http_fetcher=None, headless=True,
+                 on_progress=None, on_data=None, on_complete=None, journal=None, exporter=None, place_cache=None,
+                 dedup=None, metrics=None, driver_pool=None, lean=False, geocode_cache=None, detail_tabs=0,
+                 delta=None):
+        self.tasks = list(tasks)
+        self.delta = delta
+        self.detail_tabs = detail_tabs
+        self.geocode_cache = geocode_cache
+        self.lean = lean
+        self.driver_pool = driver_pool
+        self.metrics = metrics
+        self.dedup = dedup
+        self.place_cache = place_cache
+        self.journal = journal
+        # Only streaming exporters are fed while scraping; batch ones export from the results afterwards
+        self.exporter = exporter if exporter is not None and exporter.streaming else None
+        self.max_workers = max_workers
+        self.wait_policy = wait_policy
+        self.http_fetcher = http_fetcher
+        self.headless = headless
+        self.on_progress = on_progress or (lambda task_index, progress: None)
+        self.on_data = on_data or (lambda task_index, restaurant_info: None)
+        self.on_complete = on_complete or (lambda task_index, message: None)
+        self.scraped_data = {}
+        self.engines = {}
+        self.lock = threading.Lock()
+        self.stop_flag = False
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for task_index in range(len(self.tasks)):
+                executor.submit(self.run_task, task_index)
+        return self.scraped_data
+
+    def run_task(self, task_index):
+        task = self.tasks[task_index]
+        with self.lock:
+            if self.stop_flag:
+                return
+            if not self.journal:
+                self.scraped_data[task_index] = []
+            engine = ScrapeEngine(task, self.wait_policy, self.http_fetcher, self.headless,
+                                  on_progress=lambda progress: self.on_progress(task_index, progress),
+                                  on_data=lambda restaurant_info: self.add_scraped_data(task_index, restaurant_info),
+                                  on_complete=lambda message: self.on_complete(task_index, message),
+                                  journal=self.journal, task_index=task_index, place_cache=self.place_cache,
+                                  dedup=self.dedup, metrics=self.metrics, driver_pool=self.driver_pool,
+                                  lean=self.lean, geocode_cache=self.geocode_cache, tile_workers=self.max_workers,
+                                  detail_tabs=self.detail_tabs, delta=self.delta)
+            self.engines[task_index] = engine
+        logging.info(f"Starting task {task_index + 1}/{len(self.tasks)}: {task.address} - {task.search_query}")
+        if self.exporter:
+            self.exporter.open_task(task_index, task, self.journal.task_records(task_index, task) if self.journal else ())
+        try:
+            engine.run()
+        finally:
+            with self.lock:
+                del self.engines[task_index]
+            if self.exporter:
+                self.exporter.close_task(task_index)
+
+    def add_scraped_data(self, task_index, restaurant_info):
+        if not self.journal:
+            with self.lock:
+                self.scraped_data[task_index].append(restaurant_info)
+        if self.exporter:
+            # Called from inside the engine's run(), so it is still registered
+            with self.engines[task_index].metrics.span('export'):
+                self.exporter.write(task_index, restaurant_info)
+        self.on_data(task_index, restaurant_info)
+
+    def stop(self):
+        with self.lock:
+            self.stop_flag = True
+            for engine in self.engines.values():
+                engine.stop()
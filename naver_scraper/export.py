@@ -0,0 +1,336 @@
+import csv
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import threading
+
+HEADERS = ["Restaurant Name", "Address", "Phone Number"]
+
+# Streaming formats write one file per task, so each row also carries the task it came from
+TASK_HEADERS = ["Task Address", "Search Query"] + HEADERS
+
+# With cross-task dedup a place is stored once; the workbook lists every task it turned up in
+EXCEL_HEADERS = HEADERS + ["Found In"]
+
+# Streaming rows are written before later appearances are known, so those go to a separate file
+APPEARANCE_HEADERS = ["Place Key", "Restaurant Name", "Task Address", "Search Query"]
+
+
+class ColumnWidths:
+    # Running maximum of the rendered length of each column, updated one row at a time
+    def __init__(self, headers=HEADERS):
+        self.headers = headers
+        self.max_lengths = [len(header) for header in headers]
+
+    def update(self, row):
+        for col, value in enumerate(row):
+            length = len(str(value))
+            if length > self.max_lengths[col]:
+                self.max_lengths[col] = length
+
+    def merge(self, max_lengths):
+        for col, length in enumerate(max_lengths):
+            if length and length > self.max_lengths[col]:
+                self.max_lengths[col] = length
+
+    def widths(self):
+        return [(max_length + 2) * 1.2 for max_length in self.max_lengths]
+
+
+def sheet_title_for(task, used_titles=()):
+    # Create a sheet title using address and search query
+    sheet_title = f"{task.address} - {task.search_query}"
+
+    # Excel sheet names are limited to 31 characters
+    if len(sheet_title) > 31:
+        sheet_title = sheet_title[:28] + "..."
+
+    # Truncated titles of different tasks can collide; number them while staying within the limit
+    base_title = sheet_title
+    number = 2
+    while sheet_title.lower() in used_titles:
+        suffix = f" ({number})"
+        sheet_title = base_title[:31 - len(suffix)] + suffix
+        number += 1
+    return sheet_title
+
+
+def record_rows(records, headers=HEADERS):
+    for restaurant in records:
+        yield [restaurant.get(key, "N/A") for key in headers]
+
+
+def save_to_excel(file_path, task_results, headers=HEADERS):
+    # task_results: (task, records) pairs, one sheet per task in the given order. The workbook is
+    # write-only, so rows stream straight to disk and column widths have to be known up front:
+    # journal-backed records report them from the store, in-memory lists are measured in one pass.
+    # openpyxl takes a tenth of a second to import, so only runs that write a workbook load it
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = openpyxl.Workbook(write_only=True)
+    used_titles = set()
+
+    for task, records in task_results:
+        column_widths = ColumnWidths(headers)
+        if hasattr(records, 'column_lengths'):
+            column_widths.merge(records.column_lengths(headers))
+        else:
+            records = list(records)
+            for row in record_rows(records, headers):
+                column_widths.update(row)
+
+        sheet_title = sheet_title_for(task, used_titles)
+        used_titles.add(sheet_title.lower())
+        sheet = workbook.create_sheet(title=sheet_title)
+        for col, width in enumerate(column_widths.widths(), start=1):
+            sheet.column_dimensions[get_column_letter(col)].width = width
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.font = Font(bold=True)
+            header_cells.append(cell)
+        sheet.append(header_cells)
+
+        for row in record_rows(records, headers):
+            sheet.append(row)
+
+    workbook.save(file_path)
+
+
+def task_output_name(task):
+    # File name keyed by the whole task: the address and query as a readable prefix plus a digest of all
+    # its settings, so tasks differing only in zoom, count or tiles, or only after truncation or character
+    # replacement, never share a file. Identical tasks do.
+    label = re.sub(r'[\\/:*?"<>|\s]+', '_', f"{task.address} - {task.search_query}").strip('_.')[:80]
+    payload = json.dumps(task.to_dict(), ensure_ascii=False, sort_keys=True)
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:10]
+    return f"{label}-{digest}"
+
+
+class CsvWriter:
+    # With append, rows go after those of a file written earlier in the run (which has the header)
+    def __init__(self, path, headers=TASK_HEADERS, append=False):
+        if append:
+            self.file = open(path, 'a', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+        else:
+            # utf-8-sig so Excel opens Korean text correctly
+            self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(headers)
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path, headers=TASK_HEADERS, append=False):
+        self.file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self.headers = headers
+
+    def write(self, row):
+        self.file.write(json.dumps(dict(zip(self.headers, row)), ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    # Rows are buffered into row groups; the file is only readable once closed (Parquet footer). A closed
+    # Parquet file can't be appended to, so with append its rows are read back and written out again.
+    def __init__(self, path, headers=TASK_HEADERS, row_group_size=1000, append=False):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(header, pyarrow.string()) for header in headers])
+        existing = pyarrow.parquet.read_table(path, schema=self.schema) if append else None
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        if existing is not None:
+            self.writer.write_table(existing)
+        self.row_group_size = row_group_size
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            columns = [[str(row[col]) for row in self.rows] for col in range(len(self.schema))]
+            self.writer.write_table(self.pyarrow.Table.from_arrays(columns, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class RecordExporter:
+    # Streaming exporter: one output file per task in output_dir, rows appended as they are scraped.
+    # open_task() replays records scraped before (e.g. from a resumed journal) so every file is complete.
+    # Identical tasks share a file; one opened again after an earlier task closed it is appended to, so
+    # nothing written in this run is overwritten.
+    streaming = True
+    extension = None
+    writer_class = None
+    # Optional package the format needs
+    requires = None
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.lock = threading.Lock()
+        self.writers = {}
+        self.open_counts = {}
+        # Files written in this run
+        self.written = set()
+        self.task_names = {}
+        self.tasks = {}
+
+    def describe(self):
+        return self.output_dir
+
+    def prepare(self):
+        # Raises RuntimeError or OSError before a run starts, rather than once its first task has begun
+        check_requirement(self.requires)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def open_task(self, task_index, task, previous_records=()):
+        name = task_output_name(task)
+        with self.lock:
+            # Identical tasks share one file
+            if name not in self.writers:
+                os.makedirs(self.output_dir, exist_ok=True)
+                self.writers[name] = self.writer_class(os.path.join(self.output_dir, f"{name}.{self.extension}"),
+                                                       append=name in self.written)
+                self.written.add(name)
+                self.open_counts[name] = 0
+            self.open_counts[name] += 1
+            self.task_names[task_index] = name
+            self.tasks[task_index] = task
+            writer = self.writers[name]
+            for row in record_rows(previous_records):
+                writer.write([task.address, task.search_query] + row)
+
+    def write(self, task_index, restaurant_info):
+        task = self.tasks[task_index]
+        row = [task.address, task.search_query] + [restaurant_info.get(key, "N/A") for key in HEADERS]
+        with self.lock:
+            self.writers[self.task_names[task_index]].write(row)
+
+    def close_task(self, task_index):
+        with self.lock:
+            name = self.task_names.pop(task_index, None)
+            if name is None:
+                return
+            self.open_counts[name] -= 1
+            if not self.open_counts[name]:
+                self.writers.pop(name).close()
+                del self.open_counts[name]
+
+    def close(self):
+        for task_index in list(self.task_names):
+            self.close_task(task_index)
+
+    def write_appearances(self, appearances):
+        # Places found by more than one task, one row per task, next to the per-task files
+        writer = None
+        for appearance in appearances:
+            if writer is None:
+                os.makedirs(self.output_dir, exist_ok=True)
+                writer = self.writer_class(os.path.join(self.output_dir, f"place_appearances.{self.extension}"),
+                                           APPEARANCE_HEADERS)
+            writer.write([appearance[key] for key in APPEARANCE_HEADERS])
+        if writer is not None:
+            writer.close()
+
+    def export(self, task_results):
+        # Batch use: write already collected (task, records) pairs in one go
+        for task_index, (task, records) in enumerate(task_results):
+            self.open_task(task_index, task, records)
+            self.close_task(task_index)
+
+
+class CsvExporter(RecordExporter):
+    extension = 'csv'
+    writer_class = CsvWriter
+
+
+class JsonlExporter(RecordExporter):
+    extension = 'jsonl'
+    writer_class = JsonlWriter
+
+
+class ParquetExporter(RecordExporter):
+    extension = 'parquet'
+    writer_class = ParquetWriter
+    requires = 'pyarrow'
+
+
+class ExcelExporter:
+    # Excel needs column widths before rows (write-only workbook), so it is written once at the end
+    streaming = False
+    extension = 'xlsx'
+    requires = 'openpyxl'
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def describe(self):
+        return self.file_path
+
+    def prepare(self):
+        check_requirement(self.requires)
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+
+    def write_appearances(self, appearances):
+        # Already part of the workbook as the "Found In" column
+        pass
+
+    def export(self, task_results):
+        save_to_excel(self.file_path, task_results, EXCEL_HEADERS)
+
+
+EXPORTERS = {
+    'xlsx': ExcelExporter,
+    'csv': CsvExporter,
+    'jsonl': JsonlExporter,
+    'parquet': ParquetExporter,
+}
+
+
+def is_installed(package):
+    # Looked up without importing the package, so building a format menu stays cheap
+    return importlib.util.find_spec(package) is not None
+
+
+def missing_requirement(output_format):
+    # The optional package an output format needs if it isn't installed, else None
+    requires = EXPORTERS[output_format].requires
+    return requires if requires and not is_installed(requires) else None
+
+
+def check_requirement(requires):
+    if requires and not is_installed(requires):
+        raise RuntimeError(f"This output format requires {requires} (pip install {requires})")
+
+
+def create_exporter(output_format, file_path):
+    # file_path is the Excel file name; streaming formats write into a directory with the same stem
+    if output_format == 'xlsx':
+        return ExcelExporter(file_path)
+    return EXPORTERS[output_format](os.path.splitext(file_path)[0] + f"_{output_format}")
@@ -0,0 +1,133 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from naver_scraper.metrics import NO_METRICS
+from naver_scraper.parsing import parse_restaurant_detail
+from naver_scraper.ratelimit import CANCEL_CHECK_INTERVAL, NO_RATE_LIMIT, backoff_delay, retry_after_seconds
+from naver_scraper.waits import ScrapeCancelled
+
+PLACE_DETAIL_URL = "https://pcmap.place.naver.com/restaurant/{place_id}/home"
+
+# Statuses of a place page that doesn't exist (anymore); neither a success nor a sign of throttling
+NOT_FOUND_STATUSES = (404, 410)
+
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/127.0.0.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Referer": "https://map.naver.com/",
+}
+
+
+class HttpDetailFetcher:
+    # Fetches place detail documents without a browser. One instance is meant to be shared by all
+    # workers so the connection pool and the concurrency limit apply to the whole run. Requests go
+    # through the run's rate limiter; a 429 pauses it (and so every worker) before the request is retried.
+    # Requests run on the fetcher's own threads, so a caller that is stopped (cancel_event) stops waiting
+    # for one in flight; the abandoned request finishes or times out in the background.
+    def __init__(self, url_template=PLACE_DETAIL_URL, max_connections=8, max_retries=3,
+                 backoff_factor=0.5, timeout=15, headers=None, rate_limiter=None):
+        self.url_template = url_template
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or NO_RATE_LIMIT
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        # urllib3 only retries failed connections and reads; responses with an error status are retried by
+        # fetch_page, where a 429 reaches the rate limiter and the backoff can be cut short by a stop
+        retry = Retry(total=max_retries, backoff_factor=backoff_factor, respect_retry_after_header=False,
+                      allowed_methods=frozenset(['GET']))
+        # pool_block keeps the number of open keep-alive connections at max_connections
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections,
+                              max_retries=retry, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Also limits the requests in flight to max_connections
+        self.requests = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix='http-detail')
+
+    def fetch_page(self, place_id, cancel_event=None):
+        # Raises ScrapeCancelled once cancel_event is set: in the rate limiter's wait (which includes the
+        # pause after a 429), in the backoff after a server error, or while a request is in flight
+        url = self.url_template.format(place_id=place_id)
+        response = None
+        for attempt in range(self.max_retries + 1):
+            if response is not None and response.status_code >= 500:
+                self.pause(backoff_delay(attempt - 1, self.backoff_factor), cancel_event)
+            if self.rate_limiter.acquire(cancel_event) is None:
+                raise ScrapeCancelled()
+            try:
+                response = self.get(url, cancel_event)
+            except requests.RequestException:
+                self.rate_limiter.record_failure()
+                raise
+            if response.status_code == 429:
+                self.rate_limiter.record_failure(throttled=True, retry_after=retry_after_seconds(response))
+            elif response.status_code in NOT_FOUND_STATUSES:
+                self.rate_limiter.record_not_found()
+                break
+            elif response.status_code >= 400:
+                self.rate_limiter.record_failure()
+                # Only server errors are worth retrying
+                if response.status_code < 500:
+                    break
+            else:
+                self.rate_limiter.record_success(response.elapsed.total_seconds())
+                break
+        response.raise_for_status()
+        return response.text
+
+    def get(self, url, cancel_event=None):
+        future = self.requests.submit(self.session.get, url, timeout=self.timeout)
+        if cancel_event is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=CANCEL_CHECK_INTERVAL)
+            except TimeoutError:
+                if cancel_event.is_set():
+                    raise ScrapeCancelled()
+
+    def pause(self, seconds, cancel_event=None):
+        if cancel_event is None:
+            time.sleep(seconds)
+        elif cancel_event.wait(seconds):
+            raise ScrapeCancelled()
+
+    def fetch(self, place_id, cancel_event=None, metrics=NO_METRICS):
+        try:
+            restaurant_info = parse_restaurant_detail(self.fetch_page(place_id, cancel_event))
+        except ScrapeCancelled:
+            raise
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in NOT_FOUND_STATUSES:
+                logging.error(f"An error occurred while fetching place {place_id} over HTTP: {e}")
+                return None
+            logging.warning(f"Place {place_id} was not found over HTTP ({e.response.status_code})")
+            metrics.count('http not found')
+            return None
+        except Exception as e:
+            logging.error(f"An error occurred while fetching place {place_id} over HTTP: {e}")
+            return None
+        if restaurant_info["Restaurant Name"] == "N/A":
+            logging.error(f"Place {place_id} returned a page without restaurant details")
+            return None
+        return restaurant_info
+
+    def fetch_many(self, place_ids):
+        # Yields (place_id, restaurant_info) in input order while up to max_connections requests are in flight
+        place_ids = list(place_ids)
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            yield from zip(place_ids, executor.map(self.fetch, place_ids))
+
+    def close(self):
+        # Requests abandoned by a stop are not waited for
+        self.requests.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# "address - search query" of a task row aliased as t, as shown in the "Found In" column
+TASK_LABEL_SQL = "json_extract(t.task, '$.address') || ' - ' || json_extract(t.task, '$.search_query')"
+
+
+def task_key(task_index, task):
+    # Identifies a task across restarts of the same task list; the position keeps duplicate tasks apart
+    payload = json.dumps([task_index, task.to_dict()], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def remove_journal_files(path):
+    for journal_file in (path, path + '-wal', path + '-shm'):
+        if os.path.exists(journal_file):
+            os.remove(journal_file)
+
+
+class JournalRecords:
+    # Iterable view of one task's records that the exporters can stream without loading them
+    def __init__(self, journal, key):
+        self.journal = journal
+        self.key = key
+
+    def __iter__(self):
+        return self.journal.iter_records(self.key)
+
+    def column_lengths(self, headers):
+        return self.journal.column_lengths(self.key, headers)
+
+
+class ScrapeJournal:
+    # Append-only on-disk record of a run: every scraped record is committed as soon as it arrives,
+    # together with the last list index each task has finished, so a restarted run can resume.
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # Queue workers in other processes may share the journal; their writes hold the lock only briefly
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_key TEXT PRIMARY KEY,
+                task_index INTEGER NOT NULL,
+                task TEXT NOT NULL,
+                last_index INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_key TEXT NOT NULL,
+                entry_index INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                place_key TEXT,
+                UNIQUE (task_key, entry_index)
+            );
+            CREATE TABLE IF NOT EXISTS place_keys (
+                lookup_key TEXT PRIMARY KEY,
+                place_key TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS appearances (
+                place_key TEXT NOT NULL,
+                task_key TEXT NOT NULL,
+                entry_index INTEGER NOT NULL,
+                PRIMARY KEY (place_key, task_key)
+            );
+        """)
+        # Journals written before cross-task dedup lack the place key column
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(records)")]
+        if "place_key" not in columns:
+            self.conn.execute("ALTER TABLE records ADD COLUMN place_key TEXT")
+
+    def start_task(self, task_index, task):
+        # Returns (task_key, last finished index, completed flag), registering the task on first sight
+        key = task_key(task_index, task)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO tasks (task_key, task_index, task, updated_at) VALUES (?, ?, ?, ?)",
+                (key, task_index, json.dumps(task.to_dict(), ensure_ascii=False), time.time()))
+            last_index, completed = self.conn.execute(
+                "SELECT last_index, completed FROM tasks WHERE task_key = ?", (key,)).fetchone()
+        return key, last_index, bool(completed)
+
+    def record(self, key, entry_index, restaurant_info, place_key=None, lookup_keys=()):
+        # The place's lookup keys are written with its record, so the journal never marks a place as
+        # scraped without it
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO records (task_key, entry_index, data, scraped_at, place_key) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, entry_index, json.dumps(restaurant_info, ensure_ascii=False), now, place_key))
+                if place_key:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO appearances (place_key, task_key, entry_index) VALUES (?, ?, ?)",
+                        (place_key, key, entry_index))
+                    self.save_place_keys(lookup_keys, place_key)
+                self.conn.execute(
+                    "UPDATE tasks SET last_index = MAX(last_index, ?), updated_at = ? WHERE task_key = ?",
+                    (entry_index, now, key))
+
+    def mark_progress(self, key, entry_index):
+        # For entries that produced no record (e.g. failed after all retries)
+        with self.lock:
+            self.conn.execute("UPDATE tasks SET last_index = MAX(last_index, ?), updated_at = ? WHERE task_key = ?",
+                              (entry_index, time.time(), key))
+
+    def add_appearance(self, place_key, key, entry_index, lookup_keys=()):
+        # A place another task already scraped: remember that it showed up here instead of storing a copy
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO appearances (place_key, task_key, entry_index) VALUES (?, ?, ?)",
+                    (place_key, key, entry_index))
+                self.save_place_keys(lookup_keys, place_key)
+                self.conn.execute(
+                    "UPDATE tasks SET last_index = MAX(last_index, ?), updated_at = ? WHERE task_key = ?",
+                    (entry_index, now, key))
+
+    def load_place_keys(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT lookup_key, place_key FROM place_keys"))
+
+    def save_place_keys(self, lookup_keys, place_key):
+        # Part of the caller's transaction
+        if lookup_keys:
+            self.conn.executemany("INSERT OR REPLACE INTO place_keys (lookup_key, place_key) VALUES (?, ?)",
+                                  [(lookup_key, place_key) for lookup_key in lookup_keys])
+
+    def complete_task(self, key):
+        with self.lock:
+            self.conn.execute("UPDATE tasks SET completed = 1, updated_at = ? WHERE task_key = ?", (time.time(), key))
+
+    def is_completed(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT completed FROM tasks WHERE task_key = ?", (key,)).fetchone()
+        return bool(row and row[0])
+
+    def incomplete_tasks(self, tasks):
+        keys = [task_key(task_index, task) for task_index, task in enumerate(tasks)]
+        with self.lock:
+            completed = {row[0] for row in self.conn.execute("SELECT task_key FROM tasks WHERE completed = 1")}
+        return [task for key, task in zip(keys, tasks) if key not in completed]
+
+    def has_progress(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM tasks WHERE last_index > 0 OR completed LIMIT 1").fetchone() is not None
+
+    def count_records(self, key):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM records WHERE task_key = ?", (key,)).fetchone()[0]
+
+    def iter_records(self, key, batch_size=500):
+        # Streams a task's records in list order without loading them all at once. Each record carries a
+        # "Found In" field listing every task the place appeared in, its own task first.
+        last_index = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT entry_index, data, place_key FROM records WHERE task_key = ? AND entry_index > ? "
+                    "ORDER BY entry_index LIMIT ?", (key, last_index, batch_size)).fetchall()
+                own_label = self.conn.execute(
+                    f"SELECT {TASK_LABEL_SQL} FROM tasks t WHERE task_key = ?", (key,)).fetchone()
+                place_keys = [place_key for _, _, place_key in rows if place_key]
+                found_in = {}
+                if place_keys:
+                    placeholders = ", ".join("?" for _ in place_keys)
+                    for place_key, label in self.conn.execute(
+                            f"SELECT a.place_key, {TASK_LABEL_SQL} FROM appearances a "
+                            f"JOIN tasks t ON t.task_key = a.task_key WHERE a.place_key IN ({placeholders}) "
+                            f"ORDER BY a.task_key != ?, t.task_index", (*place_keys, key)):
+                        found_in.setdefault(place_key, []).append(label)
+            if not rows:
+                return
+            own_label = own_label[0] if own_label else ""
+            for entry_index, data, place_key in rows:
+                restaurant_info = json.loads(data)
+                restaurant_info["Found In"] = "; ".join(found_in.get(place_key) or [own_label])
+                yield restaurant_info
+            last_index = rows[-1][0]
+
+    def column_lengths(self, key, headers):
+        # Longest value per field, measured inside SQLite so sizing columns doesn't need the rows in Python
+        stored = [header for header in headers if header != "Found In"]
+        columns = ", ".join("MAX(LENGTH(json_extract(data, ?)))" for _ in stored)
+        paths = [f'$."{header}"' for header in stored]
+        with self.lock:
+            lengths = dict(zip(stored, self.conn.execute(f"SELECT {columns} FROM records WHERE task_key = ?",
+                                                         (*paths, key)).fetchone())) if stored else {}
+            if "Found In" in headers:
+                lengths["Found In"] = self.conn.execute(
+                    f"SELECT MAX(length) FROM (SELECT SUM(LENGTH({TASK_LABEL_SQL})) + 2 * (COUNT(*) - 1) AS length "
+                    f"FROM records r JOIN appearances a ON a.place_key = r.place_key "
+                    f"JOIN tasks t ON t.task_key = a.task_key WHERE r.task_key = ? GROUP BY r.id "
+                    f"UNION ALL SELECT LENGTH({TASK_LABEL_SQL}) FROM tasks t WHERE t.task_key = ?)",
+                    (key, key)).fetchone()[0]
+        return [lengths[header] for header in headers]
+
+    def iter_appearances(self):
+        # (place key, restaurant name, task) rows for every place seen in more than one task, for outputs
+        # whose rows were already written before the later appearances were known
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT a.place_key, json_extract(r.data, '$.\"Restaurant Name\"'), t.task FROM appearances a "
+                "JOIN tasks t ON t.task_key = a.task_key "
+                "JOIN records r ON r.place_key = a.place_key "
+                "WHERE a.place_key IN (SELECT place_key FROM appearances GROUP BY place_key HAVING COUNT(*) > 1) "
+                "ORDER BY a.place_key, t.task_index").fetchall()
+        for place_key, name, task in rows:
+            task = json.loads(task)
+            yield {"Place Key": place_key, "Restaurant Name": name,
+                   "Task Address": task["address"], "Search Query": task["search_query"]}
+
+    def task_records(self, task_index, task):
+        return JournalRecords(self, task_key(task_index, task))
+
+    def task_results(self, tasks):
+        # (task, records) pairs for the exporters, in task list order, skipping tasks without records.
+        # One query finds the tasks with records, so long task lists don't cost a query per task.
+        with self.lock:
+            with_records = {row[0] for row in self.conn.execute(
+                "SELECT task_key FROM tasks t WHERE EXISTS (SELECT 1 FROM records r WHERE r.task_key = t.task_key)")}
+        results = []
+        for task_index, task in enumerate(tasks):
+            key = task_key(task_index, task)
+            if key in with_records:
+                results.append((task, JournalRecords(self, key)))
+        return results
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,101 @@
+import json
+import logging
+from collections import Counter
+
+from selenium.common.exceptions import WebDriverException
+
+# URL patterns (Network.setBlockedURLs wildcards) of requests that never affect the extracted fields
+BLOCKED_URL_PATTERNS = [
+    # Images, including place photos and list thumbnails
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*.bmp*",
+    "*phinf.pstatic.net/*",
+    # Fonts
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    # Audio and video
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*",
+    # Map tiles
+    "*map.pstatic.net/nrb/*", "*/tile/*", "*.pbf*", "*.mvt*",
+    # Analytics, logging and ads
+    "*wcs.naver.net/*", "*lcs.naver.com/*", "*nlog.naver.com/*", "*tivan.naver.com/*",
+    "*siape.veta.naver.com/*", "*nelo2-col.navercorp.com/*", "*google-analytics.com/*",
+    "*googletagmanager.com/*", "*doubleclick.net/*",
+]
+
+# Features a scraping browser never needs; each would otherwise spend CPU or network in the background
+LEAN_CHROME_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-notifications",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+]
+
+LEAN_CHROME_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.media_stream": 2,
+}
+
+
+def apply_lean_options(options):
+    for argument in LEAN_CHROME_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_experimental_option("prefs", LEAN_CHROME_PREFS)
+    # Network events are read back from the performance log to account for traffic per task
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def enable_request_blocking(driver):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+class TrafficStats:
+    # Requests, received bytes and blocked requests (by resource type) of one task, accumulated from
+    # the browser's performance log. Reading the log also clears it, so it is collected periodically.
+    def __init__(self):
+        self.requests = 0
+        self.bytes_received = 0
+        self.blocked = Counter()
+
+    def read_log(self, driver):
+        try:
+            return driver.get_log("performance")
+        except WebDriverException as e:
+            logging.debug(f"Could not read the performance log: {e}")
+            return []
+
+    def drain(self, driver):
+        # Drop events from before the task (e.g. a pooled browser's previous task)
+        self.read_log(driver)
+
+    def collect(self, driver):
+        for entry in self.read_log(driver):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                self.requests += 1
+            elif method == "Network.loadingFinished":
+                self.bytes_received += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                self.blocked[params.get("type", "Other")] += 1
+
+    def describe(self):
+        blocked = ", ".join(f"{resource_type} {count}" for resource_type, count in self.blocked.most_common())
+        return (f"{self.requests} requests, {self.bytes_received / 2**20:.1f} MiB received, "
+                f"{sum(self.blocked.values())} blocked" + (f" ({blocked})" if blocked else ""))
+
+    def record(self, metrics):
+        metrics.count("requests", self.requests)
+        metrics.count("requests blocked", sum(self.blocked.values()))
+        metrics.count("bytes received", self.bytes_received)
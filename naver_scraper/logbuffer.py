@@ -0,0 +1,124 @@
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from naver_scraper.cache import DEFAULT_CACHE_DIR
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M'
+DEFAULT_LOG_PATH = os.path.join(DEFAULT_CACHE_DIR, 'logs', 'naver-scraper.log')
+
+
+class LogBuffer:
+    # Ring buffer of formatted log lines waiting to be shown. Threads append without waiting for the
+    # view; the view drains it in batches on a timer. When it falls behind, the oldest lines are dropped
+    # and counted, so memory stays bounded by capacity whatever the logging rate.
+    def __init__(self, capacity=2000):
+        self.lines = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def append(self, line):
+        with self.lock:
+            if len(self.lines) == self.lines.maxlen:
+                self.dropped += 1
+            self.lines.append(line)
+
+    def drain(self):
+        # Returns (lines, dropped): the buffered lines in order and how many were dropped before them
+        with self.lock:
+            lines = list(self.lines)
+            self.lines.clear()
+            dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+
+
+class BufferHandler(logging.Handler):
+    # Logging handler that only formats the record and puts it in a LogBuffer
+    def __init__(self, buffer):
+        super().__init__()
+        self.buffer = buffer
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class DroppingQueueHandler(QueueHandler):
+    # Hands records to the file writer thread; if the disk can't keep up and the queue is full, records
+    # are dropped and counted rather than blocking the scraper
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    # QueueListener whose stop() also works with a full bounded queue: the stop marker waits up to
+    # sentinel_timeout for the writer thread to make room, then takes the place of the oldest queued
+    # records, which are dropped and counted
+    def __init__(self, log_queue, *handlers, sentinel_timeout=5.0):
+        super().__init__(log_queue, *handlers)
+        self.sentinel_timeout = sentinel_timeout
+        self.dropped = 0
+
+    def enqueue_sentinel(self):
+        try:
+            self.queue.put(self._sentinel, timeout=self.sentinel_timeout)
+            return
+        except queue.Full:
+            pass
+        while True:
+            try:
+                self.queue.put_nowait(self._sentinel)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class FileLog:
+    # Writes the full log to a rotating file (max_bytes per file, backups old files kept) from a
+    # background thread; attached to the root logger until close()
+    def __init__(self, path=None, max_bytes=10 * 2**20, backups=5, max_queued=10000):
+        self.path = path or DEFAULT_LOG_PATH
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        file_handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
+        self.handler = DroppingQueueHandler(queue.Queue(max_queued))
+        self.listener = DrainingQueueListener(self.handler.queue, file_handler)
+        self.listener.start()
+        logging.getLogger().addHandler(self.handler)
+
+    def close(self):
+        logging.getLogger().removeHandler(self.handler)
+        # Writes the records still queued before returning
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        dropped = self.handler.dropped + self.listener.dropped
+        if dropped:
+            logging.warning(f"{dropped} log records were not written to {self.path}")
+
+
+def start_file_log(path=None, max_bytes=10 * 2**20, backups=5):
+    # FileLog, or None with an error logged if the file can't be opened
+    try:
+        return FileLog(path, max_bytes, backups)
+    except OSError as e:
+        logging.error(f"Could not open log file {path or DEFAULT_LOG_PATH}: {e}")
+        return None
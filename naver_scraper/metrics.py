@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds in seconds of the latency histogram buckets, Prometheus style (cumulative on export)
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+# Spans in pipeline order; the summary lists them in this order
+PHASES = ['driver startup', 'rate limit', 'address search', 'zoom', 'query', 'list scroll', 'next page',
+          'element lookup', 'click', 'iframe switch', 'dom wait', 'tab load', 'parse', 'http fetch', 'export']
+
+# Label for spans that belong to the run rather than a task (e.g. the final export)
+RUN_LABEL = "run"
+
+
+def task_label(task_index, task):
+    return f"{task_index + 1}. {task.address} - {task.search_query}"
+
+
+class Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for bucket, upper_bound in enumerate(BUCKETS):
+            if seconds <= upper_bound:
+                self.bucket_counts[bucket] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        for bucket, count in enumerate(other.bucket_counts):
+            self.bucket_counts[bucket] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation (the max for the open-ended bucket)
+        target = q * self.count
+        cumulative = 0
+        for upper_bound, count in zip(BUCKETS, self.bucket_counts):
+            cumulative += count
+            if cumulative >= target and count:
+                return min(upper_bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'buckets': {('+Inf' if upper_bound == float('inf') else str(upper_bound)): count
+                        for upper_bound, count in zip(BUCKETS, self.bucket_counts)},
+        }
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ScrapeMetrics:
+    # Latency histograms per (task, phase) and event counters per (task, event) for one run. Shared by
+    # all workers; engines record through a TaskMetrics view bound to their task.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.started_at = time.time()
+
+    def task_view(self, label):
+        return TaskMetrics(self, label)
+
+    def observe(self, task, phase, seconds):
+        with self.lock:
+            histogram = self.histograms.get((task, phase))
+            if histogram is None:
+                histogram = self.histograms[(task, phase)] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, task, event, amount=1):
+        with self.lock:
+            self.counters[(task, event)] = self.counters.get((task, event), 0) + amount
+
+    def phase_totals(self):
+        # Histograms merged over all tasks, in pipeline order
+        totals = {}
+        with self.lock:
+            for (task, phase), histogram in self.histograms.items():
+                totals.setdefault(phase, Histogram()).merge(histogram)
+        order = {phase: position for position, phase in enumerate(PHASES)}
+        return dict(sorted(totals.items(), key=lambda item: order.get(item[0], len(PHASES))))
+
+    def snapshot(self):
+        with self.lock:
+            tasks = {}
+            for (task, phase), histogram in self.histograms.items():
+                tasks.setdefault(task, {'phases': {}, 'counters': {}})['phases'][phase] = histogram.to_dict()
+            for (task, event), value in self.counters.items():
+                tasks.setdefault(task, {'phases': {}, 'counters': {}})['counters'][event] = value
+        return {'started_at': self.started_at, 'elapsed': time.time() - self.started_at, 'tasks': tasks}
+
+    def write(self, path):
+        # JSON snapshot, or the Prometheus text format for paths ending in .prom
+        content = self.prometheus_text() if path.endswith('.prom') else \
+            json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def prometheus_text(self):
+        lines = ["# HELP naver_scraper_phase_seconds Time spent in each scraping phase",
+                 "# TYPE naver_scraper_phase_seconds histogram"]
+        with self.lock:
+            for (task, phase), histogram in sorted(self.histograms.items()):
+                labels = f'task="{escape_label(task)}",phase="{escape_label(phase)}"'
+                cumulative = 0
+                for upper_bound, count in zip(BUCKETS, histogram.bucket_counts):
+                    cumulative += count
+                    le = '+Inf' if upper_bound == float('inf') else str(upper_bound)
+                    lines.append(f'naver_scraper_phase_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'naver_scraper_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'naver_scraper_phase_seconds_count{{{labels}}} {histogram.count}')
+            lines += ["# HELP naver_scraper_events_total Scraped, failed and retried restaurants and other events",
+                      "# TYPE naver_scraper_events_total counter"]
+            for (task, event), value in sorted(self.counters.items()):
+                lines.append(f'naver_scraper_events_total{{task="{escape_label(task)}",'
+                             f'event="{escape_label(event)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        lines = [f"{'phase':<16} {'count':>7} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for phase, histogram in self.phase_totals().items():
+            lines.append(f"{phase:<16} {histogram.count:>7} {histogram.sum:>9.1f} "
+                         f"{histogram.sum / histogram.count * 1000:>9.0f} {histogram.quantile(0.95) * 1000:>9.0f} "
+                         f"{histogram.max * 1000:>9.0f}")
+        with self.lock:
+            counters = dict(self.counters)
+        for task in sorted({task for task, _ in counters}):
+            events = ", ".join(f"{event} {value}" for (counter_task, event), value in sorted(counters.items())
+                               if counter_task == task)
+            lines.append(f"{task}: {events}")
+        return lines
+
+    def serve(self, port, host='127.0.0.1'):
+        # Local /metrics endpoint in the Prometheus text format, served from a daemon thread
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class TaskMetrics:
+    # What the scraping functions record into; bound to one task label
+    def __init__(self, metrics, label):
+        self.metrics = metrics
+        self.label = label
+
+    @contextmanager
+    def span(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metrics.observe(self.label, phase, time.perf_counter() - start)
+
+    def observe(self, phase, seconds):
+        # For phases that don't fit a with block, e.g. a page loading in a tab while other work goes on
+        self.metrics.observe(self.label, phase, seconds)
+
+    def count(self, event, amount=1):
+        self.metrics.increment(self.label, event, amount)
+
+
+class NoMetrics:
+    # Default for callers that don't collect metrics
+    def span(self, phase):
+        return nullcontext()
+
+    def observe(self, phase, seconds):
+        pass
+
+    def count(self, event, amount=1):
+        pass
+
+
+NO_METRICS = NoMetrics()
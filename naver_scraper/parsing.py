@@ -0,0 +1,77 @@
+import re
+
+from lxml import etree, html
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+MISSING = "N/A"
+
+# Every field read from a place detail document: (output field, CSS selector). The in-browser
+# extraction script and the HTML parsers are both driven by this table, so adding a row here adds
+# the field everywhere without another WebDriver round trip. Selectors are limited to
+# tag.class / tag#id forms so lxml can run them without cssselect.
+DETAIL_FIELDS = [
+    ("Restaurant Name", "span.GHAhO"),
+    ("Address", "span.LDgIH"),
+    ("Phone Number", "span.xlx7Q"),
+]
+
+# Runs inside entryIframe and returns only the text of each field, instead of serializing the DOM
+EXTRACT_DETAIL_JS = """
+const result = {};
+for (const [field, selector] of arguments[0]) {
+    const element = document.querySelector(selector);
+    result[field] = element ? element.textContent.trim() : null;
+}
+return result;
+"""
+
+SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][\w-]*|\*)?((?:[.#][\w-]+)+)$')
+
+
+def css_to_xpath(selector):
+    match = SIMPLE_SELECTOR.match(selector)
+    if not match:
+        raise ValueError(f"Unsupported detail selector: {selector}")
+    conditions = []
+    for kind, name in re.findall(r'([.#])([\w-]+)', match.group(2)):
+        if kind == '#':
+            conditions.append(f'@id="{name}"')
+        else:
+            conditions.append(f'contains(concat(" ", normalize-space(@class), " "), " {name} ")')
+    return f'(//{match.group(1) or "*"}[{" and ".join(conditions)}])[1]'
+
+
+DETAIL_XPATHS = [(field, etree.XPath(css_to_xpath(selector))) for field, selector in DETAIL_FIELDS]
+
+
+def detail_record(values):
+    # Field values from any extractor -> output record, with missing or empty fields as "N/A"
+    return {field: (values.get(field) or "").strip() or MISSING for field, _ in DETAIL_FIELDS}
+
+
+def extract_restaurant_detail(driver):
+    # One script call in the current frame; returns the record without transferring the page
+    return detail_record(driver.execute_script(EXTRACT_DETAIL_JS, DETAIL_FIELDS) or {})
+
+
+def parse_restaurant_detail(page_source):
+    # For full documents (HTTP detail pages, DOM snapshots): selectolax when installed, otherwise lxml
+    if SelectolaxParser is not None:
+        tree = SelectolaxParser(page_source)
+        values = {}
+        for field, selector in DETAIL_FIELDS:
+            node = tree.css_first(selector)
+            values[field] = node.text() if node is not None else None
+        return detail_record(values)
+    if not page_source or not page_source.strip():
+        return detail_record({})
+    tree = html.document_fromstring(page_source)
+    values = {}
+    for field, xpath in DETAIL_XPATHS:
+        nodes = xpath(tree)
+        values[field] = nodes[0].text_content() if nodes else None
+    return detail_record(values)
@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+
+# How often a waiting acquire() checks whether its caller was stopped
+CANCEL_CHECK_INTERVAL = 0.2
+
+
+def backoff_delay(attempt, base, cap=60):
+    # Exponential backoff with jitter: base * 2^attempt capped at cap, randomized over its upper half so
+    # workers that failed together don't retry together
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def retry_after_seconds(response):
+    # Retry-After of a throttled HTTP response in seconds (None if absent or given as a date)
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    # Token bucket pacing every request the scraper sends to Naver (searches, list pages, detail pages),
+    # shared by all workers and tasks of a run. It starts at rate requests per second with bursts of up
+    # to burst, and with adaptive on it adjusts the rate at most once per adjust_interval: up by
+    # increase_step while requests succeed and their latency stays under slow_latency, down by
+    # decrease_factor after a failure or when latency climbs (AIMD). A throttled response also pauses
+    # the whole bucket with exponential backoff, so every worker backs off together.
+    def __init__(self, rate=2.0, burst=3, min_rate=0.2, max_rate=None, adaptive=True, slow_latency=5.0,
+                 increase_step=0.25, decrease_factor=0.5, adjust_interval=5.0, backoff_base=2.0, backoff_max=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate or rate * 4
+        self.adaptive = adaptive
+        self.slow_latency = slow_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.adjust_interval = adjust_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.condition = threading.Condition()
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.paused_until = 0.0
+        self.adjusted_at = self.refilled_at
+        # Moving average of request latency, and failures since the last success
+        self.latency = None
+        self.failure_streak = 0
+        self.failed_since_adjust = False
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.not_found = 0
+        self.waited = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def acquire(self, cancel_event=None):
+        # Blocks until the next request may be sent; returns the seconds waited, or None without taking a
+        # token if cancel_event is set meanwhile
+        start = time.monotonic()
+        with self.condition:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                now = time.monotonic()
+                self.refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+                self.condition.wait(delay if cancel_event is None else min(delay, CANCEL_CHECK_INTERVAL))
+            waited = time.monotonic() - start
+            self.requests += 1
+            self.waited += waited
+        return waited
+
+    def record_success(self, latency=None):
+        with self.condition:
+            self.failure_streak = 0
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if not self.adaptive:
+                return
+            now = time.monotonic()
+            if now - self.adjusted_at < self.adjust_interval:
+                return
+            if self.latency is not None and self.latency > self.slow_latency:
+                self.set_rate(self.rate * self.decrease_factor, now)
+            elif not self.failed_since_adjust:
+                self.set_rate(self.rate + self.increase_step, now)
+            else:
+                self.adjusted_at = now
+                self.failed_since_adjust = False
+
+    def record_not_found(self):
+        # A request for a page that doesn't exist (e.g. a dead place link) succeeded as far as the server's
+        # load goes, but isn't a success either: it must not raise the rate or end a run of throttled
+        # failures (and so reset their backoff), nor slow the run down like a failure
+        with self.condition:
+            self.not_found += 1
+
+    def record_failure(self, throttled=False, retry_after=None):
+        # A throttled failure (e.g. HTTP 429) pauses all workers: for retry_after seconds if the server
+        # said so, otherwise for a backoff that doubles with every failure in a row
+        with self.condition:
+            now = time.monotonic()
+            self.failures += 1
+            self.failure_streak += 1
+            self.failed_since_adjust = True
+            if throttled:
+                self.throttled += 1
+                pause = retry_after if retry_after is not None else \
+                    backoff_delay(self.failure_streak - 1, self.backoff_base, self.backoff_max)
+                self.paused_until = max(self.paused_until, now + pause)
+            # Failures of several workers at once count as one signal per interval, so a single burst
+            # doesn't drive the rate to its minimum
+            if self.adaptive and (throttled or now - self.adjusted_at >= self.adjust_interval):
+                self.set_rate(self.rate * self.decrease_factor, now)
+                self.failed_since_adjust = False
+            self.condition.notify_all()
+
+    def set_rate(self, rate, now):
+        self.refill(now)
+        self.rate = max(self.min_rate, min(self.max_rate, rate))
+        self.adjusted_at = now
+        self.condition.notify_all()
+
+    def describe(self):
+        with self.condition:
+            latency = f", latency {self.latency:.2f} s" if self.latency is not None else ""
+            return (f"{self.requests} requests, rate now {self.rate:.2f}/s{latency}, waited {self.waited:.1f} s, "
+                    f"{self.failures} failed ({self.throttled} throttled), {self.not_found} not found")
+
+
+class NoRateLimit:
+    # Stand-in when the run isn't rate limited; requests go out as fast as the workers send them
+    def acquire(self, cancel_event=None):
+        return 0.0
+
+    def record_success(self, latency=None):
+        pass
+
+    def record_not_found(self):
+        pass
+
+    def record_failure(self, throttled=False, retry_after=None):
+        pass
+
+    def describe(self):
+        return "not rate limited"
+
+
+NO_RATE_LIMIT = NoRateLimit()
@@ -0,0 +1,596 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qs, quote, unquote, urljoin, urlsplit
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import (JavascriptException, NoSuchElementException, SessionNotCreatedException,
+                                        StaleElementReferenceException)
+from selenium.webdriver.common.keys import Keys
+
+from naver_scraper.cache import DEFAULT_CACHE_DIR
+from naver_scraper.lean import apply_lean_options, enable_request_blocking
+from naver_scraper.metrics import NO_METRICS
+from naver_scraper.parsing import extract_restaurant_detail, parse_restaurant_detail
+from naver_scraper.waits import DEFAULT_WAIT_POLICY, ScrapeCancelled
+
+
+NAVER_MAP_URL = "https://map.naver.com/"
+
+
+# Workers start their drivers concurrently; only one of them should download chromedriver
+driver_install_lock = threading.Lock()
+resolved_driver_path = None
+# The chromedriver found by the last run, reused without asking ChromeDriverManager for
+# DRIVER_PATH_MAX_AGE seconds, and for as long as it can't be reached (offline)
+DRIVER_PATH_FILE = os.path.join(DEFAULT_CACHE_DIR, 'chromedriver.json')
+DRIVER_PATH_MAX_AGE = 7 * 24 * 3600
+# Set to a chromedriver binary to skip the lookup altogether
+DRIVER_PATH_ENV = 'NAVER_SCRAPER_CHROMEDRIVER'
+
+
+def load_driver_path(max_age=DRIVER_PATH_MAX_AGE):
+    # (path, fresh) of the cached chromedriver, or (None, False) if there is none or it was deleted
+    try:
+        with open(DRIVER_PATH_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None, False
+    path = cached.get('path')
+    if not path or not os.path.isfile(path):
+        return None, False
+    return path, time.time() - cached.get('resolved_at', 0) < max_age
+
+
+def save_driver_path(path):
+    try:
+        os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+        temp_path = DRIVER_PATH_FILE + f".{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'path': path, 'resolved_at': time.time()}, f)
+        os.replace(temp_path, DRIVER_PATH_FILE)
+    except OSError as e:
+        logging.warning(f"Could not cache the chromedriver path: {e}")
+
+
+def find_driver_path(refresh=False):
+    override = os.environ.get(DRIVER_PATH_ENV)
+    if override:
+        return override
+    cached, fresh = load_driver_path()
+    if cached and fresh and not refresh:
+        return cached
+    try:
+        # webdriver_manager (and requests with it) is only imported when the driver has to be looked up
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        if cached:
+            logging.warning(f"Could not check for a newer chromedriver ({e}); using {cached}")
+            return cached
+        raise
+    save_driver_path(path)
+    return path
+
+
+def resolve_driver_path(stale=None):
+    # ChromeDriverManager checks versions over the network on every install(); do it at most once per
+    # process, and skip it while the path cached by an earlier run is fresh. stale is a path Chrome
+    # refused (e.g. after a Chrome update); it is looked up again unless another worker already did.
+    global resolved_driver_path
+    with driver_install_lock:
+        if resolved_driver_path is None or (stale and resolved_driver_path == stale):
+            resolved_driver_path = find_driver_path(refresh=stale is not None)
+        return resolved_driver_path
+
+
+def setup_driver(headless=False, lean=False):
+    # lean: headless, with images, fonts, media, map tiles and trackers blocked (see lean.py)
+    driver_path = resolve_driver_path()
+    try:
+        return start_driver(driver_path, headless, lean)
+    except SessionNotCreatedException as e:
+        # A cached chromedriver no longer matches the installed Chrome
+        if os.environ.get(DRIVER_PATH_ENV):
+            raise
+        logging.warning(f"Chrome did not start with {driver_path}, looking up chromedriver again: {e.msg}")
+        new_path = resolve_driver_path(stale=driver_path)
+        if new_path == driver_path:
+            raise
+        return start_driver(new_path, headless, lean)
+
+
+def start_driver(driver_path, headless=False, lean=False):
+    service = Service(driver_path)
+    options = webdriver.ChromeOptions()
+    if headless or lean:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    if lean:
+        apply_lean_options(options)
+    driver = webdriver.Chrome(service=service, options=options)
+    if lean:
+        enable_request_blocking(driver)
+    return driver
+
+
+def place_id_from_url(url):
+    match = re.search(r'/(\d{4,})(?:[/?#]|$)', url or "")
+    return match.group(1) if match else None
+
+
+def get_entry_iframe_src(driver):
+    driver.switch_to.default_content()
+    frames = driver.find_elements(By.ID, 'entryIframe')
+    return frames[0].get_attribute('src') if frames else None
+
+
+def entry_iframe_changed(previous_src):
+    # The detail pane is swapped by pointing entryIframe at the clicked place
+    def _predicate(driver):
+        src = get_entry_iframe_src(driver)
+        return src if src and src != previous_src else False
+    return _predicate
+
+
+def place_section_shows(place_id):
+    # Evaluated inside entryIframe: the document must belong to the new place, not the previous one
+    def _predicate(driver):
+        if place_id and place_id not in driver.execute_script("return location.href;"):
+            return False
+        if driver.execute_script("return document.readyState;") != 'complete':
+            return False
+        return bool(driver.find_elements(By.CLASS_NAME, 'place_section'))
+    return _predicate
+
+
+def element_has_text(by, selector):
+    def _predicate(driver):
+        elements = driver.find_elements(by, selector)
+        return elements[0] if elements and elements[0].text.strip() else False
+    return _predicate
+
+
+def input_is_empty(element):
+    def _predicate(driver):
+        return not element.get_attribute('value')
+    return _predicate
+
+
+def search_results_ready():
+    # Satisfied once searchIframe has rendered at least one list entry; leaves the driver inside the frame
+    def _predicate(driver):
+        driver.switch_to.default_content()
+        frames = driver.find_elements(By.ID, 'searchIframe')
+        if not frames:
+            return False
+        driver.switch_to.frame(frames[0])
+        return bool(driver.find_elements(
+            By.CSS_SELECTOR, '#_pcmap_list_scroll_container li, #_pcmap_list_scroll_container div.lazyload-wrapper'))
+    return _predicate
+
+
+# Zoom levels the task slider spans, counted around the level Naver shows a searched address at
+ZOOM_STEPS = 14
+MAX_MAP_ZOOM = 21
+
+
+def zoom_offset(zoom_slider_value):
+    return int((zoom_slider_value / 100) * (ZOOM_STEPS - 1)) - ZOOM_STEPS // 2
+
+
+def map_position_from_url(url):
+    # Naver keeps the viewport in the c parameter, "x,y,zoom,tilt,rotation,layers,mode" (x/y are
+    # longitude/latitude or Web Mercator meters depending on the map version). With an address panel
+    # open it may hold just the zoom, and the coordinates are in the /address/x,y,... path instead.
+    # Returns (x, y, zoom) or None.
+    parts = urlsplit(url or "")
+    viewport = parse_qs(parts.query).get('c', [''])[0].split(',')
+    try:
+        if len(viewport) >= 7:
+            return viewport[0], viewport[1], float(viewport[2])
+        match = re.search(r'/address/(-?[\d.]+),(-?[\d.]+)', unquote(parts.path))
+        if match and viewport[0]:
+            return match.group(1), match.group(2), float(viewport[0])
+    except ValueError:
+        pass
+    return None
+
+
+def map_search_url(map_url, search_query, position, offset):
+    # The query's result list, with the map already at the address and zoom level: one page load
+    x, y, zoom = position
+    zoom = min(max(zoom + offset, 0), MAX_MAP_ZOOM)
+    return urljoin(map_url, "p/search/" + quote(search_query)) + f"?c={x},{y},{zoom:g},0,0,0,dh"
+
+
+def map_position_shown():
+    def _predicate(driver):
+        return map_position_from_url(driver.current_url) or False
+    return _predicate
+
+
+def find_address(driver, address, wait_policy=DEFAULT_WAIT_POLICY, map_url=NAVER_MAP_URL):
+    # Searches the address in the map's search box; returns the map position it ended at, if the URL shows it
+    wait = wait_policy
+    driver.get(map_url)
+    search_input_box = wait.until(driver, wait.page_timeout,
+                                  EC.element_to_be_clickable((By.CLASS_NAME, 'input_search')))
+    start_url = driver.current_url
+    search_input_box.send_keys(address)
+    search_input_box.send_keys(Keys.RETURN)
+    # The map has moved to the address once the URL switches to the search result
+    wait.soft_until(driver, wait.element_timeout, EC.url_changes(start_url))
+    return wait.soft_until(driver, wait.click_timeout, map_position_shown())
+
+
+def zoom_with_buttons(driver, offset, wait_policy=DEFAULT_WAIT_POLICY):
+    wait = wait_policy
+    if not offset:
+        return
+    zoom_button_selector = 'button.zoom_in' if offset > 0 else 'button.zoom_out'
+    zoom_button = wait.until(driver, wait.element_timeout,
+                             EC.element_to_be_clickable((By.CSS_SELECTOR, zoom_button_selector)))
+    for _ in range(abs(offset)):
+        wait.until(driver, wait.click_timeout, EC.element_to_be_clickable(zoom_button))
+        zoom_button.click()
+        wait.sleep(wait.zoom_interval)
+
+
+def type_query(driver, search_query, wait_policy=DEFAULT_WAIT_POLICY):
+    wait = wait_policy
+    search_input_box = wait.until(driver, wait.page_timeout,
+                                  EC.element_to_be_clickable((By.CLASS_NAME, 'input_search')))
+    search_input_box.clear()
+    search_input_box.send_keys(Keys.CONTROL + "a")
+    search_input_box.send_keys(Keys.DELETE)
+    if not wait.soft_until(driver, wait.click_timeout, input_is_empty(search_input_box)):
+        search_input_box.clear()
+        search_input_box.send_keys(Keys.CONTROL + "a")
+        search_input_box.send_keys(Keys.DELETE)
+    query_url = driver.current_url
+    search_input_box.send_keys(search_query)
+    search_input_box.send_keys(Keys.RETURN)
+    wait.soft_until(driver, wait.element_timeout, EC.url_changes(query_url))
+    wait.until(driver, wait.page_timeout, search_results_ready(), "Search results did not load")
+
+
+def pace(wait_policy, metrics=NO_METRICS):
+    # Waits for the run's rate limiter before a request to Naver; time spent waiting shows as 'rate limit'
+    waited = wait_policy.rate_limiter.acquire(wait_policy.cancel_event)
+    wait_policy.check_cancelled()
+    if waited:
+        metrics.observe('rate limit', waited)
+
+
+def locate_address(driver, address, wait_policy=DEFAULT_WAIT_POLICY, map_url=NAVER_MAP_URL, metrics=NO_METRICS,
+                   geocode_cache=None):
+    # The map position (x, y, zoom) Naver shows the address at, from geocode_cache or by searching it;
+    # None if the map URL doesn't reveal it (the browser is then left showing the address)
+    position = geocode_cache.get(address) if geocode_cache else None
+    if position:
+        metrics.count('geocode cache hits')
+        return position
+    pace(wait_policy, metrics)
+    with metrics.span('address search'):
+        position = find_address(driver, address, wait_policy, map_url)
+    if position and geocode_cache:
+        geocode_cache.put(address, position)
+    return position
+
+
+def open_search_at(driver, search_query, position, wait_policy=DEFAULT_WAIT_POLICY, map_url=NAVER_MAP_URL,
+                   offset=0, timeout=None):
+    # Opens the query's result list with the map at position (zoomed by offset); False if no list shows up.
+    # Callers pace() it before their 'query' span.
+    started = time.monotonic()
+    driver.get(map_search_url(map_url, search_query, position, offset))
+    listed = bool(wait_policy.soft_until(driver, timeout or wait_policy.page_timeout, search_results_ready()))
+    # An empty list may just be an empty area, so only a listed one is a signal for the rate limiter
+    if listed:
+        wait_policy.rate_limiter.record_success(time.monotonic() - started)
+    return listed
+
+
+def search_area(driver, address, search_query, zoom_slider_value, wait_policy=DEFAULT_WAIT_POLICY,
+                map_url=NAVER_MAP_URL, metrics=NO_METRICS, geocode_cache=None):
+    # Centers the map on the address, applies the zoom level and runs the query; ends with results listed.
+    # Once the address's map position is known (from geocode_cache, or read from the URL after searching
+    # the address) the query is opened at that position and zoom with a single navigation; otherwise
+    # the zoom buttons and the search box are used.
+    wait = wait_policy
+    offset = zoom_offset(zoom_slider_value)
+    position = locate_address(driver, address, wait, map_url, metrics, geocode_cache)
+    if position:
+        pace(wait, metrics)
+        with metrics.span('query'):
+            if open_search_at(driver, search_query, position, wait, map_url, offset):
+                return
+        logging.warning(f"Results for {address} did not load from the map URL; using the search box")
+        if geocode_cache:
+            geocode_cache.forget(address)
+        pace(wait, metrics)
+        with metrics.span('address search'):
+            find_address(driver, address, wait, map_url)
+    else:
+        logging.info(f"The map URL for {address} has no position; using the zoom buttons")
+    with metrics.span('zoom'):
+        zoom_with_buttons(driver, offset, wait)
+    pace(wait, metrics)
+    with metrics.span('query'):
+        type_query(driver, search_query, wait)
+
+
+def scrape_restaurant_info(driver, place_id=None, wait_policy=DEFAULT_WAIT_POLICY, metrics=NO_METRICS):
+    try:
+        with metrics.span('iframe switch'):
+            driver.switch_to.default_content()
+            wait_policy.until(driver, wait_policy.page_timeout,
+                              EC.frame_to_be_available_and_switch_to_it((By.ID, 'entryIframe')))
+        with metrics.span('dom wait'):
+            wait_policy.until(driver, wait_policy.detail_timeout, place_section_shows(place_id),
+                              f"Detail pane did not load place {place_id}")
+            # The name is rendered last; missing fields still fall back to "N/A" below
+            wait_policy.soft_until(driver, wait_policy.click_timeout,
+                                   element_has_text(By.CSS_SELECTOR, 'span.GHAhO'))
+        with metrics.span('parse'):
+            try:
+                return extract_restaurant_detail(driver)
+            except JavascriptException as e:
+                # Script blocked or broken by the page; parse a snapshot of the frame instead
+                logging.warning(f"In-page extraction failed for place {place_id}, parsing the page source: {e}")
+                return parse_restaurant_detail(driver.page_source)
+    except ScrapeCancelled:
+        raise
+    except Exception as e:
+        logging.error(f"An error occurred while scraping restaurant info: {e}")
+        return None
+
+
+# One round trip per page: every list entry with its click handle, name, category and place id (if exposed)
+HARVEST_LIST_JS = """
+const container = document.getElementById('_pcmap_list_scroll_container');
+if (!container) return [];
+let items = container.querySelectorAll('li.UEzoS');
+if (!items.length) items = container.querySelectorAll('div.lazyload-wrapper');
+return Array.from(items).map(item => {
+    const link = item.querySelector('.place_bluelink');
+    const category = item.querySelector('span.KCMnt');
+    const address = item.querySelector('span.Pb4bU');
+    let placeId = item.getAttribute('data-id') || item.getAttribute('data-place-id');
+    if (!placeId) {
+        for (const anchor of item.querySelectorAll('a[href]')) {
+            const match = anchor.getAttribute('href').match(/\\/(\\d{4,})(?:[\\/?#]|$)/);
+            if (match) { placeId = match[1]; break; }
+        }
+    }
+    return {
+        link: link,
+        name: link ? link.textContent.trim() : '',
+        category: category ? category.textContent.trim() : '',
+        address: address ? address.textContent.trim() : '',
+        place_id: placeId || null
+    };
+});
+"""
+
+
+COUNT_LIST_JS = """
+const container = document.getElementById('_pcmap_list_scroll_container');
+if (!container) return 0;
+return container.querySelectorAll('li.UEzoS').length || container.querySelectorAll('div.lazyload-wrapper').length;
+"""
+
+
+NEXT_PAGE_SELECTOR = 'div.zRM9F a.eUTV2'
+
+
+class ListEntry:
+    def __init__(self, index, page, position, name, category, place_id, element, address=''):
+        self.index = index
+        self.page = page
+        self.position = position
+        self.name = name
+        self.category = category
+        self.place_id = place_id
+        self.element = element
+        # Short address shown under the name in the list; only good enough to tell same-named places apart
+        self.address = address
+        self.from_cache = False
+        # Set by the dedup index when the entry is claimed
+        self.place_key = None
+        # Set by a delta run (see TaskDelta) from what the list shows, before a click can reveal more
+        self.listing_key = None
+
+
+def list_grew_beyond(count):
+    def _predicate(driver):
+        return driver.execute_script(COUNT_LIST_JS) > count
+    return _predicate
+
+
+def list_page_changed(previous_first_name):
+    def _predicate(driver):
+        entries = driver.execute_script(HARVEST_LIST_JS)
+        return bool(entries) and entries[0]['name'] != previous_first_name
+    return _predicate
+
+
+def switch_to_search_iframe(driver, wait_policy=DEFAULT_WAIT_POLICY):
+    driver.switch_to.default_content()
+    wait_policy.until(driver, wait_policy.element_timeout,
+                      EC.frame_to_be_available_and_switch_to_it((By.ID, 'searchIframe')))
+    return wait_policy.until(driver, wait_policy.element_timeout,
+                             EC.presence_of_element_located((By.ID, '_pcmap_list_scroll_container')))
+
+
+def harvest_list_page(driver, limit, wait_policy=DEFAULT_WAIT_POLICY, metrics=NO_METRICS):
+    # Scroll the lazy-loaded list to its end once, then read every entry in a single script call
+    with metrics.span('list scroll'):
+        scroll_container = switch_to_search_iframe(driver, wait_policy)
+        count = driver.execute_script(COUNT_LIST_JS)
+        while count < limit:
+            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", scroll_container)
+            if not wait_policy.soft_until(driver, wait_policy.scroll_timeout, list_grew_beyond(count)):
+                break
+            count = driver.execute_script(COUNT_LIST_JS)
+        return driver.execute_script(HARVEST_LIST_JS)
+
+
+def go_to_next_page(driver, previous_first_name, wait_policy=DEFAULT_WAIT_POLICY, metrics=NO_METRICS):
+    with metrics.span('next page'):
+        switch_to_search_iframe(driver, wait_policy)
+        buttons = driver.find_elements(By.CSS_SELECTOR, NEXT_PAGE_SELECTOR)
+        if not buttons or buttons[-1].get_attribute('aria-disabled') == 'true':
+            return False
+        pace(wait_policy, metrics)
+        buttons[-1].click()
+        wait_policy.until(driver, wait_policy.element_timeout, list_page_changed(previous_first_name),
+                          "Result list did not switch to the next page")
+        return True
+
+
+def iter_list_entries(driver, limit, wait_policy=DEFAULT_WAIT_POLICY, metrics=NO_METRICS):
+    # Builds the index one result page at a time; handles stay valid until the page changes
+    index = 0
+    page = 1
+    while index < limit:
+        entries = harvest_list_page(driver, limit - index, wait_policy, metrics)
+        if not entries:
+            break
+        for position, entry in enumerate(entries):
+            if index >= limit:
+                return
+            index += 1
+            yield ListEntry(index, page, position, entry['name'], entry['category'], entry['place_id'], entry['link'],
+                            entry.get('address', ''))
+        if index >= limit or not go_to_next_page(driver, entries[0]['name'], wait_policy, metrics):
+            break
+        page += 1
+
+
+def refresh_entry_element(driver, entry, wait_policy=DEFAULT_WAIT_POLICY):
+    # The list re-rendered under us; look the entry up again by its position on the current page
+    switch_to_search_iframe(driver, wait_policy)
+    entries = driver.execute_script(HARVEST_LIST_JS)
+    if entry.position >= len(entries):
+        raise NoSuchElementException(f"Could not find restaurant element for index {entry.index}")
+    entry.element = entries[entry.position]['link']
+
+
+def click_entry(driver, entry, max_retries=None, wait_policy=DEFAULT_WAIT_POLICY, place_cache=None,
+                metrics=NO_METRICS):
+    # Clicks the entry until the detail pane points at its place, without waiting for the pane to load.
+    # Returns (restaurant_info, pane url): restaurant_info is set on a cache hit for a place id only the
+    # pane revealed; both are None after max_retries (default: the wait policy's) failed attempts.
+    max_retries = max_retries or wait_policy.max_retries
+    limiter = wait_policy.rate_limiter
+    for attempt in range(max_retries):
+        try:
+            with metrics.span('element lookup'):
+                previous_src = get_entry_iframe_src(driver)
+                switch_to_search_iframe(driver, wait_policy)
+                if entry.element is None:
+                    refresh_entry_element(driver, entry, wait_policy)
+                try:
+                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", entry.element)
+                except StaleElementReferenceException:
+                    refresh_entry_element(driver, entry, wait_policy)
+                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", entry.element)
+                wait_policy.until(driver, wait_policy.click_timeout, EC.element_to_be_clickable(entry.element))
+            pace(wait_policy, metrics)
+            with metrics.span('click'):
+                clicked_at = time.monotonic()
+                entry.element.click()
+                entry_src = wait_policy.until(driver, wait_policy.page_timeout, entry_iframe_changed(previous_src),
+                                              f"Detail pane did not open for restaurant {entry.index}")
+            limiter.record_success(time.monotonic() - clicked_at)
+            place_id = place_id_from_url(entry_src)
+            # The list didn't expose the id, so the cache can only be consulted once the pane points at the
+            # place; a hit still saves waiting for and parsing the detail document
+            if place_cache and place_id and not entry.place_id:
+                entry.place_id = place_id
+                restaurant_info = place_cache.get(place_id)
+                if restaurant_info:
+                    entry.from_cache = True
+                    metrics.count('cache hits')
+                    return restaurant_info, entry_src
+            entry.place_id = entry.place_id or place_id
+            return None, entry_src
+        except ScrapeCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"Attempt {attempt + 1} failed for restaurant {entry.index}: {e}")
+            limiter.record_failure()
+            if attempt == max_retries - 1:
+                logging.error(f"Failed to scrape restaurant {entry.index} after {max_retries} attempts")
+                return None, None
+            metrics.count('retries')
+            entry.element = None
+        wait_policy.sleep(wait_policy.retry_pause(attempt))
+
+
+def scrape_single_restaurant(driver, entry, max_retries=None, wait_policy=DEFAULT_WAIT_POLICY, place_cache=None,
+                             metrics=NO_METRICS):
+    restaurant_info, entry_src = click_entry(driver, entry, max_retries, wait_policy, place_cache, metrics)
+    if restaurant_info or not entry_src:
+        return restaurant_info
+    return scrape_restaurant_info(driver, place_id_from_url(entry_src), wait_policy, metrics)
+
+
+def detail_without_browser(entry, http_fetcher=None, place_cache=None, metrics=NO_METRICS, cancel_event=None):
+    # Cached places are never clicked. With an HTTP fetcher the browser is only needed for entries whose
+    # place id the list didn't expose. A fetch in progress raises ScrapeCancelled once cancel_event is set.
+    if place_cache and entry.place_id:
+        restaurant_info = place_cache.get(entry.place_id)
+        if restaurant_info:
+            entry.from_cache = True
+            metrics.count('cache hits')
+            return restaurant_info
+    if http_fetcher and entry.place_id:
+        with metrics.span('http fetch'):
+            restaurant_info = http_fetcher.fetch(entry.place_id, cancel_event, metrics)
+        if restaurant_info:
+            return restaurant_info
+        logging.info(f"Falling back to the browser for restaurant {entry.index} (place {entry.place_id})")
+        metrics.count('http fallbacks')
+    return None
+
+
+def remember_detail(entry, restaurant_info, place_cache=None):
+    if restaurant_info and place_cache and entry.place_id and not entry.from_cache:
+        place_cache.put(entry.place_id, restaurant_info)
+
+
+def scrape_entry_detail(driver, entry, http_fetcher=None, wait_policy=DEFAULT_WAIT_POLICY, place_cache=None,
+                        metrics=NO_METRICS):
+    restaurant_info = detail_without_browser(entry, http_fetcher, place_cache, metrics, wait_policy.cancel_event)
+    if not restaurant_info:
+        restaurant_info = scrape_single_restaurant(driver, entry, wait_policy=wait_policy, place_cache=place_cache,
+                                                   metrics=metrics)
+    remember_detail(entry, restaurant_info, place_cache)
+    return restaurant_info
+
+
+def prepare_entry_detail(driver, entry, http_fetcher=None, wait_policy=DEFAULT_WAIT_POLICY, place_cache=None,
+                         metrics=NO_METRICS):
+    # scrape_entry_detail for detail tabs: instead of waiting for the detail pane, returns its url for a tab
+    # to load. Returns (restaurant_info, None) when no page has to be loaded (cached, fetched over HTTP,
+    # or the click failed) and (None, url) otherwise.
+    restaurant_info = detail_without_browser(entry, http_fetcher, place_cache, metrics, wait_policy.cancel_event)
+    if not restaurant_info:
+        restaurant_info, entry_src = click_entry(driver, entry, wait_policy=wait_policy, place_cache=place_cache,
+                                                 metrics=metrics)
+        if entry_src and not restaurant_info:
+            return None, entry_src
+    remember_detail(entry, restaurant_info, place_cache)
+    return restaurant_info, None
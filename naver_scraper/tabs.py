@@ -0,0 +1,147 @@
+import logging
+import time
+from collections import deque
+
+from selenium.common.exceptions import JavascriptException, WebDriverException
+from selenium.webdriver.common.by import By
+
+from naver_scraper.lean import enable_request_blocking
+from naver_scraper.metrics import NO_METRICS
+from naver_scraper.parsing import extract_restaurant_detail, parse_restaurant_detail
+from naver_scraper.scraping import element_has_text, pace, place_id_from_url, place_section_shows, remember_detail
+from naver_scraper.waits import DEFAULT_WAIT_POLICY
+
+
+class TabLoad:
+    def __init__(self, entry, url, handle, done=False, restaurant_info=None):
+        self.entry = entry
+        self.url = url
+        self.place_id = place_id_from_url(url) if url else None
+        self.handle = handle
+        self.started = time.monotonic()
+        self.done = done
+        self.restaurant_info = restaurant_info
+
+
+class DetailTabs:
+    # Loads detail pages in up to size extra tabs of one browser while the list tab goes on clicking.
+    # WebDriver runs one command at a time, so a tab's navigation is started with a script that returns
+    # immediately; Chrome loads the pages side by side and finished tabs are found by polling. Results
+    # are handed back in submission order, so the journal never records an entry before an earlier one.
+    def __init__(self, driver, size, wait_policy=DEFAULT_WAIT_POLICY, metrics=NO_METRICS, lean=False,
+                 place_cache=None):
+        self.driver = driver
+        self.wait_policy = wait_policy
+        self.metrics = metrics
+        self.place_cache = place_cache
+        self.main_handle = driver.current_window_handle
+        self.free = []
+        self.loads = deque()
+        try:
+            for _ in range(size):
+                driver.switch_to.new_window('tab')
+                self.free.append(driver.current_window_handle)
+                if lean:
+                    # URL blocking is set per tab
+                    enable_request_blocking(driver)
+        finally:
+            driver.switch_to.window(self.main_handle)
+
+    def submit(self, entry, url):
+        # Starts loading url in a free tab, waiting for one if all are busy. Returns the
+        # (entry, restaurant_info) pairs that finished meanwhile; restaurant_info is None for failed pages.
+        finished = []
+        while not self.free:
+            finished.extend(self.poll())
+            if not self.free:
+                self.wait_policy.sleep(self.wait_policy.poll_interval)
+        handle = self.free.pop()
+        pace(self.wait_policy, self.metrics)
+        self.driver.switch_to.window(handle)
+        try:
+            if place_id_from_url(url):
+                self.driver.execute_script("window.location.replace(arguments[0]);", url)
+            else:
+                # Without an id in the url the previous page in the tab can't be told apart; load it in full
+                self.driver.get(url)
+        finally:
+            self.driver.switch_to.window(self.main_handle)
+        self.loads.append(TabLoad(entry, url, handle))
+        return finished
+
+    def complete(self, entry, restaurant_info):
+        # Queues a result that needed no tab (cache, HTTP, a duplicate) behind the loads still in flight
+        self.loads.append(TabLoad(entry, None, None, done=True, restaurant_info=restaurant_info))
+        return self.poll()
+
+    def poll(self):
+        # Parses every tab whose page is ready; returns the completed prefix of the submission order
+        for load in self.loads:
+            if not load.done:
+                self.check(load)
+        self.driver.switch_to.window(self.main_handle)
+        finished = []
+        while self.loads and self.loads[0].done:
+            load = self.loads.popleft()
+            finished.append((load.entry, load.restaurant_info))
+        return finished
+
+    def drain(self):
+        finished = []
+        while self.loads:
+            finished.extend(self.poll())
+            if self.loads:
+                self.wait_policy.sleep(self.wait_policy.poll_interval)
+        return finished
+
+    def check(self, load):
+        wait = self.wait_policy
+        elapsed = time.monotonic() - load.started
+        try:
+            self.driver.switch_to.window(load.handle)
+            section_shown = place_section_shows(load.place_id)(self.driver)
+            # Like the single-pane path: the name is rendered last, so give it a little longer than the section
+            if not section_shown or (not element_has_text(By.CSS_SELECTOR, 'span.GHAhO')(self.driver)
+                                     and elapsed < wait.detail_timeout):
+                if elapsed >= wait.detail_timeout:
+                    logging.error(f"Detail tab did not load place {load.place_id}")
+                    self.finish(load, None, elapsed)
+                return
+            with self.metrics.span('parse'):
+                try:
+                    restaurant_info = extract_restaurant_detail(self.driver)
+                except JavascriptException as e:
+                    logging.warning(f"In-page extraction failed for place {load.place_id}, parsing the page "
+                                    f"source: {e}")
+                    restaurant_info = parse_restaurant_detail(self.driver.page_source)
+            self.finish(load, restaurant_info, elapsed)
+        except WebDriverException as e:
+            if elapsed >= wait.detail_timeout:
+                logging.error(f"An error occurred while loading place {load.place_id} in a tab: {e}")
+                self.finish(load, None, elapsed)
+
+    def finish(self, load, restaurant_info, elapsed):
+        load.done = True
+        load.restaurant_info = restaurant_info
+        self.metrics.observe('tab load', elapsed)
+        if restaurant_info:
+            self.wait_policy.rate_limiter.record_success(elapsed)
+            remember_detail(load.entry, restaurant_info, self.place_cache)
+        else:
+            self.wait_policy.rate_limiter.record_failure()
+        self.free.append(load.handle)
+
+    def close(self):
+        # Closes the extra tabs; loads still in flight are dropped
+        for handle in self.free + [load.handle for load in self.loads if not load.done]:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except WebDriverException:
+                pass
+        self.free = []
+        self.loads.clear()
+        try:
+            self.driver.switch_to.window(self.main_handle)
+        except WebDriverException:
+            pass
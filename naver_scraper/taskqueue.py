@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from naver_scraper.tasks import ScrapingTask
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def worker_name():
+    # Unique per process and readable in the status listing, e.g. "scraper-2:4711:1a2b3c"
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class TaskQueue:
+    # Durable queue of ScrapingTasks in a SQLite file, seeded from a task list. Any number of worker
+    # processes claim tasks from it; a claim is a lease of lease_seconds that the worker renews with
+    # heartbeats while it scrapes. A task whose lease runs out (its worker died or hung) or whose run
+    # failed is queued again, until it has been tried max_attempts times. Tasks keep their position in
+    # the seeded list as task_index, so their records land under the same journal keys as a CLI run of
+    # that list. Workers on several machines can share the file only over a filesystem with working
+    # locks (not most network shares).
+    def __init__(self, path, lease_seconds=120, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        # Other processes hold the write lock only briefly, but under load a claim may have to wait for it
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS queue (
+                task_index INTEGER PRIMARY KEY,
+                task TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS queue_status ON queue (status, task_index)")
+
+    def seed(self, tasks):
+        # Adds the tasks of a task list by position; seeding the same list again adds nothing, so every
+        # worker can be started with it. Returns the number of tasks added.
+        now = time.time()
+        added = 0
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                existing = dict(self.conn.execute("SELECT task_index, task FROM queue"))
+                for task_index, task in enumerate(tasks):
+                    task_json = json.dumps(task.to_dict(), ensure_ascii=False, sort_keys=True)
+                    if task_index in existing:
+                        if existing[task_index] != task_json:
+                            logging.warning(f"Task {task_index + 1} differs from the one already queued "
+                                            f"at that position; keeping the queued one")
+                        continue
+                    self.conn.execute("INSERT INTO queue (task_index, task, updated_at) VALUES (?, ?, ?)",
+                                      (task_index, task_json, now))
+                    added += 1
+        return added
+
+    def claim(self, worker):
+        # Leases the first queued task to worker; returns (task_index, task) or None if none is queued.
+        # Expired leases are put back first, so a dead worker's task is picked up by the next claim.
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.requeue_expired(now)
+                row = self.conn.execute("SELECT task_index, task FROM queue WHERE status = ? "
+                                        "ORDER BY task_index LIMIT 1", (QUEUED,)).fetchone()
+                if row is None:
+                    return None
+                self.conn.execute("UPDATE queue SET status = ?, worker = ?, lease_expires = ?, "
+                                  "attempts = attempts + 1, updated_at = ? WHERE task_index = ?",
+                                  (LEASED, worker, now + self.lease_seconds, now, row[0]))
+        return row[0], ScrapingTask.from_dict(json.loads(row[1]))
+
+    def requeue_expired(self, now):
+        expired = self.conn.execute("SELECT task_index, worker, attempts FROM queue WHERE status = ? "
+                                    "AND lease_expires < ?", (LEASED, now)).fetchall()
+        for task_index, worker, attempts in expired:
+            status = QUEUED if attempts < self.max_attempts else FAILED
+            logging.warning(f"Lease of task {task_index + 1} held by {worker} expired after attempt {attempts}; "
+                            f"task is {status}")
+            self.conn.execute("UPDATE queue SET status = ?, worker = NULL, lease_expires = NULL, last_error = ?, "
+                              "updated_at = ? WHERE task_index = ?",
+                              (status, f"lease held by {worker} expired", now, task_index))
+
+    def heartbeat(self, task_index, worker):
+        # Extends the lease; False if the worker no longer holds it (it expired and was requeued)
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute("UPDATE queue SET lease_expires = ?, updated_at = ? "
+                                       "WHERE task_index = ? AND worker = ? AND status = ?",
+                                       (now + self.lease_seconds, now, task_index, worker, LEASED))
+        return cursor.rowcount == 1
+
+    def complete(self, task_index, worker):
+        self.finish(task_index, worker, DONE)
+
+    def fail(self, task_index, worker, error):
+        # Queued again for another attempt, or failed for good after max_attempts
+        with self.lock:
+            row = self.conn.execute("SELECT attempts FROM queue WHERE task_index = ?", (task_index,)).fetchone()
+        status = QUEUED if row and row[0] < self.max_attempts else FAILED
+        self.finish(task_index, worker, status, error)
+        return status
+
+    def release(self, task_index, worker):
+        # The worker is shutting down: hand the task back without counting the attempt
+        with self.lock:
+            self.conn.execute("UPDATE queue SET status = ?, worker = NULL, lease_expires = NULL, "
+                              "attempts = MAX(attempts - 1, 0), updated_at = ? "
+                              "WHERE task_index = ? AND worker = ? AND status = ?",
+                              (QUEUED, time.time(), task_index, worker, LEASED))
+
+    def finish(self, task_index, worker, status, error=None):
+        with self.lock:
+            cursor = self.conn.execute("UPDATE queue SET status = ?, worker = NULL, lease_expires = NULL, "
+                                       "last_error = ?, updated_at = ? WHERE task_index = ? AND worker = ?",
+                                       (status, error, time.time(), task_index, worker))
+        if cursor.rowcount != 1:
+            logging.warning(f"Task {task_index + 1} was no longer leased to {worker} when it finished")
+
+    def counts(self):
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM queue GROUP BY status"))
+        return {status: counts.get(status, 0) for status in (QUEUED, LEASED, DONE, FAILED)}
+
+    def unfinished(self):
+        # True while tasks are queued or leased; a worker that can't claim one waits for leases to end
+        counts = self.counts()
+        return counts[QUEUED] + counts[LEASED] > 0
+
+    def rows(self):
+        with self.lock:
+            return self.conn.execute("SELECT task_index, task, status, attempts, worker, lease_expires, last_error "
+                                     "FROM queue ORDER BY task_index").fetchall()
+
+    def tasks(self):
+        # The seeded task list, for exporting the shared results
+        return [ScrapingTask.from_dict(json.loads(row[1])) for row in self.rows()]
+
+    def retry_failed(self):
+        # Gives tasks that failed for good a fresh set of attempts; returns how many were queued
+        with self.lock:
+            cursor = self.conn.execute("UPDATE queue SET status = ?, attempts = 0, updated_at = ? WHERE status = ?",
+                                       (QUEUED, time.time(), FAILED))
+        return cursor.rowcount
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
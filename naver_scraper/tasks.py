@@ -0,0 +1,82 @@
+import csv
+import json
+import logging
+import os
+
+# Columns of a CSV task file, named like the keys of a JSON one; only address is required
+TASK_FIELDS = ['address', 'search_query', 'num_restaurants', 'zoom_level', 'tiles']
+# Used for columns a CSV task file leaves out or empty (the Add Task dialog's defaults)
+TASK_DEFAULTS = {'search_query': "근처 식당", 'num_restaurants': 50, 'zoom_level': 50, 'tiles': 1}
+
+
+class ScrapingTask:
+    def __init__(self, address, search_query, num_restaurants, zoom_level, tiles=1):
+        self.address = address
+        self.search_query = search_query
+        self.num_restaurants = num_restaurants
+        self.zoom_level = zoom_level
+        # Grid size per side for tiling mode; 1 searches the whole area at once
+        self.tiles = tiles
+
+    def to_dict(self):
+        data = {
+            'address': self.address,
+            'search_query': self.search_query,
+            'num_restaurants': self.num_restaurants,
+            'zoom_level': self.zoom_level
+        }
+        # Left out when unused so untiled tasks keep their journal keys and task files stay as they were
+        if self.tiles > 1:
+            data['tiles'] = self.tiles
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['address'], data['search_query'], data['num_restaurants'], data['zoom_level'],
+                   data.get('tiles', 1))
+
+
+def is_csv(filename):
+    return os.path.splitext(filename)[1].lower() == '.csv'
+
+
+def load_tasks(filename):
+    # A JSON task list saved by the GUI, or a CSV file with a header row of TASK_FIELDS (e.g. generated
+    # from a spreadsheet of address/query combinations)
+    if is_csv(filename):
+        return load_tasks_csv(filename)
+    with open(filename, 'r', encoding='utf-8') as f:
+        return [ScrapingTask.from_dict(data) for data in json.load(f)]
+
+
+def load_tasks_csv(filename):
+    tasks = []
+    # utf-8-sig also reads files saved by Excel, which start with a byte order mark
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            values = {field: (row.get(field) or '').strip() for field in TASK_FIELDS}
+            if not values['address']:
+                continue
+            try:
+                tasks.append(ScrapingTask(values['address'],
+                                          values['search_query'] or TASK_DEFAULTS['search_query'],
+                                          int(values['num_restaurants'] or TASK_DEFAULTS['num_restaurants']),
+                                          int(values['zoom_level'] or TASK_DEFAULTS['zoom_level']),
+                                          int(values['tiles'] or TASK_DEFAULTS['tiles'])))
+            except ValueError as e:
+                logging.warning(f"Skipping line {reader.line_num} of {filename}: {e}")
+    return tasks
+
+
+def save_tasks(filename, tasks):
+    if is_csv(filename):
+        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(TASK_FIELDS)
+            writer.writerows([task.address, task.search_query, task.num_restaurants, task.zoom_level, task.tiles]
+                             for task in tasks)
+        return
+    # One write of the whole list; json.dump writes every token separately
+    with open(filename, 'w') as f:
+        f.write(json.dumps([task.to_dict() for task in tasks]))
@@ -0,0 +1,111 @@
+import math
+import threading
+from collections import deque
+
+# Naver's result list stops after this many places however many match, so a tile that lists this many
+# probably has more and is split
+LIST_RESULT_CAP = 300
+# Tiles are split at most this many times (each split quarters a tile at the next zoom level)
+MAX_TILE_DEPTH = 3
+# The scraping browser's viewport in CSS pixels (setup_driver's window size)
+VIEWPORT_WIDTH = 1920
+VIEWPORT_HEIGHT = 1080
+EARTH_CIRCUMFERENCE = 2 * math.pi * 6378137
+
+
+def is_lon_lat(x, y):
+    # Map URLs carry longitude/latitude or Web Mercator meters; meters are far outside these bounds
+    return abs(x) <= 180 and abs(y) <= 90
+
+
+def viewport_span(x, y, zoom):
+    # Width and height the browser's viewport covers at zoom, in the units of x and y
+    scale = 256 * 2 ** zoom
+    if is_lon_lat(x, y):
+        return VIEWPORT_WIDTH * 360 / scale, VIEWPORT_HEIGHT * 360 * math.cos(math.radians(y)) / scale
+    return VIEWPORT_WIDTH * EARTH_CIRCUMFERENCE / scale, VIEWPORT_HEIGHT * EARTH_CIRCUMFERENCE / scale
+
+
+class MapTile:
+    # A map viewport one search is run in; label is its path in the grid, e.g. "2,1" or "2,1/3"
+    def __init__(self, label, x, y, zoom, depth=0):
+        self.label = label
+        self.x = x
+        self.y = y
+        self.zoom = zoom
+        self.depth = depth
+
+    @property
+    def position(self):
+        # In the form map_position_from_url returns and map_search_url takes
+        return f"{self.x:.7f}", f"{self.y:.7f}", self.zoom
+
+    def can_split(self):
+        return self.depth < MAX_TILE_DEPTH
+
+    def split(self):
+        # The four quarters of the tile, each at the next zoom level
+        width, height = viewport_span(self.x, self.y, self.zoom)
+        return [MapTile(f"{self.label}/{quarter}", self.x + dx * width / 4, self.y + dy * height / 4,
+                        self.zoom + 1, self.depth + 1)
+                for quarter, (dx, dy) in enumerate([(-1, 1), (1, 1), (-1, -1), (1, -1)])]
+
+
+def tile_grid(position, grid_size):
+    # Splits the viewport at position (x, y, zoom) into grid_size x grid_size tiles that together cover it,
+    # row by row from the north-west corner
+    x, y, zoom = float(position[0]), float(position[1]), float(position[2])
+    width, height = viewport_span(x, y, zoom)
+    tile_zoom = zoom + math.log2(grid_size)
+    tiles = []
+    for row in range(grid_size):
+        for column in range(grid_size):
+            tiles.append(MapTile(f"{row + 1},{column + 1}",
+                                 x + ((column + 0.5) / grid_size - 0.5) * width,
+                                 y - ((row + 0.5) / grid_size - 0.5) * height,
+                                 round(tile_zoom, 2)))
+    return tiles
+
+
+class TileQueue:
+    # Tiles of one task waiting to be searched, shared by its tile workers. take() waits while the queue
+    # is empty but tiles in progress may still be split, and returns None once all are done or the
+    # queue is closed (task stopped or enough restaurants scraped).
+    def __init__(self, tiles):
+        self.condition = threading.Condition()
+        self.waiting = deque(tiles)
+        self.unfinished = len(self.waiting)
+        self.closed = False
+        self.searched = 0
+        self.splits = 0
+
+    def take(self):
+        with self.condition:
+            while not self.waiting and self.unfinished and not self.closed:
+                self.condition.wait()
+            if self.closed or not self.waiting:
+                return None
+            return self.waiting.popleft()
+
+    def split(self, tile):
+        with self.condition:
+            quarters = tile.split()
+            self.waiting.extend(quarters)
+            self.unfinished += len(quarters)
+            self.splits += 1
+            self.condition.notify_all()
+
+    def done(self):
+        with self.condition:
+            self.unfinished -= 1
+            self.searched += 1
+            self.condition.notify_all()
+
+    def finished(self):
+        with self.condition:
+            return self.closed or not self.unfinished
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
@@ -0,0 +1,83 @@
+import copy
+import time
+
+from naver_scraper.ratelimit import NO_RATE_LIMIT, backoff_delay
+
+
+class ScrapeCancelled(Exception):
+    # Raised out of a wait, sleep or rate limiter wait once the engine the policy is bound to was stopped
+    pass
+
+
+class WaitPolicy:
+    # Polling interval and upper bounds (seconds) for every readiness wait in the scrape path, plus the
+    # run's pacing: failed clicks are retried up to max_retries times with a jittered exponential
+    # backoff starting at retry_delay, and requests to Naver go through rate_limiter (see RateLimiter).
+    # A policy with a rate limiter is meant to be shared by every engine of the run. Each engine works
+    # with a copy bound to its stop event (bound_to), so every wait and sleep ends within about
+    # poll_interval of a stop by raising ScrapeCancelled.
+    def __init__(self, poll_interval=0.2, page_timeout=90, element_timeout=30, click_timeout=10,
+                 detail_timeout=30, scroll_timeout=3, zoom_interval=0.3, retry_delay=2, restaurant_delay=0,
+                 max_retries=3, max_retry_delay=30, rate_limiter=None):
+        self.poll_interval = poll_interval
+        self.page_timeout = page_timeout
+        self.element_timeout = element_timeout
+        self.click_timeout = click_timeout
+        self.detail_timeout = detail_timeout
+        self.scroll_timeout = scroll_timeout
+        self.zoom_interval = zoom_interval
+        self.retry_delay = retry_delay
+        self.restaurant_delay = restaurant_delay
+        self.max_retries = max_retries
+        self.max_retry_delay = max_retry_delay
+        self.rate_limiter = rate_limiter or NO_RATE_LIMIT
+        self.cancel_event = None
+
+    def bound_to(self, cancel_event):
+        policy = copy.copy(self)
+        policy.cancel_event = cancel_event
+        return policy
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled():
+            raise ScrapeCancelled()
+
+    def sleep(self, seconds):
+        if self.cancel_event is None:
+            time.sleep(seconds)
+        elif self.cancel_event.wait(seconds):
+            raise ScrapeCancelled()
+
+    def wait(self, driver, timeout):
+        # Selenium is imported on first use, so building a policy (e.g. in the GUI at startup) doesn't load it
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+
+        return WebDriverWait(driver, timeout, poll_frequency=self.poll_interval,
+                             ignored_exceptions=(NoSuchElementException, StaleElementReferenceException))
+
+    def retry_pause(self, attempt):
+        # Seconds to wait before retry number attempt + 1
+        return backoff_delay(attempt, self.retry_delay, self.max_retry_delay)
+
+    def until(self, driver, timeout, condition, message=""):
+        # The condition is polled every poll_interval, so checking for a stop before each poll is enough
+        def _condition_unless_cancelled(driver):
+            self.check_cancelled()
+            return condition(driver)
+        return self.wait(driver, timeout).until(_condition_unless_cancelled, message)
+
+    def soft_until(self, driver, timeout, condition):
+        # Like until(), but a timeout only means "carry on" instead of failing the step
+        from selenium.common.exceptions import TimeoutException
+
+        try:
+            return self.until(driver, timeout, condition)
+        except TimeoutException:
+            return None
+
+
+DEFAULT_WAIT_POLICY = WaitPolicy()
@@ -0,0 +1,310 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from naver_scraper.cache import GeocodeCache, PlaceCache
+from naver_scraper.dedup import DedupIndex
+from naver_scraper.export import EXPORTERS, create_exporter
+from naver_scraper.journal import ScrapeJournal, task_key
+from naver_scraper.metrics import ScrapeMetrics
+from naver_scraper.ratelimit import RateLimiter
+from naver_scraper.taskqueue import FAILED, LEASED, TaskQueue, worker_name
+from naver_scraper.tasks import ScrapingTask, load_tasks
+from naver_scraper.waits import DEFAULT_WAIT_POLICY, WaitPolicy
+
+
+class QueueWorker:
+    # Claims tasks from a TaskQueue and scrapes them, up to threads at once with browsers from one
+    # DriverPool, until the queue has nothing left. Records go to the shared results journal as they are
+    # scraped, so a task requeued after its worker died resumes where that worker stopped. Leases are
+    # renewed every lease_seconds / 3; a task whose lease was lost (e.g. the worker was suspended) is
+    # stopped, since another worker may have taken it over. Each thread claims under its own name (the
+    # worker's name and the thread's number), so a lease belongs to the thread scraping the task.
+    def __init__(self, queue, journal, threads=1, wait_policy=DEFAULT_WAIT_POLICY, http_fetcher=None,
+                 place_cache=None, geocode_cache=None, dedup=None, metrics=None, driver_pool=None, lean=False,
+                 detail_tabs=0, name=None, poll_interval=5):
+        self.queue = queue
+        self.journal = journal
+        self.threads = threads
+        self.wait_policy = wait_policy
+        self.http_fetcher = http_fetcher
+        self.place_cache = place_cache
+        self.geocode_cache = geocode_cache
+        self.dedup = dedup
+        self.metrics = metrics
+        self.driver_pool = driver_pool
+        self.lean = lean
+        self.detail_tabs = detail_tabs
+        self.name = name or worker_name()
+        self.poll_interval = poll_interval
+        # Running engines and the name of the thread that holds their lease, by task index
+        self.engines = {}
+        self.lost_leases = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.completed = 0
+        self.failed = 0
+
+    def run(self):
+        heartbeat = threading.Thread(target=self.heartbeat_loop, daemon=True)
+        heartbeat.start()
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for thread in range(1, self.threads + 1):
+                executor.submit(self.work, f"{self.name}-{thread}")
+        self.stop_event.set()
+        heartbeat.join()
+
+    def work(self, name):
+        try:
+            while not self.stop_event.is_set():
+                claimed = self.queue.claim(name)
+                if claimed is None:
+                    # Leases of other workers may still run out and put their tasks back
+                    if not self.queue.unfinished():
+                        return
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                self.run_task(name, *claimed)
+        except Exception as e:
+            logging.exception(f"Worker thread {name} stopped: {e}")
+
+    def run_task(self, name, task_index, task):
+        from naver_scraper.engine import ScrapeEngine
+
+        messages = []
+        with self.lock:
+            if self.stop_event.is_set():
+                self.queue.release(task_index, name)
+                return
+            engine = ScrapeEngine(task, self.wait_policy, self.http_fetcher, on_complete=messages.append,
+                                  journal=self.journal, task_index=task_index, place_cache=self.place_cache,
+                                  dedup=self.dedup, metrics=self.metrics, driver_pool=self.driver_pool,
+                                  lean=self.lean, geocode_cache=self.geocode_cache, tile_workers=self.threads,
+                                  detail_tabs=self.detail_tabs)
+            self.engines[task_index] = (engine, name)
+        logging.info(f"{name} took task {task_index + 1}: {task.address} - {task.search_query}")
+        try:
+            engine.run()
+        finally:
+            with self.lock:
+                del self.engines[task_index]
+                lease_lost = task_index in self.lost_leases
+                self.lost_leases.discard(task_index)
+        message = messages[-1] if messages else "no result"
+        if lease_lost:
+            logging.warning(f"Task {task_index + 1} was stopped after its lease was lost")
+        elif engine.stop_flag:
+            self.queue.release(task_index, name)
+        elif engine.journal_key and self.journal.is_completed(engine.journal_key):
+            self.queue.complete(task_index, name)
+            self.completed += 1
+            logging.info(f"Task {task_index + 1} done: {message}")
+        else:
+            status = self.queue.fail(task_index, name, message)
+            self.failed += 1
+            logging.error(f"Task {task_index + 1} failed ({message}); it is {status}")
+
+    def heartbeat_loop(self):
+        while not self.stop_event.wait(self.queue.lease_seconds / 3):
+            with self.lock:
+                running = dict(self.engines)
+            for task_index, (engine, name) in running.items():
+                if not self.queue.heartbeat(task_index, name):
+                    logging.error(f"{name} lost the lease of task {task_index + 1}; stopping it")
+                    with self.lock:
+                        self.lost_leases.add(task_index)
+                    engine.stop()
+
+    def stop(self):
+        # Running tasks stop within about a second and go back to the queue without using up an attempt
+        with self.lock:
+            self.stop_event.set()
+            for engine, _ in self.engines.values():
+                engine.stop()
+
+
+def default_results_path(queue_path):
+    return os.path.splitext(queue_path)[0] + '.results.sqlite'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m naver_scraper.worker',
+                                     description="Scrape a task list from a shared queue with any number of "
+                                                 "worker processes")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help="Add the tasks of a task file to the queue")
+    seed.add_argument('queue', help="Queue database, created if missing (e.g. run.queue.sqlite)")
+    seed.add_argument('tasks_file', help="Task list saved from the GUI (Scheduler > Save Tasks), or a CSV of tasks")
+
+    run = commands.add_parser('run', help="Claim and scrape tasks until the queue is empty")
+    run.add_argument('queue')
+    run.add_argument('--tasks', help="Seed the queue from this task file first (safe to pass to every worker)")
+    run.add_argument('--results', help="Shared results journal (default: next to the queue, .results.sqlite)")
+    run.add_argument('-p', '--processes', type=int, default=1, help="Worker processes to start on this machine")
+    run.add_argument('-w', '--workers', type=int, default=1, help="Tasks each process scrapes at the same time")
+    run.add_argument('--lease-seconds', type=float, default=120,
+                     help="A task whose worker sends no heartbeat for this long is requeued")
+    run.add_argument('--max-attempts', type=int, default=3, help="Attempts per task before it is marked failed")
+    run.add_argument('--details', choices=['browser', 'http'], default='browser')
+    run.add_argument('--detail-tabs', type=int, default=0)
+    run.add_argument('--show-browser', action='store_true')
+    run.add_argument('--lean', action='store_true')
+    run.add_argument('--rate', type=float, default=2,
+                     help="Starting requests per second of each process (0 disables rate limiting)")
+    run.add_argument('--fixed-rate', action='store_true')
+    run.add_argument('--cache-days', type=float, default=7)
+    run.add_argument('--no-geocode-cache', action='store_true')
+    run.add_argument('--no-dedup', action='store_true')
+
+    status = commands.add_parser('status', help="Show the state of every task in the queue")
+    status.add_argument('queue')
+    status.add_argument('--results')
+
+    retry = commands.add_parser('retry', help="Queue the tasks that failed for good again")
+    retry.add_argument('queue')
+
+    export = commands.add_parser('export', help="Export the shared results of the queue's tasks")
+    export.add_argument('queue')
+    export.add_argument('--results')
+    export.add_argument('-o', '--output', default="naver_restaurants_data.xlsx")
+    export.add_argument('-f', '--format', choices=sorted(EXPORTERS), default='xlsx')
+    return parser.parse_args(argv)
+
+
+def run_worker(args):
+    # Body of one worker process. Only this subcommand loads Selenium; seed, status, retry and export
+    # start in a fraction of the time.
+    from naver_scraper.drivers import DriverPool
+
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s - {os.getpid()} - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M')
+    queue = TaskQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    journal = ScrapeJournal(args.results or default_results_path(args.queue))
+    rate_limiter = RateLimiter(args.rate, adaptive=not args.fixed_rate) if args.rate > 0 else None
+    wait_policy = WaitPolicy(rate_limiter=rate_limiter)
+    http_fetcher = None
+    if args.details == 'http':
+        from naver_scraper.http_detail import HttpDetailFetcher
+        http_fetcher = HttpDetailFetcher(max_connections=max(4, args.workers * 2), rate_limiter=rate_limiter)
+    place_cache = PlaceCache(ttl=args.cache_days * 24 * 3600) if args.cache_days > 0 else None
+    geocode_cache = None if args.no_geocode_cache else GeocodeCache()
+    # Skips places already in the results when the process starts; other processes' later claims are
+    # only caught when their records are read back on the next start
+    dedup = None if args.no_dedup else DedupIndex(journal)
+    metrics = ScrapeMetrics()
+    driver_pool = DriverPool(size=args.workers, headless=not args.show_browser, spares=0, lean=args.lean)
+    worker = QueueWorker(queue, journal, args.workers, wait_policy, http_fetcher, place_cache, geocode_cache,
+                         dedup, metrics, driver_pool, args.lean, args.detail_tabs)
+    worker_thread = threading.Thread(target=worker.run)
+    worker_thread.start()
+    try:
+        while worker_thread.is_alive():
+            worker_thread.join(0.5)
+    except KeyboardInterrupt:
+        logging.info(f"Stopping {worker.name}; its tasks go back to the queue")
+        worker.stop()
+        worker_thread.join()
+    finally:
+        driver_pool.close()
+        if http_fetcher:
+            http_fetcher.close()
+        if place_cache:
+            place_cache.close()
+        if geocode_cache:
+            geocode_cache.close()
+    for line in metrics.summary_lines():
+        logging.info(line)
+    if rate_limiter:
+        logging.info(f"Rate limiter: {rate_limiter.describe()}")
+    logging.info(f"{worker.name} finished {worker.completed} tasks, {worker.failed} failed attempts")
+    journal.close()
+    queue.close()
+
+
+def print_status(args):
+    queue = TaskQueue(args.queue)
+    journal = ScrapeJournal(args.results or default_results_path(args.queue))
+    counts = queue.counts()
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+    for task_index, task, status, attempts, worker, lease_expires, last_error in queue.rows():
+        records = journal.count_records(task_key(task_index, ScrapingTask.from_dict(json.loads(task))))
+        detail = f" by {worker}" if status == LEASED else (f": {last_error}" if status == FAILED else "")
+        print(f"{task_index + 1:>5}. {status:<7} attempts {attempts}, {records} records{detail}")
+    journal.close()
+    queue.close()
+
+
+def export_results(args):
+    queue = TaskQueue(args.queue)
+    journal = ScrapeJournal(args.results or default_results_path(args.queue))
+    task_results = journal.task_results(queue.tasks())
+    queue.close()
+    if not task_results:
+        journal.close()
+        logging.error("No data was scraped.")
+        return 1
+    exporter = create_exporter(args.format, os.path.abspath(args.output))
+    try:
+        exporter.prepare()
+    except (RuntimeError, OSError) as e:
+        logging.error(f"Can't write {args.format} output: {e}")
+        journal.close()
+        return 1
+    exporter.export(task_results)
+    exporter.write_appearances(journal.iter_appearances())
+    journal.close()
+    logging.info(f"All scraped data has been saved to {exporter.describe()}")
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M')
+    if args.command == 'seed':
+        queue = TaskQueue(args.queue)
+        added = queue.seed(load_tasks(args.tasks_file))
+        logging.info(f"Queued {added} new tasks; {queue.counts()}")
+        queue.close()
+        return 0
+    if args.command == 'status':
+        print_status(args)
+        return 0
+    if args.command == 'retry':
+        queue = TaskQueue(args.queue)
+        logging.info(f"Queued {queue.retry_failed()} failed tasks again")
+        queue.close()
+        return 0
+    if args.command == 'export':
+        return export_results(args)
+
+    if args.tasks:
+        queue = TaskQueue(args.queue)
+        queue.seed(load_tasks(args.tasks))
+        queue.close()
+    if args.processes <= 1:
+        run_worker(args)
+        return 0
+    # Separate processes rather than threads: each has its own browsers, caches and rate limiter
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=run_worker, args=(args,)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # The workers got the same Ctrl+C and hand their tasks back before exiting
+        for process in processes:
+            process.join()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixture_server import start_fixture_server
+from naver_scraper.http_detail import HttpDetailFetcher
+from naver_scraper.ratelimit import RateLimiter
+from naver_scraper.waits import ScrapeCancelled
+
+# A place page recorded in benchmarks/fixtures/place
+RECORDED_PLACE = '1005723948'
+
+
+def make_fetcher(base_url, rate_limiter=None):
+    return HttpDetailFetcher(url_template=base_url + "/restaurant/{place_id}/home", max_retries=2, timeout=5,
+                             rate_limiter=rate_limiter)
+
+
+@pytest.fixture(scope='module')
+def fixture_site():
+    server, base_url = start_fixture_server()
+    yield server, base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def throttling_site():
+    # Answers a second place page request within a second with 429 (Retry-After: 1)
+    server, base_url = start_fixture_server(place_rate_limit=1)
+    yield server, base_url
+    server.shutdown()
+
+
+def test_fetch_parses_recorded_page(fixture_site):
+    fetcher = make_fetcher(fixture_site[1])
+    try:
+        restaurant_info = fetcher.fetch(RECORDED_PLACE)
+    finally:
+        fetcher.close()
+    assert restaurant_info is not None
+    assert restaurant_info["Restaurant Name"] != "N/A"
+
+
+def test_fetch_returns_none_for_unknown_place(fixture_site):
+    limiter = RateLimiter(rate=50, burst=5, adaptive=False)
+    fetcher = make_fetcher(fixture_site[1], limiter)
+    try:
+        assert fetcher.fetch('999') is None
+    finally:
+        fetcher.close()
+    # A missing page is neither a success nor a failure of the limiter
+    assert limiter.not_found == 1
+    assert limiter.failures == 0
+
+
+def test_throttled_fetch_pauses_limiter_and_retries(throttling_site):
+    server, base_url = throttling_site
+    limiter = RateLimiter(rate=50, burst=5, adaptive=False)
+    fetcher = make_fetcher(base_url, limiter)
+    try:
+        results = [fetcher.fetch(RECORDED_PLACE) for _ in range(2)]
+    finally:
+        fetcher.close()
+    assert server.throttled >= 1
+    assert limiter.throttled >= 1
+    # The throttled request was retried once the limiter's pause was over
+    assert all(restaurant_info is not None for restaurant_info in results)
+
+
+def test_fetch_page_raises_when_cancelled(fixture_site):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    fetcher = make_fetcher(fixture_site[1], RateLimiter(rate=50, burst=5, adaptive=False))
+    try:
+        with pytest.raises(ScrapeCancelled):
+            fetcher.fetch_page(RECORDED_PLACE, cancel_event)
+        with pytest.raises(ScrapeCancelled):
+            fetcher.fetch(RECORDED_PLACE, cancel_event)
+    finally:
+        fetcher.close()